@@ -1,28 +1,42 @@
-from fastapi import Depends, HTTPException, status
+from typing import Optional
+
+from fastapi import Depends, HTTPException, WebSocket, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from app.core.config import settings
 from app.models.user import User
+from app.auth.user_cache import auth_user_cache
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login")
 
 async def get_current_user(token: str = Depends(oauth2_scheme)):
+    return await get_user_for_token(token)
+
+async def get_user_for_token(token: str):
+    """Resolve a bearer token to an active User; shared by HTTP and WebSocket auth."""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        phone_number: str = payload.get("sub")
-        if phone_number is None:
+    phone_number = auth_user_cache.get_subject(token)
+    if phone_number is None:
+        try:
+            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+            phone_number = payload.get("sub")
+            if phone_number is None:
+                raise credentials_exception
+        except JWTError:
             raise credentials_exception
-    except JWTError:
-        raise credentials_exception
-        
-    user = await User.find_one(User.phone_number == phone_number)
+        expires_at = payload.get("exp")
+        auth_user_cache.put_subject(token, phone_number, float(expires_at) if expires_at is not None else None)
+
+    user = auth_user_cache.get_user(phone_number)
     if user is None:
-        raise credentials_exception
+        user = await User.find_one(User.phone_number == phone_number)
+        if user is None:
+            raise credentials_exception
+        auth_user_cache.put_user(phone_number, user)
         
     if user.is_banned:
         raise HTTPException(
@@ -32,6 +46,14 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
         
     return user
 
+async def get_user_for_websocket(websocket: WebSocket, token: Optional[str] = None):
+    """WebSocket auth: ?token=<JWT> (browsers cannot set headers) or an Authorization: Bearer header."""
+    if not token:
+        auth_header = websocket.headers.get("authorization", "")
+        if auth_header.lower().startswith("bearer "):
+            token = auth_header[7:].strip()
+    return await get_user_for_token(token or "")
+
 async def get_current_admin(user: User = Depends(get_current_user)):
     if user.role != "admin":
         raise HTTPException(
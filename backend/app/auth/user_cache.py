@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.models.user import User
+
+
+class AuthUserCache:
+    """
+    Per-process cache behind get_current_user:
+    - token memo: raw JWT -> (subject, exp), valid until the token expires;
+    - user cache: subject (phone number) -> User, for a short TTL.
+    Both are bounded LRUs. Writes that change what auth returns (profile
+    update, ban/unban, block changes) call invalidate_*; other workers only
+    see such changes once their TTL runs out.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._tokens: "OrderedDict[str, Tuple[str, Optional[float]]]" = OrderedDict()
+        self._users: "OrderedDict[str, Tuple[float, User]]" = OrderedDict()
+        self._subject_by_user_id: Dict[str, str] = {}
+        self.stats: Dict[str, int] = {
+            "token_hits": 0,
+            "token_misses": 0,
+            "user_hits": 0,
+            "user_misses": 0,
+            "invalidations": 0,
+        }
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl_seconds > 0
+
+    def get_subject(self, token: str) -> Optional[str]:
+        entry = self._tokens.get(token)
+        if entry is not None:
+            subject, expires_at = entry
+            if expires_at is None or time.time() < expires_at:
+                self._tokens.move_to_end(token)
+                self.stats["token_hits"] += 1
+                return subject
+            del self._tokens[token]
+        self.stats["token_misses"] += 1
+        return None
+
+    def put_subject(self, token: str, subject: str, expires_at: Optional[float]) -> None:
+        if not self.enabled:
+            return
+        self._tokens[token] = (subject, expires_at)
+        self._tokens.move_to_end(token)
+        while len(self._tokens) > self.max_entries:
+            self._tokens.popitem(last=False)
+
+    def get_user(self, subject: str) -> Optional[User]:
+        entry = self._users.get(subject)
+        if entry is not None:
+            cached_at, user = entry
+            if time.monotonic() - cached_at <= self.ttl_seconds:
+                self._users.move_to_end(subject)
+                self.stats["user_hits"] += 1
+                # Handlers mutate and save current_user; never hand out the shared instance.
+                return user.model_copy(deep=True)
+            self._drop_user(subject)
+        self.stats["user_misses"] += 1
+        return None
+
+    def put_user(self, subject: str, user: User) -> None:
+        if not self.enabled:
+            return
+        self._users[subject] = (time.monotonic(), user.model_copy(deep=True))
+        self._users.move_to_end(subject)
+        if user.id is not None:
+            self._subject_by_user_id[str(user.id)] = subject
+        while len(self._users) > self.max_entries:
+            oldest_subject, _ = next(iter(self._users.items()))
+            self._drop_user(oldest_subject)
+
+    def _drop_user(self, subject: str) -> None:
+        entry = self._users.pop(subject, None)
+        if entry is not None and entry[1].id is not None:
+            self._subject_by_user_id.pop(str(entry[1].id), None)
+
+    def invalidate_subject(self, subject: Optional[str]) -> None:
+        if subject:
+            self.stats["invalidations"] += 1
+            self._drop_user(subject)
+
+    def invalidate_user_id(self, user_id: Any) -> None:
+        if user_id is None:
+            return
+        self.invalidate_subject(self._subject_by_user_id.get(str(user_id)))
+
+    def clear(self) -> None:
+        self._tokens.clear()
+        self._users.clear()
+        self._subject_by_user_id.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        token_lookups = self.stats["token_hits"] + self.stats["token_misses"]
+        user_lookups = self.stats["user_hits"] + self.stats["user_misses"]
+        return {
+            **self.stats,
+            "token_hit_rate": round(self.stats["token_hits"] / token_lookups, 4) if token_lookups else 0.0,
+            "user_hit_rate": round(self.stats["user_hits"] / user_lookups, 4) if user_lookups else 0.0,
+            "tokens_cached": len(self._tokens),
+            "users_cached": len(self._users),
+            "ttl_seconds": self.ttl_seconds,
+            "max_entries": self.max_entries,
+        }
+
+
+auth_user_cache = AuthUserCache(
+    max_entries=settings.BH_AUTH_USER_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.BH_AUTH_USER_CACHE_TTL_SECONDS,
+)
+
+
+def invalidate_cached_user(user: Optional[User] = None, user_id: Any = None) -> None:
+    """Drop a user from the auth cache after a write that changes what get_current_user returns."""
+    if user is not None:
+        auth_user_cache.invalidate_subject(user.phone_number)
+        user_id = user.id
+    auth_user_cache.invalidate_user_id(user_id)
@@ -61,6 +61,23 @@ class Settings(BaseSettings):
     # Safety tools
     BH_SAFETY_TOOLS_ENABLED: bool = True
 
+    # Auth: per-process cache of token subject -> User (0 disables)
+    BH_AUTH_USER_CACHE_TTL_SECONDS: int = 30
+    BH_AUTH_USER_CACHE_MAX_ENTRIES: int = 10000
+
+    # Chat: fan-out of WebSocket chat events across workers
+    BH_CHAT_PUBSUB: str = "inprocess"  # inprocess | redis
+    REDIS_URL: str = "redis://localhost:6379"
+
+    # Event logging: buffered = background insert_many, sync = insert inline
+    BH_EVENT_LOG_MODE: str = "buffered"  # buffered | sync
+    BH_EVENT_LOG_FLUSH_INTERVAL_MS: int = 250
+    BH_EVENT_LOG_BATCH_SIZE: int = 200
+    BH_EVENT_LOG_MAX_PENDING: int = 10000
+
+    # Max concurrent queries per request when routers fan out independent reads (1 = sequential)
+    BH_QUERY_FANOUT_CONCURRENCY: int = 8
+
     @validator("SECRET_KEY", pre=True, always=True)
     def validate_secret_key(cls, value):
         normalized = (value or "").strip()
@@ -75,6 +92,20 @@ class Settings(BaseSettings):
             raise ValueError("BH_OTP_PROVIDER must be either 'twilio' or 'test'.")
         return normalized
 
+    @validator("BH_CHAT_PUBSUB", pre=True, always=True)
+    def validate_chat_pubsub(cls, value):
+        normalized = (value or "inprocess").strip().lower()
+        if normalized not in {"inprocess", "redis"}:
+            raise ValueError("BH_CHAT_PUBSUB must be either 'inprocess' or 'redis'.")
+        return normalized
+
+    @validator("BH_EVENT_LOG_MODE", pre=True, always=True)
+    def validate_event_log_mode(cls, value):
+        normalized = (value or "buffered").strip().lower()
+        if normalized not in {"buffered", "sync"}:
+            raise ValueError("BH_EVENT_LOG_MODE must be either 'buffered' or 'sync'.")
+        return normalized
+
     @validator(
         "R2_ENDPOINT",
         "R2_BUCKET",
@@ -0,0 +1,10 @@
+import os
+
+
+def parse_int_env(name: str, default: int, min_value: int, max_value: int) -> int:
+    """Integer env setting clamped to [min_value, max_value]; unset or malformed -> default."""
+    try:
+        value = int(os.getenv(name, str(default)))
+    except ValueError:
+        value = default
+    return max(min_value, min(max_value, value))
@@ -8,46 +8,97 @@ from app.core.config import settings
 from app.models.user import User
 from app.models.chat_night import (
     ChatNightIcebreakers,
+    ChatNightIcebreakersBudget,
+    ChatNightIcebreakersContentCache,
+    ChatNightIcebreakersLease,
     ChatNightPass,
+    ChatNightQueueEntry,
     ChatNightRoom,
     MatchUnlocked,
 )
-from app.models.events import AppEvent
+from app.models.events import AppEvent, MetricRollup
 from app.models.chat import ChatThread, ChatMessage
 from app.models.admin import AdminAuditLog, SystemConfig
 from app.models.passes import PassCreditLedgerEntry, PassPurchase, UserPassWallet
 from app.models.safety import UserBlock, UserMute, UserReport
+from app.services.chat_hub import get_chat_hub
+from app.services.chat_night_events import get_chat_night_event_bus
+from app.services.event_logger import event_buffer
+from app.services.ai_icebreakers import close_openai_http_client
+from app.services.icebreaker_prefetch import get_icebreaker_prefetcher, prefetch_enabled
+from app.services.periodic import PeriodicTask
 from app.routers import auth, users, discovery, chat_night, admin, chat, internal_evals, passes, photos, voice, safety
 
+DOCUMENT_MODELS = [
+    User, 
+    ChatNightPass, 
+    ChatNightRoom, 
+    ChatNightQueueEntry,
+    MatchUnlocked,
+    ChatNightIcebreakers,
+    ChatNightIcebreakersLease,
+    ChatNightIcebreakersBudget,
+    ChatNightIcebreakersContentCache,
+    AppEvent,
+    MetricRollup,
+    ChatThread,
+    ChatMessage,
+    AdminAuditLog,
+    SystemConfig,
+    UserPassWallet,
+    PassCreditLedgerEntry,
+    PassPurchase,
+    UserBlock,
+    UserMute,
+    UserReport,
+]
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     client = AsyncIOMotorClient(settings.MONGODB_URL)
     await init_beanie(
         database=client[settings.DB_NAME], 
-        document_models=[
-            User, 
-            ChatNightPass, 
-            ChatNightRoom, 
-            MatchUnlocked,
-            ChatNightIcebreakers,
-            AppEvent,
-            ChatThread,
-            ChatMessage,
-            AdminAuditLog,
-            SystemConfig,
-            UserPassWallet,
-            PassCreditLedgerEntry,
-            PassPurchase,
-            UserBlock,
-            UserMute,
-            UserReport,
-        ]
+        document_models=DOCUMENT_MODELS
     )
     print("Startup: Connected to MongoDB and initialized Beanie models.")
+    if settings.BH_EVENT_LOG_MODE == "buffered":
+        event_buffer.start()
+    background_tasks = [
+        PeriodicTask(
+            "chat-night-room-sweeper",
+            chat_night.sweep_expired_rooms,
+            chat_night.room_sweep_interval_seconds(),
+        ),
+    ]
+    if chat_night.batch_matching_enabled():
+        background_tasks.append(
+            PeriodicTask(
+                "chat-night-batch-matcher",
+                chat_night.run_batch_match_tick,
+                chat_night.batch_interval_seconds(),
+            )
+        )
+    for task in background_tasks:
+        task.start()
+    print(f"Startup: Background tasks running: {', '.join(task.name for task in background_tasks)}")
+    await get_chat_hub().start()
+    await get_chat_night_event_bus().start()
+    print(f"Startup: Chat pub/sub: {settings.BH_CHAT_PUBSUB}")
+    if prefetch_enabled():
+        get_icebreaker_prefetcher().start()
+        print(f"Startup: Icebreaker prefetch workers: {get_icebreaker_prefetcher().workers}")
     yield
     # Shutdown
     print("Shutdown: Closing connections...")
+    for task in background_tasks:
+        await task.stop()
+    await get_icebreaker_prefetcher().stop()
+    await close_openai_http_client()
+    await get_chat_hub().stop()
+    await get_chat_night_event_bus().stop()
+    # Last: background tasks above may still log events while stopping.
+    await event_buffer.stop()
 
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
@@ -1,13 +1,34 @@
 from beanie import Document, PydanticObjectId
-from pydantic import Field
+from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional
+
+class ReadMark(BaseModel):
+    """One mark_read step: the messages after `since` up to and including `upto` were read at `read_at`."""
+    upto_id: PydanticObjectId
+    upto_created_at: datetime
+    # None: nothing was read before this step.
+    since_id: Optional[PydanticObjectId] = None
+    since_created_at: Optional[datetime] = None
+    read_at: datetime
+
 
 class ChatThread(Document):
     match_id: PydanticObjectId
     participants: List[PydanticObjectId]
     last_message_at: Optional[datetime] = None
     last_message_text: Optional[str] = None
+    last_message_id: Optional[PydanticObjectId] = None
+    # Keyed by str(participant_id). unread_counts is $inc'ed for the recipient on
+    # send and reset on mark_read; scripts/backfill_chat_unread_counters.py repairs drift.
+    unread_counts: Dict[str, int] = Field(default_factory=dict)
+    # Read watermark: the participant has read every message up to and including
+    # last_read_message_id, as of last_read_at. ChatMessage.read_at is legacy.
+    last_read_message_id: Dict[str, PydanticObjectId] = Field(default_factory=dict)
+    last_read_at: Dict[str, datetime] = Field(default_factory=dict)
+    # The watermark's recent steps (newest last, capped), so each message reports
+    # when it was actually read rather than the latest last_read_at.
+    read_marks: Dict[str, List[ReadMark]] = Field(default_factory=dict)
     created_at: datetime = Field(default_factory=datetime.utcnow)
     
     class Settings:
@@ -47,6 +68,8 @@ class ChatMessage(Document):
     class Settings:
         name = "chat_messages"
         indexes = [
-            [("thread_id", 1), ("created_at", -1)],
+            # _id is the tiebreaker of the (created_at, _id) keyset cursor; having it in
+            # the index keeps the paged sort non-blocking.
+            [("thread_id", 1), ("created_at", -1), ("_id", -1)],
             "sender_id"
         ]
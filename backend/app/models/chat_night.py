@@ -1,7 +1,8 @@
 from beanie import Document
 from pydantic import Field
+from pymongo import IndexModel
 from datetime import datetime
-from typing import Optional, List
+from typing import Dict, Optional, List
 
 class ChatNightPass(Document):
     user_id: str = Field(..., index=True)
@@ -31,9 +32,27 @@ class ChatNightRoom(Document):
     class Settings:
         name = "chat_night_rooms"
         indexes = [
+            IndexModel([("room_id", 1)], unique=True),
             "starts_at",
-            "male_user_id",
-            "female_user_id"
+            # Room lookups are `$or` on either participant plus state/starts_at;
+            # each branch gets its own compound index (see scripts/verify_room_query_plans.py).
+            IndexModel([("male_user_id", 1), ("state", 1), ("starts_at", 1)]),
+            IndexModel([("female_user_id", 1), ("state", 1), ("starts_at", 1)]),
+            # Expiry sweeper: live rooms past ends_at.
+            IndexModel([("state", 1), ("ends_at", 1)]),
+        ]
+
+class ChatNightQueueEntry(Document):
+    user_id: str = Field(..., unique=True)
+    side: str # men, women
+    enqueued_at: datetime
+    wait_since: datetime
+
+    class Settings:
+        name = "chat_night_queue"
+        indexes = [
+            IndexModel([("user_id", 1)], unique=True), # one queue slot per user across workers
+            [("side", 1), ("enqueued_at", 1), ("_id", 1)] # FIFO scan per side
         ]
 
 class MatchUnlocked(Document):
@@ -46,7 +65,8 @@ class MatchUnlocked(Document):
         name = "matches_unlocked"
         indexes = [
             "room_id",
-            "user_ids"
+            "user_ids",
+            "created_at",  # admin overview: matches today
         ]
 
 
@@ -75,3 +95,68 @@ class ChatNightIcebreakers(Document):
             [("provider_requested", 1), ("openai_attempted_at", -1)],
             [("requester_user_id", 1), ("openai_attempted_at", -1)],
         ]
+
+
+class ChatNightIcebreakersLease(Document):
+    """
+    Cross-worker lock on icebreaker generation for one room: whoever holds an
+    unexpired lease generates, everyone else waits for the cache entry.
+    """
+    room_id: str
+    owner: str
+    expires_at: datetime
+
+    class Settings:
+        name = "chat_night_icebreakers_leases"
+        indexes = [
+            IndexModel([("room_id", 1)], unique=True),
+            # Mongo reaps leases abandoned by a crashed worker (takeover does not wait for it).
+            IndexModel([("expires_at", 1)], expireAfterSeconds=3600),
+        ]
+
+
+class ChatNightIcebreakersBudget(Document):
+    """
+    OpenAI spend counters for icebreakers, one document per UTC day, updated
+    atomically by should_call_openai (see ai_icebreakers). The global daily cap
+    bounds how many user/room keys a document can collect.
+    """
+    day: str  # YYYY-MM-DD (UTC)
+    calls: int = 0
+    user_calls: Dict[str, int] = Field(default_factory=dict)
+    room_calls: Dict[str, int] = Field(default_factory=dict)
+    last_call_at: Optional[datetime] = None
+    expires_at: datetime
+
+    class Settings:
+        name = "chat_night_icebreakers_budget"
+        indexes = [
+            IndexModel([("day", 1)], unique=True),
+            IndexModel([("expires_at", 1)], expireAfterSeconds=0),
+        ]
+
+
+class ChatNightIcebreakersContentCache(Document):
+    """
+    LLM icebreakers keyed by what produced them, the sanitized pair context
+    (without room_id) and the prompt version, so a pair or identical profiles
+    rematched in another room reuse them. Entries expire `expires_at`, which
+    every hit pushes back (least recently used entries age out).
+    """
+    content_hash: str
+    prompt_version: str
+    reasons: List[str] = Field(default_factory=list)
+    icebreakers: List[str] = Field(default_factory=list)
+    model: str = "none"
+    hit_count: int = 0
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    last_hit_at: Optional[datetime] = None
+    expires_at: datetime
+
+    class Settings:
+        name = "chat_night_icebreakers_content_cache"
+        indexes = [
+            IndexModel([("content_hash", 1), ("prompt_version", 1)], unique=True),
+            IndexModel([("expires_at", 1)], expireAfterSeconds=0),
+            "prompt_version",
+        ]
@@ -1,4 +1,5 @@
 from beanie import Document
+from pymongo import IndexModel
 from pydantic import Field
 from datetime import datetime
 from typing import Optional, Dict, Any
@@ -19,3 +20,22 @@ class AppEvent(Document):
             "event_name",
             "user_id"
         ]
+
+
+class MetricRollup(Document):
+    """
+    Pre-aggregated AppEvent counters for one UTC hour or day, maintained by
+    app/services/metric_rollups.py as events are written.
+    """
+    granularity: str # 'hour' | 'day'
+    bucket_start: datetime
+    counters: Dict[str, int] = Field(default_factory=dict)
+    # HyperLogLog registers (str(index) -> rank) over the bucket's user_ids
+    active_users_sketch: Dict[str, int] = Field(default_factory=dict)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+    class Settings:
+        name = "metric_rollups"
+        indexes = [
+            IndexModel([("granularity", 1), ("bucket_start", 1)], unique=True),
+        ]
@@ -1,6 +1,6 @@
 from typing import Optional
-from beanie import Document
-from pydantic import Field
+from beanie import Document, Insert, PydanticObjectId, Replace, Save, SaveChanges, before_event
+from pydantic import BaseModel, Field, model_validator
 from datetime import datetime
 
 class User(Document):
@@ -46,16 +46,58 @@ class User(Document):
     photos: Optional[list[str]] = None
     
     created_at: datetime = Field(default_factory=datetime.utcnow)
-    
-    @property
-    def profile_completion(self) -> int:
+
+    # Derived, stored so the admin list can filter on an index. Refreshed on
+    # every insert/save; scripts/backfill_user_search_fields.py fills old docs.
+    profile_completion: int = 0
+    profile_tier: str = "Bronze"
+    phone_reversed: Optional[str] = None # phone-suffix search as an indexed prefix match
+
+    @model_validator(mode="after")
+    def fill_missing_derived_fields(self):
+        # Documents written before these fields existed: compute them on load
+        # so reads stay correct until scripts/backfill_user_search_fields.py
+        # has run (Mongo-side filters on them still need the backfill).
+        if not {"profile_completion", "profile_tier", "phone_reversed"} <= self.model_fields_set:
+            self.refresh_derived_fields()
+        return self
+
+    @before_event(Insert, Replace, Save, SaveChanges)
+    def refresh_derived_fields(self):
         from app.services.profile_scoring import compute_profile_strength
-        return compute_profile_strength(self)["completion_percent"]
+        strength = compute_profile_strength(self)
+        self.profile_completion = strength["completion_percent"]
+        self.profile_tier = strength["tier"]
+        self.phone_reversed = self.phone_number[::-1] if self.phone_number else None
 
     class Settings:
         name = "users"
         indexes = [
             "created_at",
-            "gender",
-            [("phone_number", 1)] # Ensure unique handled by field def, but explicit index good practice
+            [("phone_number", 1)], # Ensure unique handled by field def, but explicit index good practice
+            "phone_reversed",
+            # Admin list filters; each ends in the (created_at, _id) keyset sort.
+            # The gender one also serves plain gender lookups.
+            [("gender", 1), ("created_at", -1), ("_id", -1)],
+            [("is_banned", 1), ("created_at", -1), ("_id", -1)],
+            [("onboarding_completed", 1), ("created_at", -1), ("_id", -1)],
+            [("profile_tier", 1), ("created_at", -1), ("_id", -1)],
+            # Range filter: sort keys first (equality-sort-range), completion
+            # checked on the index while walking in sort order.
+            [("created_at", -1), ("_id", -1), ("profile_completion", 1)],
         ]
+
+
+class UserMatchProjection(BaseModel):
+    """
+    Slim User view for Chat Night candidate scans: the fields V5 scoring reads
+    plus what entitlement checks need (gender, phone_number for whitelists).
+    """
+    id: PydanticObjectId = Field(alias="_id")
+    phone_number: str
+    gender: Optional[str] = None
+    habits: Optional[dict] = Field(default_factory=dict)
+    interests: Optional[list[str]] = Field(default_factory=list)
+    values: Optional[list[str]] = Field(default_factory=list)
+    languages: Optional[list[str]] = Field(default_factory=list)
+    prompts: Optional[list[dict]] = Field(default_factory=list)
@@ -1,5 +1,7 @@
-from fastapi import APIRouter, Depends, HTTPException, Body, Query
-from typing import List, Optional, Dict, Any
+from fastapi import APIRouter, Depends, HTTPException, Body, Query, Response
+from typing import List, Optional, Dict, Any, Tuple
+import base64
+import re
 from datetime import datetime, timedelta, timezone
 from beanie import PydanticObjectId, operators as Ops
 
@@ -10,7 +12,13 @@ from app.models.chat import ChatThread, ChatMessage
 from app.models.admin import AdminAuditLog, SystemConfig
 from app.models.safety import UserReport
 from app.auth.dependencies import get_current_admin
+from app.auth.user_cache import auth_user_cache, invalidate_cached_user
 from app.services.profile_scoring import compute_profile_strength
+from app.services.event_logger import event_buffer
+from app.services.icebreaker_content_cache import get_icebreaker_content_cache, stored_entry_stats
+from app.services.icebreaker_prefetch import get_icebreaker_prefetcher
+from app.services.metric_rollups import day_metrics, rolling_window_metrics
+from app.services.query_fanout import gather_queries, server_timing_header
 
 router = APIRouter()
 VALID_REPORT_STATUSES = {"open", "resolved"}
@@ -49,48 +57,75 @@ async def apply_ban_to_user(user: User, reason: str) -> None:
     user.is_banned = True
     user.ban_reason = reason
     await user.save()
+    invalidate_cached_user(user)
 
 # --- Endpoints ---
 
+@router.get("/metrics/auth-cache")
+async def get_auth_cache_metrics(current_admin: User = Depends(get_current_admin)):
+    """Hit/miss counters of this worker's get_current_user cache."""
+    return auth_user_cache.snapshot()
+
+@router.get("/metrics/event-logger")
+async def get_event_logger_metrics(current_admin: User = Depends(get_current_admin)):
+    """Buffered event writer counters for this worker (dropped/failed events are lost)."""
+    return event_buffer.snapshot()
+
+@router.get("/metrics/icebreaker-prefetch")
+async def get_icebreaker_prefetch_metrics(current_admin: User = Depends(get_current_admin)):
+    """Match-time icebreaker generation queue for this worker."""
+    return get_icebreaker_prefetcher().snapshot()
+
+@router.get("/metrics/icebreaker-cache")
+async def get_icebreaker_cache_metrics(current_admin: User = Depends(get_current_admin)):
+    """
+    Content-addressed icebreaker cache: hit rates per prompt version on this
+    worker, plus stored entries and lifetime hits per version across workers.
+    """
+    return {
+        **get_icebreaker_content_cache().snapshot(),
+        "stored": await stored_entry_stats(),
+    }
+
 @router.get("/metrics/overview")
-async def get_overview(current_admin: User = Depends(get_current_admin)):
+async def get_overview(response: Response, current_admin: User = Depends(get_current_admin)):
+    """
+    Totals are collection metadata counts. New users (24h) and matches today
+    are indexed counts on their own collections, so they keep counting every
+    document. DAU and Chat Night enters are event-derived and come from the
+    hourly/daily metric rollups (DAU is a HyperLogLog estimate, ~1% error);
+    run scripts/backfill_metric_rollups.py after enabling on existing data.
+    """
     now = datetime.utcnow()
-    last_24h = now - timedelta(days=1)
-    last_7d = now - timedelta(days=7)
     today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
 
     try:
-        # Parallelize these if aggregation is slow, sequential for now
-        total_users = await User.find_all().count()
-        new_users_24h = await User.find(User.created_at >= last_24h).count()
-        # DAU: manual scan for safety/stability
-        # FIX: Do not use project() which causes ExpressionField error
-        recent_events = await AppEvent.find(AppEvent.created_at >= last_24h).to_list()
-        dau = len({e.user_id for e in recent_events})
-        
-        chat_night_enters = await AppEvent.find(
-            AppEvent.event_name == "chat_night.enter", 
-            AppEvent.created_at >= today_start
-        ).count()
-
-        matches_unlocked = await MatchUnlocked.find_all().count()
-        matches_today = await MatchUnlocked.find(MatchUnlocked.created_at >= today_start).count()
-        
-        threads_created = await ChatThread.find_all().count()
-        messages_sent = await ChatMessage.find_all().count()
+        results, timings = await gather_queries({
+            "users_total": User.get_motor_collection().estimated_document_count(),
+            "matches_total": MatchUnlocked.get_motor_collection().estimated_document_count(),
+            "threads_total": ChatThread.get_motor_collection().estimated_document_count(),
+            "messages_total": ChatMessage.get_motor_collection().estimated_document_count(),
+            "new_users_24h": User.find(User.created_at >= now - timedelta(days=1)).count(),
+            "matches_today": MatchUnlocked.find(MatchUnlocked.created_at >= today_start).count(),
+            "last_24h": rolling_window_metrics(now, hours=24),
+            "today": day_metrics(now),
+        })
+        response.headers["Server-Timing"] = server_timing_header(timings)
+        last_24h = results["last_24h"]
+        today = results["today"]
         
         return {
             "users": {
-                "total": total_users,
-                "new_24h": new_users_24h,
-                "dau_24h": dau
+                "total": results["users_total"],
+                "new_24h": results["new_users_24h"],
+                "dau_24h": last_24h.get("active_users", 0)
             },
             "engagement": {
-                "chat_night_enters_today": chat_night_enters,
-                "matches_total": matches_unlocked,
-                "matches_today": matches_today,
-                "threads_total": threads_created,
-                "messages_total": messages_sent
+                "chat_night_enters_today": today.get("chat_night_enters", 0),
+                "matches_total": results["matches_total"],
+                "matches_today": results["matches_today"],
+                "threads_total": results["threads_total"],
+                "messages_total": results["messages_total"]
             }
         }
     except Exception as e:
@@ -98,16 +133,44 @@ async def get_overview(current_admin: User = Depends(get_current_admin)):
         traceback.print_exc()
         raise e
 
+def encode_user_cursor(u: User) -> str:
+    """Opaque cursor for a user's position in the list's (created_at, _id) desc order."""
+    # Mongo stores milliseconds; truncate so the seek matches the stored value.
+    created_at = u.created_at.replace(microsecond=u.created_at.microsecond // 1000 * 1000)
+    raw = f"{created_at.isoformat()}|{u.id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_user_cursor(cursor: str) -> Tuple[datetime, PydanticObjectId]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, user_id = raw.split("|", 1)
+        return datetime.fromisoformat(created_at), PydanticObjectId(user_id)
+    except Exception:
+        raise HTTPException(400, "Invalid cursor")
+
 @router.get("/users")
 async def get_users_list(
     search: Optional[str] = None,
+    phone_suffix: Optional[str] = Query(None, min_length=2, max_length=15),
+    gender: Optional[str] = None,
+    banned: Optional[bool] = None,
     tier: Optional[str] = None,
     onboarded: Optional[bool] = None,
-    min_completion: Optional[int] = None,
-    limit: int = 20,
+    min_completion: Optional[int] = Query(None, ge=0, le=100),
+    max_completion: Optional[int] = Query(None, ge=0, le=100),
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
     curr_admin: User = Depends(get_current_admin)
 ):
-    # Base query
+    """
+    Newest first, filtered in Mongo on stored fields (profile_completion and
+    profile_tier are kept current on save; users written before they existed
+    need scripts/backfill_user_search_fields.py to match these filters).
+    Equality filters seek their own (field, created_at, _id) index;
+    completion ranges are checked on the (created_at, _id, completion) index
+    while walking in sort order; `search` (name regex) is not indexed. Pass
+    `next_cursor` back as `cursor` for the next page.
+    """
     expressions = []
     if search:
         # Regex search on first name or exact match phone
@@ -117,24 +180,35 @@ async def get_users_list(
                 User.phone_number == search
             )
         )
+    if phone_suffix:
+        digits = phone_suffix.lstrip("+")
+        # Suffix of phone_number == anchored prefix of phone_reversed, which the index can seek.
+        expressions.append(Ops.RegEx(User.phone_reversed, "^" + re.escape(digits[::-1])))
+    if gender:
+        expressions.append(User.gender == gender)
+    if banned is not None:
+        expressions.append(User.is_banned == banned)
     if onboarded is not None:
         expressions.append(User.onboarding_completed == onboarded)
-        
-    # Note: min_completion is hard to query because it's a property, not stored field.
-    # We might filter post-fetch for this iteration.
-    
-    query = User.find(*expressions).sort(-User.created_at).limit(limit)
-    users_db = await query.to_list()
-    
+    if tier:
+        expressions.append(User.profile_tier == tier.capitalize())
+    if min_completion is not None:
+        expressions.append(User.profile_completion >= min_completion)
+    if max_completion is not None:
+        expressions.append(User.profile_completion <= max_completion)
+    if cursor:
+        created_at, user_id = decode_user_cursor(cursor)
+        expressions.append({
+            "created_at": {"$lte": created_at},
+            "$or": [{"created_at": {"$lt": created_at}}, {"_id": {"$lt": user_id}}],
+        })
+
+    users_db = await User.find(*expressions).sort(-User.created_at, -User.id).limit(limit + 1).to_list()
+    has_more = len(users_db) > limit
+    users_db = users_db[:limit]
+
     results = []
     for u in users_db:
-        strength = compute_profile_strength(u)
-        # Filter if tier/completion params present
-        if tier and strength['tier'].lower() != tier.lower():
-            continue
-        if min_completion and strength['completion_percent'] < min_completion:
-            continue
-            
         # Name fallback logic
         display_name = u.first_name
         if not display_name:
@@ -150,14 +224,20 @@ async def get_users_list(
             "created_at": u.created_at,
             "role": u.role,
             "is_banned": u.is_banned,
-            "tier": strength['tier'],
-            "completion": strength['completion_percent']
+            "gender": u.gender,
+            "onboarding_completed": u.onboarding_completed,
+            "tier": u.profile_tier,
+            "completion": u.profile_completion
         })
-        
-    return {"users": results}
+
+    return {
+        "users": results,
+        "has_more": has_more,
+        "next_cursor": encode_user_cursor(users_db[-1]) if has_more else None,
+    }
 
 @router.get("/users/{user_id}")
-async def get_user_detail(user_id: str, curr_admin: User = Depends(get_current_admin)):
+async def get_user_detail(user_id: str, response: Response, curr_admin: User = Depends(get_current_admin)):
     try:
         uid = PydanticObjectId(user_id)
     except:
@@ -168,29 +248,28 @@ async def get_user_detail(user_id: str, curr_admin: User = Depends(get_current_a
     
     strength = compute_profile_strength(u)
     
-    # Matches
-    matches = await MatchUnlocked.find(Ops.In(MatchUnlocked.user_ids, [str(uid)])).sort(-MatchUnlocked.created_at).limit(10).to_list()
-    
-    # Threads
-    threads = await ChatThread.find(Ops.In(ChatThread.participants, [uid])).sort(-ChatThread.last_message_at).limit(10).to_list()
-    
-    # Events
-    events = await AppEvent.find(AppEvent.user_id == str(uid)).sort(-AppEvent.created_at).limit(50).to_list()
-    
-    # Passes
-    passes = await ChatNightPass.find(ChatNightPass.user_id == uid).sort(-ChatNightPass.date_ist).limit(5).to_list()
-    
-    # Audit View
-    await log_admin_action(str(curr_admin.id), "view_user", str(uid))
-
-    # Computed Stats
-    msg_count = await AppEvent.find(AppEvent.user_id == str(uid), AppEvent.event_name == "chat.message.sent").count()
-    match_count = await MatchUnlocked.find(Ops.In(MatchUnlocked.user_ids, [str(uid)])).count()
-    
-    # Passes Today
     now_ist = datetime.utcnow() + timedelta(hours=5, minutes=30)
     today_str = now_ist.strftime("%Y-%m-%d")
-    today_pass = await ChatNightPass.find_one(ChatNightPass.user_id == uid, ChatNightPass.date_ist == today_str)
+
+    # Independent reads (plus the audit write) run concurrently
+    results, timings = await gather_queries({
+        "matches": MatchUnlocked.find(Ops.In(MatchUnlocked.user_ids, [str(uid)])).sort(-MatchUnlocked.created_at).limit(10).to_list(),
+        "threads": ChatThread.find(Ops.In(ChatThread.participants, [uid])).sort(-ChatThread.last_message_at).limit(10).to_list(),
+        "events": AppEvent.find(AppEvent.user_id == str(uid)).sort(-AppEvent.created_at).limit(50).to_list(),
+        "passes": ChatNightPass.find(ChatNightPass.user_id == str(uid)).sort(-ChatNightPass.date_ist).limit(5).to_list(),
+        "msg_count": AppEvent.find(AppEvent.user_id == str(uid), AppEvent.event_name == "chat.message.sent").count(),
+        "match_count": MatchUnlocked.find(Ops.In(MatchUnlocked.user_ids, [str(uid)])).count(),
+        "today_pass": ChatNightPass.find_one(ChatNightPass.user_id == str(uid), ChatNightPass.date_ist == today_str),
+        "audit": log_admin_action(str(curr_admin.id), "view_user", str(uid)),
+    })
+    response.headers["Server-Timing"] = server_timing_header(timings)
+    matches = results["matches"]
+    threads = results["threads"]
+    events = results["events"]
+    passes = results["passes"]
+    msg_count = results["msg_count"]
+    match_count = results["match_count"]
+    today_pass = results["today_pass"]
     passes_today_used = today_pass.passes_used if today_pass else 0
 
     # Sanitize Profile
@@ -413,6 +492,7 @@ async def unban_user(user_id: str, curr_admin: User = Depends(get_current_admin)
     u.is_banned = False
     u.ban_reason = None
     await u.save()
+    invalidate_cached_user(u)
     
     await log_admin_action(str(curr_admin.id), "unban_user", str(uid))
     return {"status": "unbanned"}
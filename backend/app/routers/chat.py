@@ -1,25 +1,33 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, Body
-from beanie import PydanticObjectId
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Body, WebSocket, WebSocketDisconnect, status
+from beanie import PydanticObjectId, UpdateResponse
+from typing import List, Optional, Tuple
 from datetime import datetime
+import asyncio
+import base64
 
 from app.models.user import User
 from app.models.chat_night import MatchUnlocked
-from app.models.chat import ChatThread, ChatMessage
+from app.models.chat import ChatThread, ChatMessage, ReadMark
 from app.schemas.chat import (
     ThreadListResponse, ThreadSnippet, PartnerSnippet, 
     MessageResponse, MessageCreate, MessageListResponse,
     PartnerProfileResponse, PartnerProfileData
 )
-from app.auth.dependencies import get_current_user
+from app.auth.dependencies import get_current_user, get_user_for_websocket
 from app.routers.voice import is_pair_blocked
+from app.services.chat_hub import get_chat_hub
 from app.services.event_logger import log_event
-from pymongo.errors import DuplicateKeyError
+from pymongo import ASCENDING, DESCENDING, UpdateOne
 
 from beanie.operators import In
 
 router = APIRouter()
 
+MARK_READ_ATTEMPTS = 3
+# Watermark steps kept per reader; older messages report is_read without read_at.
+READ_MARKS_KEPT = 50
+MESSAGES_PAGE_MAX = 100
+
 def calculate_age(born: datetime) -> Optional[int]:
     if not born: return None
     today = datetime.utcnow().date()
@@ -27,6 +35,187 @@ def calculate_age(born: datetime) -> Optional[int]:
     born_date = born.date()
     return today.year - born_date.year - ((today.month, today.day) < (born_date.month, born_date.day))
 
+async def load_or_create_threads(uid: PydanticObjectId, matches: List[MatchUnlocked], partner_ids_map: dict) -> dict:
+    """
+    match_id -> ChatThread for every match with a partner: one `$in` fetch,
+    one bulk upsert for the missing threads and one `$in` re-fetch of those.
+    """
+    match_ids = [m.id for m in matches if m.id in partner_ids_map]
+    if not match_ids:
+        return {}
+
+    threads = await ChatThread.find(In(ChatThread.match_id, match_ids)).to_list()
+    threads_by_match = {t.match_id: t for t in threads}
+
+    missing = [m for m in matches if m.id in partner_ids_map and m.id not in threads_by_match]
+    if missing:
+        upserts = []
+        for m in missing:
+            try:
+                partner_oid = PydanticObjectId(partner_ids_map[m.id])
+            except Exception:
+                continue
+            # $setOnInsert keeps this idempotent when another request created the thread first.
+            upserts.append(UpdateOne(
+                {"match_id": m.id},
+                {"$setOnInsert": {
+                    "match_id": m.id,
+                    "participants": [uid, partner_oid],
+                    "last_message_at": None,
+                    "last_message_text": None,
+                    "last_message_id": None,
+                    "unread_counts": {},
+                    "last_read_message_id": {},
+                    "last_read_at": {},
+                    "read_marks": {},
+                    "created_at": m.created_at,
+                }},
+                upsert=True,
+            ))
+        if upserts:
+            await ChatThread.get_motor_collection().bulk_write(upserts, ordered=False)
+            created = await ChatThread.find(In(ChatThread.match_id, [m.id for m in missing])).to_list()
+            for t in created:
+                threads_by_match.setdefault(t.match_id, t)
+
+    return threads_by_match
+
+def encode_message_cursor(msg: ChatMessage) -> str:
+    """Opaque, URL-safe cursor for a message's position in (created_at, _id) order."""
+    # Mongo stores milliseconds; truncate so cursors minted before a round-trip seek correctly.
+    created_at = msg.created_at.replace(microsecond=msg.created_at.microsecond // 1000 * 1000)
+    raw = f"{created_at.isoformat()}|{msg.id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+async def decode_message_cursor(cursor: str, tid: PydanticObjectId) -> Tuple[datetime, PydanticObjectId]:
+    # Older clients may still hold a bare message id from before cursors were opaque.
+    if PydanticObjectId.is_valid(cursor):
+        msg = await ChatMessage.find_one(ChatMessage.id == PydanticObjectId(cursor), ChatMessage.thread_id == tid)
+        if msg:
+            return msg.created_at, msg.id
+        raise HTTPException(400, "Invalid cursor")
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, msg_id = raw.split("|", 1)
+        return datetime.fromisoformat(created_at), PydanticObjectId(msg_id)
+    except Exception:
+        raise HTTPException(400, "Invalid cursor")
+
+def message_seek_query(tid: PydanticObjectId, created_at: datetime, msg_id: PydanticObjectId, older: bool) -> dict:
+    """
+    Messages strictly before (older=True) or after the (created_at, _id) position.
+    The created_at bound is what the (thread_id, created_at) index seeks on; the
+    _id clause only breaks ties between messages with the same timestamp.
+    """
+    op, strict = ("$lte", "$lt") if older else ("$gte", "$gt")
+    return {
+        "thread_id": tid,
+        "created_at": {op: created_at},
+        "$or": [{"created_at": {strict: created_at}}, {"_id": {strict: msg_id}}],
+    }
+
+def serialize_message(msg: ChatMessage) -> dict:
+    return {
+        "id": str(msg.id),
+        "sender_id": str(msg.sender_id),
+        "text": msg.text,
+        "created_at": msg.created_at,
+        "read_at": msg.read_at,
+        "is_read": msg.read_at is not None,
+    }
+
+async def load_read_watermarks(t: ChatThread) -> dict:
+    """
+    str(participant_id) -> ((created_at, _id) of their read watermark, their
+    ReadMark steps). Watermarks set before read_marks existed have no steps;
+    their positions come from one `$in` fetch.
+    """
+    watermarks = {}
+    legacy_ids = {}
+    for participant_id, message_id in t.last_read_message_id.items():
+        marks = t.read_marks.get(participant_id)
+        if marks:
+            watermarks[participant_id] = ((marks[-1].upto_created_at, marks[-1].upto_id), marks)
+        else:
+            legacy_ids[participant_id] = message_id
+    if legacy_ids:
+        watermark_msgs = await ChatMessage.find(In(ChatMessage.id, list(legacy_ids.values()))).to_list()
+        by_id = {m.id: m for m in watermark_msgs}
+        for participant_id, message_id in legacy_ids.items():
+            m = by_id.get(message_id)
+            if m:
+                watermarks[participant_id] = ((m.created_at, m.id), [])
+    return watermarks
+
+def message_read_state(m: ChatMessage, t: ChatThread, watermarks: dict) -> Tuple[bool, Optional[datetime]]:
+    """
+    (is_read, read_at) for the recipient of `m`: its own legacy read_at, else the
+    time of the watermark step that covered it. read_at is None when that step
+    is no longer kept; it is never the reader's later last_read_at.
+    """
+    if m.read_at is not None:
+        return True, m.read_at
+    recipient_id = next((p for p in t.participants if p != m.sender_id), None)
+    watermark = watermarks.get(str(recipient_id))
+    position = (m.created_at, m.id)
+    if not watermark or position > watermark[0]:
+        return False, None
+    for mark in reversed(watermark[1]):
+        if position > (mark.upto_created_at, mark.upto_id):
+            break
+        if mark.since_id is None or position > (mark.since_created_at, mark.since_id):
+            return True, mark.read_at
+    return True, None
+
+async def newest_message_position(t: ChatThread) -> Optional[Tuple[datetime, PydanticObjectId]]:
+    if t.last_message_id is not None and t.last_message_at is not None:
+        return t.last_message_at, t.last_message_id
+    if t.last_message_at is None:
+        return None
+    # Threads whose last message predates last_message_id.
+    newest = await ChatMessage.find(ChatMessage.thread_id == t.id).sort(
+        [("created_at", DESCENDING), ("_id", DESCENDING)]
+    ).first_or_none()
+    return (newest.created_at, newest.id) if newest else None
+
+async def read_watermark_position(t: ChatThread, participant_id: str) -> Optional[Tuple[datetime, PydanticObjectId]]:
+    marks = t.read_marks.get(participant_id)
+    if marks:
+        return marks[-1].upto_created_at, marks[-1].upto_id
+    message_id = t.last_read_message_id.get(participant_id)
+    if message_id is None:
+        return None
+    m = await ChatMessage.get(message_id)
+    return (m.created_at, m.id) if m else None
+
+async def count_messages_between(
+    tid: PydanticObjectId,
+    sender_id: PydanticObjectId,
+    since: Optional[Tuple[datetime, PydanticObjectId]],
+    upto: Tuple[datetime, PydanticObjectId],
+) -> int:
+    """`sender_id`'s messages after `since` (exclusive) up to `upto` (inclusive)."""
+    clauses = [{"$or": [
+        {"created_at": {"$lt": upto[0]}},
+        {"created_at": upto[0], "_id": {"$lte": upto[1]}},
+    ]}]
+    if since is not None:
+        clauses.append({"$or": [
+            {"created_at": {"$gt": since[0]}},
+            {"created_at": since[0], "_id": {"$gt": since[1]}},
+        ]})
+    return await ChatMessage.find({"thread_id": tid, "sender_id": sender_id, "$and": clauses}).count()
+
+def thread_update_payload(t: ChatThread, user_id: PydanticObjectId) -> dict:
+    """The fields of a user's ThreadSnippet that change on send/read."""
+    return {
+        "thread_id": str(t.id),
+        "last_message": t.last_message_text,
+        "last_message_at": t.last_message_at,
+        "unread_count": t.unread_counts.get(str(user_id), 0),
+        "updated_at": t.last_message_at or t.created_at,
+    }
+
 @router.get("/threads", response_model=ThreadListResponse)
 async def list_threads(current_user: User = Depends(get_current_user)):
     uid = current_user.id # PydanticObjectId
@@ -59,31 +248,16 @@ async def list_threads(current_user: User = Depends(get_current_user)):
             for u in users:
                 partners_db[str(u.id)] = u
                 
+        # 4. Batch Fetch Threads (missing ones are created by one bulk upsert)
+        threads_by_match = await load_or_create_threads(uid, matches, partner_ids_map)
+
         for m in matches:
             partner_id_str = partner_ids_map.get(m.id)
             if not partner_id_str: continue
-            
-            # Batch/Single lookup (Optimization: could be batch, but loop safe for V1)
-            t = await ChatThread.find_one(ChatThread.match_id == m.id)
-            
-            if not t:
-                try:
-                    # Create Thread
-                    t = ChatThread(
-                        match_id=m.id,
-                        participants=[uid, PydanticObjectId(partner_id_str)],
-                        created_at=m.created_at
-                    )
-                    await t.insert()
-                except DuplicateKeyError:
-                    t = await ChatThread.find_one(ChatThread.match_id == m.id)
-            
-            # Unread Count
-            unread = await ChatMessage.find(
-                ChatMessage.thread_id == t.id,
-                ChatMessage.sender_id != uid,
-                ChatMessage.read_at == None
-            ).count()
+
+            t = threads_by_match.get(m.id)
+            if not t: continue
+            unread = t.unread_counts.get(str(uid), 0)
             
             # Build Partner Snippet
             partner_user = partners_db.get(partner_id_str)
@@ -220,28 +394,48 @@ async def send_message(
     )
     await msg.insert()
     
-    # Update Thread
-    t.last_message_at = msg.created_at
-    t.last_message_text = msg.text
-    await t.save()
+    # Update Thread atomically; a full save() would clobber the partner's concurrent counter updates
+    updated = await ChatThread.find_one(ChatThread.id == tid).update({
+        "$set": {"last_message_at": msg.created_at, "last_message_text": msg.text, "last_message_id": msg.id},
+        "$inc": {f"unread_counts.{partner_id}": 1},
+    }, response_type=UpdateResponse.NEW_DOCUMENT)
     
     await log_event("chat.message.sent", source="backend", user_id=str(current_user.id))
+
+    message = serialize_message(msg)
+    if updated:
+        hub = get_chat_hub()
+        for participant_id in updated.participants:
+            await hub.publish([participant_id], {
+                "type": "message",
+                "thread_id": str(tid),
+                "message": message,
+                "cursor": encode_message_cursor(msg),
+                "thread": thread_update_payload(updated, participant_id),
+            })
     
-    return {
-        "id": str(msg.id),
-        "sender_id": str(msg.sender_id),
-        "text": msg.text,
-        "created_at": msg.created_at,
-        "read_at": msg.read_at
-    }
+    return message
 
 @router.get("/threads/{thread_id}/messages", response_model=MessageListResponse)
 async def get_messages(
     thread_id: str,
     limit: int = 50,
     before: Optional[str] = None,
+    after: Optional[str] = None,
     current_user: User = Depends(get_current_user)
 ):
+    """
+    Newest-first page of messages.
+    - no cursor: latest page; `before`: older history (scroll back);
+    - `after`: messages newer than the cursor, oldest `limit` of them first, for
+      catching up after a reconnect.
+    `next_cursor` continues in the same direction; `sync_cursor` marks the newest
+    message the client now has and is what to pass as `after` next time.
+    `limit` is clamped to 1..MESSAGES_PAGE_MAX; page on with `next_cursor`.
+    """
+    limit = max(1, min(limit, MESSAGES_PAGE_MAX))
+    if before and after:
+        raise HTTPException(400, "Use either before or after, not both")
     try:
         tid = PydanticObjectId(thread_id)
     except:
@@ -258,37 +452,47 @@ async def get_messages(
     if await is_pair_blocked(str(current_user.id), str(partner_id)):
         raise HTTPException(status_code=403, detail="This match is unavailable.")
         
-    # Construct Query
-    query = [ChatMessage.thread_id == tid]
-    
-    if before:
-        try:
-             before_oid = PydanticObjectId(before)
-             query.append(ChatMessage.id < before_oid)
-        except:
-             pass
-
-    msgs = await ChatMessage.find(
-        *query
-    ).sort(-ChatMessage.created_at).limit(limit).to_list()
+    # Construct seek query; one extra row tells us whether another page exists
+    cursor = before or after
+    if cursor:
+        created_at, msg_id = await decode_message_cursor(cursor, tid)
+        query = message_seek_query(tid, created_at, msg_id, older=bool(before))
+    else:
+        query = {"thread_id": tid}
+    direction = ASCENDING if after else DESCENDING
+
+    msgs = await ChatMessage.find(query).sort(
+        [("created_at", direction), ("_id", direction)]
+    ).limit(limit + 1).to_list()
+    has_more = len(msgs) > limit
+    msgs = msgs[:limit]
+
+    next_cursor = encode_message_cursor(msgs[-1]) if msgs and has_more else None
+    if after:
+        msgs.reverse()
+    if msgs:
+        sync_cursor = encode_message_cursor(msgs[0]) if not before else None
+    else:
+        sync_cursor = after
     
-    # Calculate next cursor
-    next_cursor = None
-    if msgs and len(msgs) == limit:
-        next_cursor = str(msgs[-1].id)
+    watermarks = await load_read_watermarks(t)
+    messages = []
+    for m in msgs:
+        is_read, read_at = message_read_state(m, t, watermarks)
+        messages.append(MessageResponse(
+            id=str(m.id),
+            sender_id=str(m.sender_id),
+            text=m.text,
+            created_at=m.created_at,
+            read_at=read_at,
+            is_read=is_read,
+        ))
     
     return MessageListResponse(
-        messages=[
-            MessageResponse(
-                id=str(m.id),
-                sender_id=str(m.sender_id),
-                text=m.text,
-                created_at=m.created_at,
-                read_at=m.read_at
-            )
-            for m in msgs
-        ],
-        next_cursor=next_cursor
+        messages=messages,
+        next_cursor=next_cursor,
+        has_more=has_more,
+        sync_cursor=sync_cursor
     )
 
 @router.post("/threads/{thread_id}/read")
@@ -312,14 +516,105 @@ async def mark_read(
     if await is_pair_blocked(str(current_user.id), str(partner_id)):
         raise HTTPException(status_code=403, detail="This match is unavailable.")
         
-    # Update all unread messages where sender != me
+    # Move my read watermark to the thread's newest message: one thread update,
+    # however many messages it covers, recording the step's time in read_marks.
+    # The update is conditional on last_message_id so a message sent meanwhile
+    # is not marked read unseen. The last attempt moves the watermark anyway but
+    # only takes the partner messages this step covers off the unread counter.
     now = datetime.utcnow()
-    await ChatMessage.find(
-        ChatMessage.thread_id == tid,
-        ChatMessage.sender_id != current_user.id,
-        ChatMessage.read_at == None
-    ).update({"$set": {"read_at": now}})
+    uid = str(current_user.id)
+    updated = None
+    watermark_id = None
+    for attempt in range(MARK_READ_ATTEMPTS):
+        newest = await newest_message_position(t)
+        since = await read_watermark_position(t, uid)
+        watermark_id = newest[1] if newest else None
+        fields = {f"last_read_at.{uid}": now}
+        update = {"$set": fields}
+        moved = newest is not None and (since is None or newest > since)
+        if moved:
+            fields[f"last_read_message_id.{uid}"] = watermark_id
+            mark = ReadMark(
+                upto_id=newest[1],
+                upto_created_at=newest[0],
+                since_id=since[1] if since else None,
+                since_created_at=since[0] if since else None,
+                read_at=now,
+            )
+            update["$push"] = {f"read_marks.{uid}": {"$each": [mark.model_dump()], "$slice": -READ_MARKS_KEPT}}
+        condition = {"_id": tid}
+        if attempt < MARK_READ_ATTEMPTS - 1:
+            condition["last_message_id"] = t.last_message_id
+            fields[f"unread_counts.{uid}"] = 0
+        elif moved:
+            covered = await count_messages_between(tid, partner_id, since, newest)
+            update["$inc"] = {f"unread_counts.{uid}": -covered}
+        updated = await ChatThread.find_one(condition).update(
+            update, response_type=UpdateResponse.NEW_DOCUMENT
+        )
+        if updated:
+            break
+        t = await ChatThread.get(tid)
+        if not t:
+            raise HTTPException(404, "Thread not found")
     
     await log_event("chat.messages.read", source="backend", user_id=str(current_user.id))
+
+    hub = get_chat_hub()
+    await hub.publish([partner_id], {
+        "type": "read",
+        "thread_id": str(tid),
+        "reader_id": str(current_user.id),
+        "last_read_message_id": str(watermark_id) if watermark_id else None,
+        "read_at": now,
+    })
+    if updated:
+        # Keeps the reader's other devices' thread list in sync.
+        await hub.publish([current_user.id], {
+            "type": "thread_updated",
+            "thread": thread_update_payload(updated, current_user.id),
+        })
     
     return {"status": "success"}
+
+@router.websocket("/ws")
+async def chat_events(websocket: WebSocket, token: Optional[str] = Query(None)):
+    """
+    Per-user push channel for chat. Authenticate with ?token=<JWT> or an
+    Authorization: Bearer header. After a `ready` message the server pushes:
+    - message: {thread_id, message, cursor, thread} for messages sent or received;
+    - read: {thread_id, reader_id, read_at} when the partner reads the thread;
+    - thread_updated: {thread} when the caller reads a thread on another device;
+    - resync: the socket fell behind; refetch with GET messages?after=<cursor>.
+    Send "ping" to get "pong".
+    """
+    try:
+        current_user = await get_user_for_websocket(websocket, token)
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    async with get_chat_hub().connect(str(current_user.id)) as connection:
+        await websocket.send_json({"type": "ready"})
+        receiver = asyncio.create_task(websocket.receive())
+        next_event = asyncio.create_task(connection.get())
+        try:
+            while True:
+                done, _ = await asyncio.wait({receiver, next_event}, return_when=asyncio.FIRST_COMPLETED)
+                if receiver in done:
+                    message = receiver.result()
+                    if message["type"] == "websocket.disconnect":
+                        break
+                    if message.get("text") == "ping":
+                        await websocket.send_text("pong")
+                    receiver = asyncio.create_task(websocket.receive())
+                if next_event in done:
+                    await websocket.send_json(next_event.result())
+                    next_event = asyncio.create_task(connection.get())
+        except WebSocketDisconnect:
+            pass
+        finally:
+            for task in (receiver, next_event):
+                if not task.done():
+                    task.cancel()
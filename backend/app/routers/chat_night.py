@@ -1,5 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException, Body
-from app.models.user import User
+from fastapi import APIRouter, Depends, HTTPException, Body, Query, WebSocket, WebSocketDisconnect, status
+from fastapi.encoders import jsonable_encoder
+from app.models.user import User, UserMatchProjection
 from app.models.chat_night import ChatNightRoom, MatchUnlocked, ChatNightIcebreakers
 from app.models.chat import ChatThread
 from app.models.safety import UserBlock
@@ -11,31 +12,54 @@ from app.schemas.chat_night import (
     ChatNightIcebreakersRevealRequest,
     ChatNightIcebreakersRevealResponse,
 )
-from app.auth.dependencies import get_current_user
+from app.auth.dependencies import get_current_user, get_user_for_websocket
 from datetime import datetime, timedelta, timezone
 from typing import Optional, List, Dict
-from beanie import PydanticObjectId
+from beanie import PydanticObjectId, UpdateResponse
+from beanie.operators import In
+import asyncio
+import logging
 import os
 import uuid
 
 import re
 from app.services.event_logger import log_event
-from app.services.chat_night_matching_v5 import rank_candidates
+from app.services.chat_night_matching_v5 import (
+    cache_match_profile,
+    invalidate_match_profile,
+    rank_candidates,
+)
+from app.services.chat_night_queue import (
+    SIDE_MEN,
+    SIDE_WOMEN,
+    QueuedUser,
+    get_chat_night_queue,
+    opposite_queue_side_for_gender,
+    queue_side_for_gender,
+)
+from app.services.chat_night_batch_matcher import max_weight_assignment
+from app.services.chat_night_events import get_chat_night_event_bus
 from app.services.ai_icebreakers import (
     build_sanitized_match_context,
     fallback_icebreakers_response,
-    generate_icebreakers,
+    generate_icebreakers_single_flight,
+    load_cached_icebreakers,
+)
+from app.services.icebreaker_prefetch import (
+    get_icebreaker_prefetcher,
+    prefetch_wait_seconds,
 )
 from app.services.passes import (
     CHAT_NIGHT_ENTRY_SOURCE_NONE,
     consume_chat_night_entry_entitlement,
     get_chat_night_entry_entitlement,
-    get_chat_night_entry_entitlement_by_user_id,
+    get_chat_night_entry_entitlements,
     rollback_chat_night_entry_consumption,
 )
 from app.core.config import settings
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
 # Time Constants (IST is UTC+5:30)
 IST_OFFSET = timedelta(hours=5, minutes=30)
@@ -43,10 +67,6 @@ WINDOW_START_HOUR = 20 # 8 PM
 WINDOW_END_HOUR = 22   # 10 PM
 ROOM_DURATION_MINUTES = 5
 
-# In-Memory Queue (FIFO)
-men_queue = []
-women_queue = []
-queue_wait_since: Dict[str, datetime] = {}
 LIVE_ROOM_STATES = {"active", "engaged"}
 CHAT_NIGHT_NO_ENTITLEMENT_DETAIL = "No Chat Night passes remaining"
 
@@ -90,6 +110,20 @@ def v5_max_candidates() -> int:
     except ValueError:
         return 50
 
+def v5_scoring_engine() -> str:
+    value = os.getenv("CHAT_NIGHT_V5_SCORING_ENGINE", "python").strip().lower()
+    return value if value in {"python", "numpy"} else "python"
+
+def rank_v5_candidates(current_user, candidates, now: datetime, limit: int) -> list:
+    if v5_scoring_engine() == "numpy":
+        try:
+            from app.services.chat_night_matching_v5_vectorized import rank_candidates_vectorized
+        except ImportError:
+            pass
+        else:
+            return rank_candidates_vectorized(current_user, candidates, now=now, limit=limit)
+    return rank_candidates(current_user, candidates, now=now, limit=limit)
+
 def v5_min_score() -> int:
     try:
         return int(os.getenv("CHAT_NIGHT_V5_MIN_SCORE", "0"))
@@ -119,8 +153,35 @@ def wait_boost_max_points() -> int:
     except ValueError:
         return 15
 
-def get_wait_seconds(user_id: str, now: datetime) -> int:
-    started = queue_wait_since.get(user_id, now)
+def room_sweep_interval_seconds() -> int:
+    try:
+        return max(1, int(os.getenv("CHAT_NIGHT_ROOM_SWEEP_INTERVAL_SECONDS", "5")))
+    except ValueError:
+        return 5
+
+def batch_matching_enabled() -> bool:
+    return os.getenv("CHAT_NIGHT_BATCH_MATCHING_ENABLED", "false").lower() == "true"
+
+def batch_interval_seconds() -> int:
+    try:
+        return max(1, int(os.getenv("CHAT_NIGHT_BATCH_INTERVAL_SECONDS", "5")))
+    except ValueError:
+        return 5
+
+def batch_max_pool() -> int:
+    try:
+        return max(1, int(os.getenv("CHAT_NIGHT_BATCH_MAX_POOL", "200")))
+    except ValueError:
+        return 200
+
+def batch_pair_bonus() -> int:
+    try:
+        return max(1, int(os.getenv("CHAT_NIGHT_BATCH_PAIR_BONUS", "100")))
+    except ValueError:
+        return 100
+
+def get_wait_seconds(wait_since: Optional[datetime], now: datetime) -> int:
+    started = wait_since or now
     try:
         return max(0, int((now - started).total_seconds()))
     except Exception:
@@ -135,18 +196,25 @@ def compute_wait_boost(wait_seconds: int) -> int:
     step_seconds = wait_boost_step_seconds()
     return min(max_points, max(0, wait_seconds) // step_seconds)
 
-async def load_users_from_ids(user_ids: List[str], limit: int) -> List[User]:
-    users: List[User] = []
+async def load_users_from_ids(user_ids: List[str], limit: int) -> List[UserMatchProjection]:
+    """Load the candidate window in one `$in` query, projected and returned in queue order."""
     if limit <= 0:
-        return users
+        return []
+
+    ordered_ids: List[str] = []
+    object_ids: List[PydanticObjectId] = []
     for uid in user_ids[:limit]:
-        try:
-            user = await User.get(PydanticObjectId(uid))
-        except Exception:
+        oid = _to_object_id(uid)
+        if oid is None:
             continue
-        if user:
-            users.append(user)
-    return users
+        ordered_ids.append(uid)
+        object_ids.append(oid)
+    if not object_ids:
+        return []
+
+    rows = await User.find(In(User.id, object_ids)).project(UserMatchProjection).to_list()
+    users_by_id = {str(row.id): row for row in rows}
+    return [users_by_id[uid] for uid in ordered_ids if uid in users_by_id]
 
 def room_ends_at_utc(room: ChatNightRoom) -> datetime:
     if room.ends_at.tzinfo is None:
@@ -175,14 +243,75 @@ def room_is_expired(room: ChatNightRoom, now: Optional[datetime] = None) -> bool
     ref = now or get_now_utc()
     return ref > room_ends_at_utc(room)
 
-async def normalize_room_if_expired(room: ChatNightRoom, now: Optional[datetime] = None) -> bool:
-    if room.state not in LIVE_ROOM_STATES:
-        return False
-    if not room_is_expired(room, now):
-        return False
-    room.state = "ended"
-    await room.save()
-    return True
+def effective_room_state(room: ChatNightRoom, now: Optional[datetime] = None) -> str:
+    """Room state as clients should see it: a live room past ends_at is ended even before the sweeper writes it."""
+    if room.state in LIVE_ROOM_STATES and room_is_expired(room, now):
+        return "ended"
+    return room.state
+
+async def sweep_expired_rooms(now: Optional[datetime] = None) -> int:
+    """
+    End every live room past its ends_at (run periodically from the app
+    lifespan on every worker) and push room_ended to both participants. Each
+    room is ended by its own conditional find-and-update, so only the sweep
+    that actually flipped it publishes, and a room a participant ended in the
+    meantime is left alone. Returns the number of rooms this call ended.
+    Read paths only filter on ends_at and never write.
+    """
+    ref = now or get_now_utc()
+    expired_filter = {"state": {"$in": list(LIVE_ROOM_STATES)}, "ends_at": {"$lte": ref}}
+    ended = 0
+    while True:
+        room = await ChatNightRoom.find_one(expired_filter).update(
+            {"$set": {"state": "ended"}}, response_type=UpdateResponse.NEW_DOCUMENT
+        )
+        if room is None:
+            return ended
+        ended += 1
+        await publish_room_event(room, "room_ended", reason="expired")
+
+def build_room_view(room: ChatNightRoom, user_id: str, now: Optional[datetime] = None) -> Optional[dict]:
+    """The caller's view of a room (shape of GET /my-room); None if they are not in it."""
+    if user_id == room.male_user_id:
+        partner_id = room.female_user_id
+        my_role = "male"
+        my_engage = room.engage_male
+        partner_engage = room.engage_female
+    elif user_id == room.female_user_id:
+        partner_id = room.male_user_id
+        my_role = "female"
+        my_engage = room.engage_female
+        partner_engage = room.engage_male
+    else:
+        return None
+
+    ref = now or get_now_utc()
+    rem = int((room_ends_at_utc(room) - ref).total_seconds())
+    if rem < 0: rem = 0
+
+    return {
+        "state": room.state,
+        "room_id": room.room_id,
+        "starts_at": room.starts_at,
+        "ends_at": room.ends_at,
+        "remaining_seconds": rem,
+        "partner_user_id": partner_id,
+        "you_are": my_role,
+        "engage_you": my_engage,
+        "engage_partner": partner_engage
+    }
+
+async def publish_room_event(room: ChatNightRoom, event_type: str, **extra) -> None:
+    """Push `event_type` with each participant's room view to both participants' sockets."""
+    bus = get_chat_night_event_bus()
+    now = get_now_utc()
+    for participant_id in (room.male_user_id, room.female_user_id):
+        view = build_room_view(room, participant_id, now)
+        try:
+            await bus.publish(participant_id, {"type": event_type, **view, **extra})
+        except Exception:
+            # Clients fall back to polling /my-room; a push failure must not fail the request.
+            logger.exception("Chat Night event publish failed: %s", event_type)
 
 def build_engage_status(room: ChatNightRoom, my_engage: bool) -> str:
     if room.state == "engaged":
@@ -192,23 +321,13 @@ def build_engage_status(room: ChatNightRoom, my_engage: bool) -> str:
     return "pending"
 
 async def find_active_room_for_user(user_id: str):
-    rooms = await ChatNightRoom.find(
+    return await ChatNightRoom.find(
         {
             "$or": [{"male_user_id": user_id}, {"female_user_id": user_id}],
             "state": {"$in": list(LIVE_ROOM_STATES)},
+            "ends_at": {"$gt": get_now_utc()},
         }
-    ).sort(-ChatNightRoom.starts_at).to_list()
-
-    if not rooms:
-        return None
-
-    now = get_now_utc()
-    for room in rooms:
-        if await normalize_room_if_expired(room, now):
-            continue
-        return room
-
-    return None
+    ).sort(-ChatNightRoom.starts_at).first_or_none()
 
 async def get_recent_partner_ids(user_id: str, minutes: int) -> set[str]:
     if minutes <= 0:
@@ -284,24 +403,50 @@ async def get_blocked_pair_user_ids(user_id: str) -> set[str]:
     return paired_ids
 
 
+async def get_recent_pair_keys(user_ids: List[str], minutes: int) -> set[frozenset]:
+    """Pairs (frozensets of user ids) that shared a room within `minutes`, for a whole pool in one query."""
+    if minutes <= 0 or not user_ids:
+        return set()
+
+    since = get_now_utc() - timedelta(minutes=minutes)
+    rooms = await ChatNightRoom.find(
+        {
+            "$or": [{"male_user_id": {"$in": user_ids}}, {"female_user_id": {"$in": user_ids}}],
+            "starts_at": {"$gte": since},
+        }
+    ).to_list()
+    return {frozenset((room.male_user_id, room.female_user_id)) for room in rooms}
+
+
+async def get_blocked_pair_keys(user_ids: List[str]) -> set[frozenset]:
+    """Block relations (either direction) touching any of `user_ids`, in one query."""
+    user_oids = [oid for oid in (_to_object_id(uid) for uid in user_ids) if oid is not None]
+    if not user_oids:
+        return set()
+
+    rows = await UserBlock.find(
+        {
+            "$or": [
+                {"blocker_user_id": {"$in": user_oids}},
+                {"blocked_user_id": {"$in": user_oids}},
+            ]
+        }
+    ).to_list()
+    return {frozenset((str(row.blocker_user_id), str(row.blocked_user_id))) for row in rows}
+
+
 async def enforce_room_not_blocked(room: ChatNightRoom, detail: str) -> None:
     if not await is_pair_blocked(room.male_user_id, room.female_user_id):
         return
     if room.state in LIVE_ROOM_STATES:
         room.state = "ended"
         await room.save()
+        await publish_room_event(room, "room_ended", reason="unavailable")
     raise HTTPException(status_code=403, detail=detail)
 
 
-def remove_user_from_queue(queue: List[str], user_id: str) -> None:
-    while user_id in queue:
-        queue.remove(user_id)
-
-
-def remove_user_from_all_queues(user_id: str) -> None:
-    remove_user_from_queue(men_queue, user_id)
-    remove_user_from_queue(women_queue, user_id)
-    queue_wait_since.pop(user_id, None)
+async def remove_user_from_all_queues(user_id: str) -> None:
+    await get_chat_night_queue().remove(user_id)
 
 # NOTE: Keeping is_whitelisted_for_testing for legacy individual whitelist support if needed,
 # but new settings apply globally or complement it.
@@ -361,41 +506,50 @@ async def try_match_and_create_room(current_user: User, date_ist: str):
     user_id = str(current_user.id)
     gender = current_user.gender or "Man"
     partner_id: Optional[str] = None
-    partner_user: Optional[User] = None
-    partner_queue_index: Optional[int] = None
+    partner_user: Optional[User | UserMatchProjection] = None
+    partner_entry: Optional[QueuedUser] = None
     match_algo = "fifo"
     score: Optional[int] = None
     reason_tags: Optional[List[str]] = None
     wait_seconds: Optional[int] = None
     wait_boost: Optional[int] = None
 
-    opposite_queue = men_queue if gender == "Woman" else women_queue
+    queue = get_chat_night_queue()
+    opposite_side = opposite_queue_side_for_gender(gender)
+    queued_entries = await queue.list_queued(opposite_side, v5_max_candidates())
 
-    if len(opposite_queue) == 0:
+    if len(queued_entries) == 0:
         return None, None
 
+    queued_ids = [entry.user_id for entry in queued_entries]
+    wait_since_by_id = {entry.user_id: entry.wait_since for entry in queued_entries}
+    dropped_ids: set[str] = set()
+
     cooldown_set = await get_recent_partner_ids(user_id, pair_cooldown_minutes())
     blocked_pair_user_ids = await get_blocked_pair_user_ids(user_id)
     selection_now = get_now_utc()
 
-    def restore_partner_to_queue() -> None:
-        if partner_id is None or partner_queue_index is None or partner_id in opposite_queue:
+    async def restore_partner_to_queue() -> None:
+        if partner_entry is None:
             return
-        insert_index = min(max(partner_queue_index, 0), len(opposite_queue))
-        opposite_queue.insert(insert_index, partner_id)
+        await queue.restore(partner_entry)
+
+    # One projected user load and one bulk entitlement lookup serve both V5 and FIFO.
+    max_candidates = v5_max_candidates()
+    eligible_ids = [
+        cid for cid in queued_ids
+        if cid != user_id
+        and cid not in cooldown_set
+        and cid not in blocked_pair_user_ids
+    ]
+    eligible_candidates = await load_users_from_ids(eligible_ids, max_candidates)
+    candidates_by_id = {str(candidate.id): candidate for candidate in eligible_candidates}
+    candidate_entitlements = await get_chat_night_entry_entitlements(eligible_candidates, date_ist)
 
     if v5_enabled():
-        max_candidates = v5_max_candidates()
-        candidates = await load_users_from_ids(opposite_queue, max_candidates)
-        eligible_candidates = [
-            candidate for candidate in candidates
-            if str(candidate.id) != user_id
-            and str(candidate.id) not in cooldown_set
-            and str(candidate.id) not in blocked_pair_user_ids
-        ]
         if eligible_candidates:
             min_score = v5_min_score()
-            ranked = rank_candidates(current_user, eligible_candidates, now=selection_now, limit=max_candidates)
+            ranked = rank_v5_candidates(current_user, eligible_candidates, now=selection_now, limit=max_candidates)
             for item in ranked:
                 base_score = int(item.get("score", 0))
                 if base_score < min_score:
@@ -409,20 +563,21 @@ async def try_match_and_create_room(current_user: User, date_ist: str):
                 if candidate_id == user_id:
                     continue
 
-                candidate_entitlement = await get_chat_night_entry_entitlement(candidate_obj, date_ist)
-                if candidate_entitlement.next_spend_source == CHAT_NIGHT_ENTRY_SOURCE_NONE:
-                    remove_user_from_queue(opposite_queue, candidate_id)
-                    queue_wait_since.pop(candidate_id, None)
+                candidate_entitlement = candidate_entitlements.get(candidate_id)
+                if candidate_entitlement is None or candidate_entitlement.next_spend_source == CHAT_NIGHT_ENTRY_SOURCE_NONE:
+                    await queue.remove(candidate_id)
+                    dropped_ids.add(candidate_id)
                     continue
 
-                candidate_wait_seconds = get_wait_seconds(candidate_id, selection_now)
+                candidate_wait_seconds = get_wait_seconds(wait_since_by_id.get(candidate_id), selection_now)
                 candidate_boost = compute_wait_boost(candidate_wait_seconds)
-                try:
-                    partner_queue_index = opposite_queue.index(candidate_id)
-                except ValueError:
+                claimed_entry = await queue.claim(opposite_side, candidate_id)
+                if claimed_entry is None:
+                    # Claimed by a concurrent /enter (possibly on another worker).
+                    dropped_ids.add(candidate_id)
                     continue
 
-                opposite_queue.pop(partner_queue_index)
+                partner_entry = claimed_entry
                 partner_id = candidate_id
                 partner_user = candidate_obj
                 match_algo = "v5"
@@ -433,31 +588,28 @@ async def try_match_and_create_room(current_user: User, date_ist: str):
                 break
 
     if partner_id is None:
-        max_scan = v5_max_candidates()
         selected_candidate_id: Optional[str] = None
         selected_wait_seconds = -1
-        for cid in list(opposite_queue[:max_scan]):
-            if cid == user_id or cid in cooldown_set or cid in blocked_pair_user_ids:
+        for cid in eligible_ids:
+            if cid in dropped_ids:
                 continue
 
-            candidate_entitlement = await get_chat_night_entry_entitlement_by_user_id(cid, date_ist)
+            candidate_entitlement = candidate_entitlements.get(cid)
             if candidate_entitlement is None or candidate_entitlement.next_spend_source == CHAT_NIGHT_ENTRY_SOURCE_NONE:
-                remove_user_from_queue(opposite_queue, cid)
-                queue_wait_since.pop(cid, None)
+                await queue.remove(cid)
                 continue
 
-            candidate_wait_seconds = get_wait_seconds(cid, selection_now)
+            candidate_wait_seconds = get_wait_seconds(wait_since_by_id.get(cid), selection_now)
             if candidate_wait_seconds > selected_wait_seconds:
                 selected_candidate_id = cid
                 selected_wait_seconds = candidate_wait_seconds
 
         if selected_candidate_id is not None:
-            try:
-                partner_queue_index = opposite_queue.index(selected_candidate_id)
-            except ValueError:
-                selected_candidate_id = None
-            else:
-                partner_id = opposite_queue.pop(partner_queue_index)
+            claimed_entry = await queue.claim(opposite_side, selected_candidate_id)
+            if claimed_entry is not None:
+                partner_entry = claimed_entry
+                partner_id = claimed_entry.user_id
+                partner_user = candidates_by_id.get(partner_id)
                 wait_seconds = selected_wait_seconds
                 wait_boost = compute_wait_boost(wait_seconds)
 
@@ -474,24 +626,24 @@ async def try_match_and_create_room(current_user: User, date_ist: str):
                 except Exception:
                     partner_user = None
         if partner_user is None:
-            remove_user_from_all_queues(partner_id)
+            await remove_user_from_all_queues(partner_id)
             return None, None
 
         current_consumption = await consume_chat_night_entry_entitlement(current_user, date_ist, room_id=room_id)
         if current_consumption is None:
-            restore_partner_to_queue()
+            await restore_partner_to_queue()
             return None, None
 
         try:
             partner_consumption = await consume_chat_night_entry_entitlement(partner_user, date_ist, room_id=room_id)
         except Exception:
             await rollback_chat_night_entry_consumption(current_consumption)
-            restore_partner_to_queue()
+            await restore_partner_to_queue()
             raise
 
         if partner_consumption is None:
             await rollback_chat_night_entry_consumption(current_consumption)
-            remove_user_from_all_queues(partner_id)
+            await remove_user_from_all_queues(partner_id)
             return None, None
 
         now = get_now_utc()
@@ -508,12 +660,9 @@ async def try_match_and_create_room(current_user: User, date_ist: str):
         except Exception:
             await rollback_chat_night_entry_consumption(partner_consumption)
             await rollback_chat_night_entry_consumption(current_consumption)
-            restore_partner_to_queue()
+            await restore_partner_to_queue()
             raise
 
-        queue_wait_since.pop(user_id, None)
-        queue_wait_since.pop(partner_id, None)
-        
         # Log Match
         match_meta = {
             "match_algo": match_algo,
@@ -532,11 +681,195 @@ async def try_match_and_create_room(current_user: User, date_ist: str):
                 **match_meta,
             },
         )
+        get_icebreaker_prefetcher().enqueue(room, requester_user_id=user_id)
+        await publish_room_event(room, "match_found")
 
         return room, match_meta
     
     return None, None
 
+async def run_batch_match_tick() -> int:
+    """
+    One global matching round over the whole pool. Every allowed (man, woman)
+    pair is weighted by V5 score (mean of both directions, V5 mode only) plus
+    both users' wait boost; a maximum-weight assignment picks the pairs and
+    the rooms are created in one bulk insert. Queued users pick their room up
+    via /my-room. Returns the number of rooms created; 0 outside the
+    Chat Night window.
+    """
+    is_open, date_ist, _, _ = get_chat_window_status()
+    if not is_open:
+        return 0
+
+    queue = get_chat_night_queue()
+    pool_limit = batch_max_pool()
+    men_entries = await queue.list_queued(SIDE_MEN, pool_limit)
+    women_entries = await queue.list_queued(SIDE_WOMEN, pool_limit)
+    if not men_entries or not women_entries:
+        return 0
+
+    tick_now = get_now_utc()
+    wait_since_by_id = {entry.user_id: entry.wait_since for entry in men_entries + women_entries}
+    men = await load_users_from_ids([entry.user_id for entry in men_entries], pool_limit)
+    women = await load_users_from_ids([entry.user_id for entry in women_entries], pool_limit)
+    entitlements = await get_chat_night_entry_entitlements(men + women, date_ist)
+
+    # Same pruning as /enter: users that no longer exist or have no entry left leave the pool.
+    def can_enter(user_id: str) -> bool:
+        entitlement = entitlements.get(user_id)
+        return entitlement is not None and entitlement.next_spend_source != CHAT_NIGHT_ENTRY_SOURCE_NONE
+
+    for queued_id in wait_since_by_id:
+        if not can_enter(queued_id):
+            await queue.remove(queued_id)
+    men = [user for user in men if can_enter(str(user.id))]
+    women = [user for user in women if can_enter(str(user.id))]
+    if not men or not women:
+        return 0
+
+    pool_ids = [str(user.id) for user in men + women]
+    cooldown_pairs = await get_recent_pair_keys(pool_ids, pair_cooldown_minutes())
+    blocked_pairs = await get_blocked_pair_keys(pool_ids)
+
+    use_v5 = v5_enabled()
+    min_score = v5_min_score()
+    pair_bonus = batch_pair_bonus()
+    man_view: Dict[tuple, dict] = {}
+    woman_view: Dict[tuple, dict] = {}
+    if use_v5:
+        for man in men:
+            for item in rank_v5_candidates(man, women, now=tick_now, limit=len(women)):
+                man_view[(str(man.id), str(item["candidate"].id))] = item
+        for woman in women:
+            for item in rank_v5_candidates(woman, men, now=tick_now, limit=len(men)):
+                woman_view[(str(item["candidate"].id), str(woman.id))] = item
+
+    boosts = {uid: compute_wait_boost(get_wait_seconds(wait_since_by_id.get(uid), tick_now)) for uid in pool_ids}
+    weights: List[List[Optional[int]]] = []
+    pair_meta: Dict[tuple, dict] = {}
+    for man in men:
+        man_id = str(man.id)
+        row: List[Optional[int]] = []
+        for woman in women:
+            woman_id = str(woman.id)
+            pair_key = frozenset((man_id, woman_id))
+            if man_id == woman_id or pair_key in cooldown_pairs or pair_key in blocked_pairs:
+                row.append(None)
+                continue
+
+            score = 0
+            reason_tags: List[str] = []
+            if use_v5:
+                from_man = man_view[(man_id, woman_id)]
+                from_woman = woman_view[(man_id, woman_id)]
+                score = (int(from_man["score"]) + int(from_woman["score"])) // 2
+                reason_tags = list(dict.fromkeys(from_man["reason_tags"] + from_woman["reason_tags"]))[:6]
+                if score < min_score:
+                    row.append(None)
+                    continue
+
+            wait_boost = boosts[man_id] + boosts[woman_id]
+            # The flat per-pair bonus makes matching more people outweigh a
+            # marginally better pair, and keeps zero-score pairs above "unmatched".
+            row.append(score + wait_boost + pair_bonus)
+            pair_meta[(man_id, woman_id)] = {
+                "match_algo": "v5" if use_v5 else "fifo",
+                "score": score,
+                "reason_tags": reason_tags,
+                "wait_seconds": max(
+                    get_wait_seconds(wait_since_by_id.get(man_id), tick_now),
+                    get_wait_seconds(wait_since_by_id.get(woman_id), tick_now),
+                ),
+                "wait_boost": wait_boost,
+            }
+        weights.append(row)
+
+    assignment = max_weight_assignment(weights)
+    assignment.sort(key=lambda pair: weights[pair[0]][pair[1]], reverse=True)
+
+    pending: List[dict] = []
+
+    async def rollback_pending() -> None:
+        for item in pending:
+            await rollback_chat_night_entry_consumption(item["woman_consumption"])
+            await rollback_chat_night_entry_consumption(item["man_consumption"])
+            await queue.restore(item["man_entry"])
+            await queue.restore(item["woman_entry"])
+
+    for man_index, woman_index in assignment:
+        man, woman = men[man_index], women[woman_index]
+        man_id, woman_id = str(man.id), str(woman.id)
+
+        man_entry = await queue.claim(SIDE_MEN, man_id)
+        if man_entry is None:
+            # Left the pool (or was matched elsewhere) since the snapshot.
+            continue
+        woman_entry = await queue.claim(SIDE_WOMEN, woman_id)
+        if woman_entry is None:
+            await queue.restore(man_entry)
+            continue
+
+        room_id = str(uuid.uuid4())
+        try:
+            man_consumption = await consume_chat_night_entry_entitlement(man, date_ist, room_id=room_id)
+            if man_consumption is None:
+                await queue.restore(woman_entry)
+                continue
+            woman_consumption = await consume_chat_night_entry_entitlement(woman, date_ist, room_id=room_id)
+        except Exception:
+            await queue.restore(man_entry)
+            await queue.restore(woman_entry)
+            await rollback_pending()
+            raise
+        if woman_consumption is None:
+            await rollback_chat_night_entry_consumption(man_consumption)
+            await queue.restore(man_entry)
+            continue
+
+        pending.append({
+            "room": ChatNightRoom(
+                room_id=room_id,
+                male_user_id=man_id,
+                female_user_id=woman_id,
+                starts_at=tick_now,
+                ends_at=tick_now + timedelta(minutes=ROOM_DURATION_MINUTES),
+                state="active",
+            ),
+            "match_meta": pair_meta[(man_id, woman_id)],
+            "man_entry": man_entry,
+            "woman_entry": woman_entry,
+            "man_consumption": man_consumption,
+            "woman_consumption": woman_consumption,
+        })
+
+    if not pending:
+        return 0
+
+    try:
+        await ChatNightRoom.insert_many([item["room"] for item in pending])
+    except Exception:
+        await rollback_pending()
+        raise
+
+    for item in pending:
+        room = item["room"]
+        await log_event(
+            "chat_night.match",
+            source="backend",
+            payload={
+                "room_id": room.room_id,
+                "users": [room.male_user_id, room.female_user_id],
+                "match_mode": "batch",
+                **item["match_meta"],
+            },
+        )
+        # Charge the per-user OpenAI cap to whoever joined the pool last, the
+        # user whose /enter would have made this match.
+        later_entry = max(item["man_entry"], item["woman_entry"], key=lambda entry: entry.enqueued_at)
+        get_icebreaker_prefetcher().enqueue(room, requester_user_id=later_entry.user_id)
+        await publish_room_event(room, "match_found")
+    return len(pending)
+
 # --- Endpoints ---
 
 # --- Helper: Dynamic Config ---
@@ -586,7 +919,7 @@ async def get_status(current_user: User = Depends(get_current_user)):
     # Queue Status
     uid = str(current_user.id)
     q_status = 'none'
-    if uid in men_queue or uid in women_queue:
+    if await get_chat_night_queue().is_queued(uid):
         q_status = 'queued'
         
     return ChatNightStatus(
@@ -643,9 +976,8 @@ async def enter_pool(request: Request, current_user: User = Depends(get_current_
         return {"status": "active_room", "room_id": active_room.room_id}
         
     # 2. Idempotency: Check if already queued
-    if uid in men_queue or uid in women_queue:
-        if uid not in queue_wait_since:
-            queue_wait_since[uid] = get_now_utc()
+    queue = get_chat_night_queue()
+    if await queue.is_queued(uid):
         return {"status": "queued"}
         
     # 3. Check Entry Availability
@@ -656,7 +988,10 @@ async def enter_pool(request: Request, current_user: User = Depends(get_current_
     # 4. Attempt Match (Consumes pass if successful)
     gender = current_user.gender or "Man" # Fallback
     
-    room, match_meta = await try_match_and_create_room(current_user, date_ist)
+    # With batch matching on, the background matcher pairs the pool and the
+    # user picks the room up via /my-room.
+    batch_mode = batch_matching_enabled()
+    room, match_meta = (None, None) if batch_mode else await try_match_and_create_room(current_user, date_ist)
     
     if room:
         response = {"status": "match_found", "room_id": room.room_id}
@@ -670,17 +1005,13 @@ async def enter_pool(request: Request, current_user: User = Depends(get_current_
             }
         return response
     else:
-        entitlement = await get_chat_night_entry_entitlement(current_user, date_ist)
-        if entitlement.next_spend_source == CHAT_NIGHT_ENTRY_SOURCE_NONE:
-            raise HTTPException(status_code=403, detail=CHAT_NIGHT_NO_ENTITLEMENT_DETAIL)
+        if not batch_mode:
+            entitlement = await get_chat_night_entry_entitlement(current_user, date_ist)
+            if entitlement.next_spend_source == CHAT_NIGHT_ENTRY_SOURCE_NONE:
+                raise HTTPException(status_code=403, detail=CHAT_NIGHT_NO_ENTITLEMENT_DETAIL)
         # Enqueue
-        now = get_now_utc()
-        if gender == "Woman":
-            women_queue.append(uid)
-        else:
-            men_queue.append(uid)
-        if uid not in queue_wait_since:
-            queue_wait_since[uid] = now
+        await queue.enqueue(uid, queue_side_for_gender(gender), now=get_now_utc())
+        cache_match_profile(current_user)
         return {"status": "queued"}
 
 @router.get("/my-room")
@@ -696,46 +1027,123 @@ async def get_my_room(current_user: User = Depends(get_current_user)):
 
     await enforce_room_not_blocked(room, "This room is no longer available.")
         
-    # Partner Logic (Copied from get_room - refactor if strict DRY needed, 
-    # but kept inline for speed as per instructions)
-    uid = str(current_user.id)
-    if uid == room.male_user_id:
-        partner_id = room.female_user_id
-        my_role = "male"
-        my_engage = room.engage_male
-        partner_engage = room.engage_female
-    elif uid == room.female_user_id:
-        partner_id = room.male_user_id
-        my_role = "female"
-        my_engage = room.engage_female
-        partner_engage = room.engage_male
-    else:
+    view = build_room_view(room, str(current_user.id))
+    if view is None:
         # Should not happen since we searched by ID
         return {"state": "none"}
-        
-    # Calculate Remaining Seconds
-    now = get_now_utc()
-    rem = int((room_ends_at_utc(room) - now).total_seconds())
-    if rem < 0: rem = 0
-    
-    return {
-        "state": room.state,
-        "room_id": room.room_id,
-        "starts_at": room.starts_at,
-        "ends_at": room.ends_at,
-        "remaining_seconds": rem,
-        "partner_user_id": partner_id,
-        "you_are": my_role,
-        "engage_you": my_engage,
-        "engage_partner": partner_engage
-    }
+    return view
+
+async def _receive_until_disconnect(websocket: WebSocket) -> None:
+    while True:
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            return
+        if message.get("text") == "ping":
+            await websocket.send_text("pong")
+
+
+def _parse_event_datetime(value) -> Optional[datetime]:
+    try:
+        parsed = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+    if parsed.tzinfo is None:
+        return parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+
+@router.websocket("/events")
+async def chat_night_events(websocket: WebSocket, token: Optional[str] = Query(None)):
+    """
+    Push channel replacing /my-room polling. Authenticate with ?token=<JWT>
+    or an Authorization: Bearer header. The first message is a `snapshot` of
+    the caller's room ({"state": "none"} when not in one); after that the
+    server pushes match_found, engage, icebreaker_revealed and room_ended,
+    each carrying the caller's /my-room view. Send "ping" to get "pong".
+    """
+    try:
+        current_user = await get_user_for_websocket(websocket, token)
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    uid = str(current_user.id)
+    async with get_chat_night_event_bus().subscribe(uid) as subscription:
+        # Subscribe before the snapshot so nothing published in between is missed.
+        room = await find_active_room_for_user(uid)
+        if room is not None:
+            try:
+                await enforce_room_not_blocked(room, "This room is no longer available.")
+            except HTTPException:
+                room = None
+        view = build_room_view(room, uid) if room is not None else None
+        await websocket.send_json(jsonable_encoder({"type": "snapshot", **(view or {"state": "none"})}))
+
+        watched_room_id = room.room_id if room is not None else None
+        watched_ends_at = room_ends_at_utc(room) if room is not None else None
+        receiver = asyncio.create_task(_receive_until_disconnect(websocket))
+        next_event: Optional[asyncio.Task] = None
+        try:
+            while True:
+                if next_event is None:
+                    next_event = asyncio.create_task(subscription.get())
+                timeout = None
+                if watched_ends_at is not None:
+                    # +1s so effective_room_state() agrees once we wake up.
+                    timeout = max(0.0, (watched_ends_at - get_now_utc()).total_seconds()) + 1
+                done, _ = await asyncio.wait(
+                    {next_event, receiver},
+                    timeout=timeout,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if receiver in done:
+                    break
+
+                if next_event in done:
+                    event = next_event.result()
+                    next_event = None
+                    if event.get("type") == "room_ended":
+                        if event.get("room_id") != watched_room_id:
+                            # Already reported when this socket hit the room deadline.
+                            continue
+                        watched_room_id, watched_ends_at = None, None
+                    elif event.get("state") in LIVE_ROOM_STATES:
+                        watched_room_id = event.get("room_id")
+                        watched_ends_at = _parse_event_datetime(event.get("ends_at"))
+                    await websocket.send_json(event)
+                    continue
+
+                # Room deadline passed: report it now instead of waiting for the
+                # sweeper, whose own room_ended for this room is then skipped.
+                expired_room = await ChatNightRoom.find_one(ChatNightRoom.room_id == watched_room_id)
+                watched_ends_at = None
+                if expired_room is None:
+                    watched_room_id = None
+                    continue
+                state = effective_room_state(expired_room)
+                if state in LIVE_ROOM_STATES:
+                    watched_ends_at = room_ends_at_utc(expired_room)
+                    continue
+                expired_room.state = state
+                watched_room_id = None
+                await websocket.send_json(jsonable_encoder({
+                    "type": "room_ended",
+                    **build_room_view(expired_room, uid),
+                    "reason": "expired",
+                }))
+        except WebSocketDisconnect:
+            pass
+        finally:
+            for task in (next_event, receiver):
+                if task is not None and not task.done():
+                    task.cancel()
 
 @router.post("/leave")
 async def leave_pool(current_user: User = Depends(get_current_user)):
     uid = str(current_user.id)
-    if uid in men_queue: men_queue.remove(uid)
-    if uid in women_queue: women_queue.remove(uid)
-    queue_wait_since.pop(uid, None)
+    await get_chat_night_queue().remove(uid)
+    invalidate_match_profile(uid)
     return {"status": "left"}
 
 
@@ -752,13 +1160,29 @@ async def get_icebreakers(
     if uid != room.male_user_id and uid != room.female_user_id:
         raise HTTPException(403, "Not in room")
 
+    # Normally generated at match time: join the prefetch job if it is still
+    # running on this worker, else read the cache it persisted.
+    prefetched = await get_icebreaker_prefetcher().wait(room.room_id, timeout=prefetch_wait_seconds())
+    if prefetched is None:
+        prefetched = await load_cached_icebreakers(room.room_id)
+    if prefetched is not None:
+        # A joined prefetch job reports whether it generated or hit the cache.
+        reasons, icebreakers, model_name, cached = prefetched
+        return ChatNightIcebreakersResponse(
+            room_id=room.room_id,
+            reasons=reasons,
+            icebreakers=icebreakers,
+            model=model_name,
+            cached=cached,
+        )
+
     try:
         context = await build_sanitized_match_context(room)
     except ValueError:
         raise HTTPException(404, "Room participants not found")
 
     try:
-        reasons, icebreakers, model_name, cached = await generate_icebreakers(
+        reasons, icebreakers, model_name, cached = await generate_icebreakers_single_flight(
             context,
             requester_user_id=uid,
             participant_user_ids=[room.male_user_id, room.female_user_id],
@@ -808,6 +1232,7 @@ async def reveal_icebreaker(
     cache_doc.reveal_updated_at = now
     cache_doc.updated_at = now
     await cache_doc.save()
+    await publish_room_event(room, "icebreaker_revealed", revealed_indices=revealed_indices)
 
     return ChatNightIcebreakersRevealResponse(
         room_id=room.room_id,
@@ -821,9 +1246,9 @@ async def get_room(room_id: str, current_user: User = Depends(get_current_user))
     if not room:
         raise HTTPException(404, "Room not found")
         
-    # Check Expiry
+    # Check Expiry (display only; the expiry sweeper persists the transition)
     now = get_now_utc()
-    await normalize_room_if_expired(room, now)
+    room.state = effective_room_state(room, now)
         
     # Partner Info
     uid = str(current_user.id)
@@ -911,7 +1336,7 @@ async def engage_room(
     
     # Validate Liveness
     now = get_now_utc()
-    if await normalize_room_if_expired(room, now):
+    if room.state in LIVE_ROOM_STATES and room_is_expired(room, now):
         raise HTTPException(400, "Room expired")
     if room.state == "ended":
         raise HTTPException(400, "Room ended")
@@ -978,6 +1403,8 @@ async def engage_room(
                 print(f"ChatThread creation bridge warning: {e}")
 
     await room.save()
+    if engage_changed:
+        await publish_room_event(room, "engage", match_unlocked=room.state == "engaged")
     my_engage = room.engage_male if is_male_user else room.engage_female
     return {
         "status": "success",
@@ -3,6 +3,7 @@ from beanie import PydanticObjectId
 from pymongo.errors import DuplicateKeyError
 
 from app.auth.dependencies import get_current_user
+from app.auth.user_cache import invalidate_cached_user
 from app.core.config import settings
 from app.core.limiter import limiter
 from app.models.safety import UserBlock, UserMute, UserReport
@@ -64,6 +65,8 @@ async def block_user(
         except DuplicateKeyError:
             pass
 
+    invalidate_cached_user(current_user)
+    invalidate_cached_user(user_id=target_user_id)
     await log_event(
         "safety.block",
         source="backend",
@@ -91,6 +94,8 @@ async def unblock_user(
     if existing:
         await existing.delete()
 
+    invalidate_cached_user(current_user)
+    invalidate_cached_user(user_id=target_user_id)
     await log_event(
         "safety.unblock",
         source="backend",
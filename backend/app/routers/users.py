@@ -8,9 +8,11 @@ from fastapi import APIRouter, Body, Depends, HTTPException
 from pydantic import BaseModel
 
 from app.auth.dependencies import get_current_user
+from app.auth.user_cache import invalidate_cached_user
 from app.core.config import PHOTOS_ALLOWED_TYPES, PHOTOS_MAX_BYTES, settings
 from app.models.user import User
 from app.schemas.user import UserRead
+from app.services.chat_night_matching_v5 import invalidate_match_profile
 from app.services.photo_storage import head_object, is_configured, key_from_final_url
 
 router = APIRouter()
@@ -234,4 +236,6 @@ async def update_my_profile(
         current_user.onboarding_completed = False
         
     await current_user.save()
+    invalidate_cached_user(current_user)
+    invalidate_match_profile(str(current_user.id))
     return _build_user_read_with_strength(current_user)
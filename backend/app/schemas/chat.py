@@ -11,6 +11,8 @@ class MessageResponse(BaseModel):
     text: str
     created_at: datetime
     read_at: Optional[datetime] = None
+    # True also when read_at is unknown (read longer ago than the kept watermark steps).
+    is_read: bool = False
 
 class PartnerSnippet(BaseModel):
     id: str
@@ -33,6 +35,8 @@ class ThreadListResponse(BaseModel):
 class MessageListResponse(BaseModel):
     messages: List[MessageResponse]
     next_cursor: Optional[str] = None
+    has_more: bool = False
+    sync_cursor: Optional[str] = None
 
 class PartnerProfileData(BaseModel):
     id: str
@@ -4,20 +4,36 @@ from contextlib import nullcontext
 from datetime import date, datetime, timedelta, timezone
 from functools import lru_cache
 from typing import Annotated, Any, Dict, List, Optional, Sequence, Tuple, TypedDict
+import asyncio
 import hashlib
 import json
+import logging
 import os
 import re
+import socket
+import uuid
 
+import httpx
 from beanie import PydanticObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 from langchain_openai import ChatOpenAI
 from langgraph.graph import END, StateGraph
 from langsmith.run_helpers import tracing_context
 from pydantic import BaseModel, ConfigDict, Field, StringConstraints, ValidationError
 
-from app.models.chat_night import ChatNightIcebreakers, ChatNightRoom
+from app.core.env import parse_int_env
+from app.models.chat_night import (
+    ChatNightIcebreakers,
+    ChatNightIcebreakersBudget,
+    ChatNightIcebreakersLease,
+    ChatNightRoom,
+)
 from app.models.user import User
 from app.schemas.chat_night import SanitizedMatchContext, SanitizedPersonContext
+from app.services.icebreaker_content_cache import get_icebreaker_content_cache
+
+logger = logging.getLogger(__name__)
 
 
 OUTPUT_REASON_COUNT = 3
@@ -51,6 +67,7 @@ ICEBREAKERS_PROMPT_VERSION = (
     os.getenv("ICEBREAKERS_PROMPT_VERSION", DEFAULT_ICEBREAKERS_PROMPT_VERSION)
     or DEFAULT_ICEBREAKERS_PROMPT_VERSION
 ).strip() or DEFAULT_ICEBREAKERS_PROMPT_VERSION
+ICEBREAKERS_LEASE_POLL_SECONDS = 0.1
 LANGSMITH_TRACING_FLAGS = ("LANGSMITH_TRACING", "LANGCHAIN_TRACING_V2")
 
 
@@ -80,9 +97,11 @@ class _IcebreakerFlowState(TypedDict, total=False):
     context: SanitizedMatchContext
     requester_user_id: Optional[str]
     participant_user_ids: Optional[List[str]]
+    defer_when_denied: bool
     provider_requested: str
     openai_enabled: bool
     context_hash: str
+    content_hash: str
     deterministic_payload: Dict[str, List[str]]
     payload: Dict[str, List[str]]
     model: str
@@ -205,14 +224,6 @@ def _hash_trace_value(value: str) -> str:
     return hashlib.sha1(_to_text(value).encode("utf-8")).hexdigest()[:16]
 
 
-def _parse_int_env(name: str, default: int, min_value: int, max_value: int) -> int:
-    try:
-        value = int(os.getenv(name, str(default)))
-    except ValueError:
-        value = default
-    return max(min_value, min(max_value, value))
-
-
 def _current_provider() -> str:
     return _to_text(os.getenv("CHAT_NIGHT_ICEBREAKERS_PROVIDER", MODEL_NONE)).lower() or MODEL_NONE
 
@@ -226,7 +237,7 @@ def _openai_api_key() -> str:
 
 
 def _openai_max_output_tokens() -> int:
-    return _parse_int_env(
+    return parse_int_env(
         "CHAT_NIGHT_ICEBREAKERS_MAX_OUTPUT_TOKENS",
         default=300,
         min_value=100,
@@ -235,7 +246,7 @@ def _openai_max_output_tokens() -> int:
 
 
 def _openai_timeout_seconds() -> int:
-    return _parse_int_env(
+    return parse_int_env(
         "CHAT_NIGHT_ICEBREAKERS_TIMEOUT_SECONDS",
         default=15,
         min_value=5,
@@ -244,7 +255,7 @@ def _openai_timeout_seconds() -> int:
 
 
 def _openai_max_calls_per_day() -> int:
-    return _parse_int_env(
+    return parse_int_env(
         "CHAT_NIGHT_ICEBREAKERS_MAX_CALLS_PER_DAY",
         default=20,
         min_value=0,
@@ -253,7 +264,7 @@ def _openai_max_calls_per_day() -> int:
 
 
 def _openai_max_calls_per_user_per_day() -> int:
-    return _parse_int_env(
+    return parse_int_env(
         "CHAT_NIGHT_ICEBREAKERS_MAX_CALLS_PER_USER_PER_DAY",
         default=20,
         min_value=0,
@@ -262,7 +273,7 @@ def _openai_max_calls_per_user_per_day() -> int:
 
 
 def _openai_max_calls_per_room() -> int:
-    return _parse_int_env(
+    return parse_int_env(
         "CHAT_NIGHT_ICEBREAKERS_MAX_CALLS_PER_ROOM",
         default=1,
         min_value=0,
@@ -271,7 +282,7 @@ def _openai_max_calls_per_room() -> int:
 
 
 def _openai_min_seconds_between_calls() -> int:
-    return _parse_int_env(
+    return parse_int_env(
         "CHAT_NIGHT_ICEBREAKERS_MIN_SECONDS_BETWEEN_OPENAI_CALLS",
         default=3,
         min_value=0,
@@ -616,6 +627,16 @@ def _hash_sanitized_context(context: SanitizedMatchContext) -> str:
     return hashlib.sha1(stable_json.encode("utf-8")).hexdigest()
 
 
+def _hash_pair_content(context: SanitizedMatchContext) -> str:
+    """Like _hash_sanitized_context but without room_id: equal for any room with the same pair context."""
+    stable_json = json.dumps(
+        context.model_dump(mode="json", exclude_none=True, exclude={"room_id"}),
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha1(stable_json.encode("utf-8")).hexdigest()
+
+
 def get_icebreakers_prompt_version() -> str:
     return ICEBREAKERS_PROMPT_VERSION
 
@@ -749,14 +770,47 @@ def _langsmith_invoke_config(
     }
 
 
-def _build_structured_openai_runnable(api_key: str) -> Any:
+def _openai_http_max_connections() -> int:
+    return parse_int_env(
+        "CHAT_NIGHT_ICEBREAKERS_HTTP_MAX_CONNECTIONS",
+        default=20,
+        min_value=1,
+        max_value=200,
+    )
+
+
+# One keep-alive pool for every OpenAI call from this worker; closed in the app lifespan.
+_openai_http_client: Optional[httpx.AsyncClient] = None
+
+
+def _shared_openai_http_client() -> httpx.AsyncClient:
+    global _openai_http_client
+    if _openai_http_client is None or _openai_http_client.is_closed:
+        max_connections = _openai_http_max_connections()
+        _openai_http_client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            # The OpenAI SDK sends its own per-request timeout (ChatOpenAI.timeout).
+            timeout=None,
+        )
+    return _openai_http_client
+
+
+def _new_structured_openai_runnable(
+    *,
+    model: str,
+    api_key: str,
+    timeout_seconds: int,
+    max_output_tokens: int,
+    http_async_client: Optional[httpx.AsyncClient] = None,
+) -> Any:
     llm = ChatOpenAI(
-        model=_openai_model(),
+        model=model,
         api_key=api_key,
         temperature=0,
-        timeout=_openai_timeout_seconds(),
+        timeout=timeout_seconds,
         max_retries=0,
-        max_completion_tokens=_openai_max_output_tokens(),
+        max_completion_tokens=max_output_tokens,
+        http_async_client=http_async_client,
     )
     return llm.with_structured_output(
         _IcebreakerStructuredOutput,
@@ -765,6 +819,46 @@ def _build_structured_openai_runnable(api_key: str) -> Any:
     )
 
 
+@lru_cache(maxsize=8)
+def _cached_structured_openai_runnable(
+    model: str,
+    api_key: str,
+    timeout_seconds: int,
+    max_output_tokens: int,
+) -> Any:
+    return _new_structured_openai_runnable(
+        model=model,
+        api_key=api_key,
+        timeout_seconds=timeout_seconds,
+        max_output_tokens=max_output_tokens,
+        http_async_client=_shared_openai_http_client(),
+    )
+
+
+def _build_structured_openai_runnable(api_key: str) -> Any:
+    """
+    The structured-output runnable for the current settings, built once per
+    (model, api_key, timeout, max_tokens) and reused: building one creates
+    OpenAI clients and converts the output schema, and every call goes
+    through the shared connection pool instead of a fresh one.
+    """
+    return _cached_structured_openai_runnable(
+        _openai_model(),
+        api_key,
+        _openai_timeout_seconds(),
+        _openai_max_output_tokens(),
+    )
+
+
+async def close_openai_http_client() -> None:
+    """Close the shared pool (app shutdown); the next call builds new runnables and a new pool."""
+    global _openai_http_client
+    _cached_structured_openai_runnable.cache_clear()
+    client, _openai_http_client = _openai_http_client, None
+    if client is not None and not client.is_closed:
+        await client.aclose()
+
+
 async def _generate_openai_payload(
     context: SanitizedMatchContext,
     *,
@@ -824,62 +918,136 @@ def _to_aware_utc(value: datetime) -> datetime:
     return value.astimezone(timezone.utc)
 
 
+# Last ChatNightIcebreakersBudget document this worker saw, keyed by day. Counts
+# only grow within a day, so a cap this copy already shows as reached is
+# reached for real and can be denied without asking Mongo. The copy can lag
+# behind other workers but never runs ahead of Mongo, so an allow always goes
+# through the atomic update.
+_budget_mirror: Dict[str, Dict[str, Any]] = {}
+
+
+def _budget_key(value: str) -> str:
+    # User/room ids become field names in the budget document.
+    return _to_text(value).replace(".", "_").replace("$", "_")
+
+
+def _remember_budget(day: str, doc: Optional[Dict[str, Any]]) -> None:
+    if doc is None:
+        return
+    if day not in _budget_mirror:
+        _budget_mirror.clear()
+    _budget_mirror[day] = doc
+
+
+def _budget_denial_reason(
+    doc: Optional[Dict[str, Any]],
+    *,
+    room_key: str,
+    user_key: str,
+    now: datetime,
+    room_cap: int,
+    max_calls_global: int,
+    max_calls_per_user: int,
+    min_seconds_between_calls: int,
+) -> Optional[str]:
+    if not doc:
+        return None
+    if int((doc.get("room_calls") or {}).get(room_key, 0)) >= room_cap:
+        return "room_cap_reached"
+    if int(doc.get("calls", 0)) >= max_calls_global:
+        return "global_daily_cap_reached"
+    if user_key and int((doc.get("user_calls") or {}).get(user_key, 0)) >= max_calls_per_user:
+        return "per_user_daily_cap_reached"
+    last_call_at = doc.get("last_call_at")
+    if min_seconds_between_calls > 0 and last_call_at is not None:
+        if now - _to_aware_utc(last_call_at) < timedelta(seconds=min_seconds_between_calls):
+            return "global_throttle_active"
+    return None
+
+
 async def should_call_openai(
     room_id: str,
     requester_user_id: Optional[str],
 ) -> Tuple[bool, str]:
+    """
+    Check the OpenAI spend caps and, if allowed, reserve the call: counts for
+    the day, the requester and the room go up by one and the min-interval
+    throttle restarts. Everything happens in one conditional upsert on
+    today's ChatNightIcebreakersBudget document. A denial that this worker's
+    copy of the counters already shows costs no round-trip at all.
+    """
     room_cap = _openai_max_calls_per_room()
     if room_cap <= 0:
         return False, "room_cap_reached"
+    max_calls_global = _openai_max_calls_per_day()
+    if max_calls_global <= 0:
+        return False, "global_daily_cap_reached"
+    max_calls_per_user = _openai_max_calls_per_user_per_day()
+    if max_calls_per_user <= 0:
+        return False, "per_user_daily_cap_reached"
+    min_seconds_between_calls = _openai_min_seconds_between_calls()
 
-    day_start = _utc_day_start()
+    now = datetime.now(timezone.utc)
+    day = now.strftime("%Y-%m-%d")
+    room_key = _budget_key(room_id)
+    user_key = _budget_key(requester_user_id)
+    limits = {
+        "room_key": room_key,
+        "user_key": user_key,
+        "now": now,
+        "room_cap": room_cap,
+        "max_calls_global": max_calls_global,
+        "max_calls_per_user": max_calls_per_user,
+        "min_seconds_between_calls": min_seconds_between_calls,
+    }
 
     try:
-        cache_doc = await ChatNightIcebreakers.find_one(ChatNightIcebreakers.room_id == room_id)
-        if cache_doc and int(getattr(cache_doc, "openai_attempt_count", 0) or 0) >= room_cap:
-            return False, "room_cap_reached"
-
-        max_calls_global = _openai_max_calls_per_day()
-        if max_calls_global <= 0:
-            return False, "global_daily_cap_reached"
-
-        calls_today = await ChatNightIcebreakers.find(
-            ChatNightIcebreakers.provider_requested == OPENAI_PROVIDER,
-            ChatNightIcebreakers.openai_attempted_at >= day_start,
-        ).count()
-        if calls_today >= max_calls_global:
-            return False, "global_daily_cap_reached"
-
-        max_calls_per_user = _openai_max_calls_per_user_per_day()
-        if max_calls_per_user <= 0:
-            return False, "per_user_daily_cap_reached"
-
-        clean_requester = _to_text(requester_user_id)
-        if clean_requester:
-            user_calls_today = await ChatNightIcebreakers.find(
-                ChatNightIcebreakers.requester_user_id == clean_requester,
-                ChatNightIcebreakers.openai_attempted_at >= day_start,
-            ).count()
-            if user_calls_today >= max_calls_per_user:
-                return False, "per_user_daily_cap_reached"
-
-        min_seconds_between_calls = _openai_min_seconds_between_calls()
+        reason = _budget_denial_reason(_budget_mirror.get(day), **limits)
+        if reason:
+            return False, reason
+
+        # $not/$gte (rather than $lt) also matches counters that do not exist yet.
+        budget_filter: Dict[str, Any] = {
+            "day": day,
+            "calls": {"$not": {"$gte": max_calls_global}},
+            f"room_calls.{room_key}": {"$not": {"$gte": room_cap}},
+        }
+        increments = {"calls": 1, f"room_calls.{room_key}": 1}
+        if user_key:
+            budget_filter[f"user_calls.{user_key}"] = {"$not": {"$gte": max_calls_per_user}}
+            increments[f"user_calls.{user_key}"] = 1
         if min_seconds_between_calls > 0:
-            latest_docs = await ChatNightIcebreakers.find(
-                ChatNightIcebreakers.provider_requested == OPENAI_PROVIDER,
-                ChatNightIcebreakers.openai_attempted_at != None,  # noqa: E711
-            ).sort(-ChatNightIcebreakers.openai_attempted_at).limit(1).to_list()
-            if latest_docs and latest_docs[0].openai_attempted_at:
-                latest_attempt = _to_aware_utc(latest_docs[0].openai_attempted_at)
-                elapsed = datetime.now(timezone.utc) - latest_attempt
-                if elapsed < timedelta(seconds=min_seconds_between_calls):
-                    return False, "global_throttle_active"
+            budget_filter["last_call_at"] = {"$not": {"$gt": now - timedelta(seconds=min_seconds_between_calls)}}
+
+        collection = ChatNightIcebreakersBudget.get_motor_collection()
+        for _ in range(2):
+            try:
+                doc = await collection.find_one_and_update(
+                    budget_filter,
+                    {
+                        "$inc": increments,
+                        "$set": {"last_call_at": now},
+                        "$setOnInsert": {"expires_at": _utc_day_start(now) + timedelta(days=2)},
+                    },
+                    upsert=True,
+                    return_document=ReturnDocument.AFTER,
+                )
+            except DuplicateKeyError:
+                # Today's document exists and a cap filtered it out; read it to say which.
+                # No cap reached means we lost the race to create it: try once more.
+                doc = await collection.find_one({"day": day})
+                _remember_budget(day, doc)
+                reason = _budget_denial_reason(doc, **limits)
+                if reason:
+                    return False, reason
+                continue
+            _remember_budget(day, doc)
+            return True, "ok"
+        return False, "global_throttle_active"
     except Exception:
         # Fail-safe: if we cannot validate spend guardrails, avoid spend and fallback.
         return False, "guardrail_check_failed"
 
-    return True, "ok"
-
 
 async def _persist_cache(
     *,
@@ -947,6 +1115,26 @@ def fallback_icebreakers_response(
     return payload["reasons"], payload["icebreakers"], model, False
 
 
+async def load_cached_icebreakers(room_id: str) -> Optional[Tuple[List[str], List[str], str, bool]]:
+    """
+    The room's persisted icebreakers, if present and still valid/safe, without
+    building the match context. None means callers should run generate_icebreakers
+    (which also repairs an invalid cache entry).
+    """
+    cached_doc = await ChatNightIcebreakers.find_one(ChatNightIcebreakers.room_id == room_id)
+    if not cached_doc:
+        return None
+    cached_payload = _validate_output_shape(
+        {
+            "reasons": cached_doc.reasons,
+            "icebreakers": cached_doc.icebreakers,
+        }
+    )
+    if not cached_payload or not _passes_safety_filters(cached_payload):
+        return None
+    return cached_payload["reasons"], cached_payload["icebreakers"], _to_text(cached_doc.model) or MODEL_NONE, True
+
+
 def _graph_build_context(state: _IcebreakerFlowState) -> _IcebreakerFlowState:
     context = state["context"]
     participant_user_ids = state.get("participant_user_ids")
@@ -958,6 +1146,7 @@ def _graph_build_context(state: _IcebreakerFlowState) -> _IcebreakerFlowState:
         "provider_requested": provider_requested,
         "openai_enabled": openai_enabled,
         "context_hash": _hash_sanitized_context(context),
+        "content_hash": _hash_pair_content(context),
         "deterministic_payload": _safe_deterministic_payload(context),
         "payload": {},
         "model": MODEL_NONE,
@@ -971,11 +1160,38 @@ def _graph_build_context(state: _IcebreakerFlowState) -> _IcebreakerFlowState:
     }
 
 
+async def _load_content_cached_payload(content_hash: str) -> Optional[Tuple[Dict[str, List[str]], str]]:
+    try:
+        entry = await get_icebreaker_content_cache().get(content_hash, get_icebreakers_prompt_version())
+    except Exception:
+        logger.exception("Icebreakers content cache lookup failed")
+        return None
+    if entry is None:
+        return None
+    payload = _validate_output_shape({"reasons": entry["reasons"], "icebreakers": entry["icebreakers"]})
+    if not payload or not _passes_safety_filters(payload):
+        return None
+    return payload, _to_text(entry.get("model")) or _openai_model()
+
+
 async def _graph_check_cache(state: _IcebreakerFlowState) -> _IcebreakerFlowState:
     context = state["context"]
     deterministic_payload = state["deterministic_payload"]
     cached_doc = await ChatNightIcebreakers.find_one(ChatNightIcebreakers.room_id == context.room_id)
 
+    if not cached_doc and state.get("openai_enabled", False):
+        # Same pair context seen in another room: reuse its LLM output, no new call.
+        content_payload = await _load_content_cached_payload(state["content_hash"])
+        if content_payload is not None:
+            payload, model = content_payload
+            return {
+                "payload": payload,
+                "model": model,
+                "cached": True,
+                "should_call_llm": False,
+                "should_persist": True,
+            }
+
     if not cached_doc:
         return {
             "payload": deterministic_payload,
@@ -1047,6 +1263,8 @@ async def _graph_call_llm_langchain(state: _IcebreakerFlowState) -> _IcebreakerF
             "model": MODEL_FALLBACK,
             "openai_attempted": False,
             "openai_attempted_at": None,
+            # Deferred: leave the room uncached so a later request can still get LLM output.
+            "should_persist": not state.get("defer_when_denied", False),
         }
 
     openai_attempted_at = datetime.now(timezone.utc)
@@ -1091,8 +1309,9 @@ def _graph_validate_and_filter(state: _IcebreakerFlowState) -> _IcebreakerFlowSt
 
 
 async def _graph_persist_cache(state: _IcebreakerFlowState) -> _IcebreakerFlowState:
+    # LangGraph rejects a node that writes no state key, so both exits report should_persist.
     if not state.get("should_persist", False):
-        return {}
+        return {"should_persist": False}
 
     try:
         await _persist_cache(
@@ -1108,7 +1327,21 @@ async def _graph_persist_cache(state: _IcebreakerFlowState) -> _IcebreakerFlowSt
         )
     except Exception:
         pass
-    return {}
+
+    # Only fresh, accepted LLM output goes into the content cache (validate_and_filter
+    # has already swapped anything unusable for the deterministic fallback).
+    if state.get("openai_attempted") and state.get("model") == _openai_model():
+        try:
+            await get_icebreaker_content_cache().put(
+                state["content_hash"],
+                get_icebreakers_prompt_version(),
+                reasons=state["payload"]["reasons"],
+                icebreakers=state["payload"]["icebreakers"],
+                model=state["model"],
+            )
+        except Exception:
+            logger.exception("Icebreakers content cache store failed")
+    return {"should_persist": False}
 
 
 def _graph_return(state: _IcebreakerFlowState) -> _IcebreakerFlowState:
@@ -1149,11 +1382,16 @@ async def generate_icebreakers(
     *,
     requester_user_id: Optional[str] = None,
     participant_user_ids: Optional[Sequence[str]] = None,
+    defer_when_denied: bool = False,
 ) -> Tuple[List[str], List[str], str, bool]:
     """
     Provider-agnostic contract:
     generate_icebreakers(context, requester_user_id?, participant_user_ids?)
     -> (reasons, icebreakers, model, cached)
+
+    defer_when_denied: when the OpenAI budget/throttle refuses the call, return
+    the fallback without caching it for the room (used by match-time prefetch,
+    so the room can still get LLM output when someone opens it).
     """
     openai_enabled = _current_provider() == OPENAI_PROVIDER and bool(_openai_api_key())
     context_hash = _hash_sanitized_context(context)
@@ -1164,6 +1402,7 @@ async def generate_icebreakers(
             "context": context,
             "requester_user_id": requester_user_id,
             "participant_user_ids": participant_list,
+            "defer_when_denied": defer_when_denied,
         }
         trace_allowed = _trace_allowed_for_context(context, stage="graph")
         invoke_kwargs: Dict[str, Any] = {}
@@ -1197,3 +1436,111 @@ async def generate_icebreakers(
             context,
             prefer_fallback=openai_enabled,
         )
+
+
+# room_id -> the one running generation on this worker (see generate_icebreakers_single_flight)
+_inflight_generations: Dict[str, asyncio.Task] = {}
+
+
+def _generation_lease_seconds() -> int:
+    # Long enough for the graph's single OpenAI call plus the Mongo round-trips around it.
+    return _openai_timeout_seconds() + 10
+
+
+async def _acquire_generation_lease(room_id: str, owner: str) -> bool:
+    """
+    Take the room's generation lease if nobody holds an unexpired one. An
+    expired lease matches the filter and is taken over; a live one does not,
+    so the upsert collides with it on the unique room_id and we lose.
+    """
+    now = datetime.now(timezone.utc)
+    try:
+        await ChatNightIcebreakersLease.get_motor_collection().find_one_and_update(
+            {"room_id": room_id, "expires_at": {"$lte": now}},
+            {"$set": {"owner": owner, "expires_at": now + timedelta(seconds=_generation_lease_seconds())}},
+            upsert=True,
+        )
+        return True
+    except DuplicateKeyError:
+        return False
+
+
+async def _release_generation_lease(room_id: str, owner: str) -> None:
+    try:
+        await ChatNightIcebreakersLease.get_motor_collection().delete_one({"room_id": room_id, "owner": owner})
+    except Exception:
+        logger.exception("Failed to release icebreakers lease for room %s", room_id)
+
+
+async def _generate_icebreakers_with_lease(
+    context: SanitizedMatchContext,
+    *,
+    requester_user_id: Optional[str],
+    participant_user_ids: Optional[Sequence[str]],
+    defer_when_denied: bool,
+) -> Tuple[List[str], List[str], str, bool]:
+    room_id = context.room_id
+    owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + _generation_lease_seconds()
+    try:
+        acquired = await _acquire_generation_lease(room_id, owner)
+        # Another worker is generating: wait for its cache entry. If its lease
+        # is released or expires first (it failed or died), take over.
+        while not acquired and loop.time() < deadline:
+            await asyncio.sleep(ICEBREAKERS_LEASE_POLL_SECONDS)
+            cached = await load_cached_icebreakers(room_id)
+            if cached is not None:
+                return cached
+            acquired = await _acquire_generation_lease(room_id, owner)
+    except Exception:
+        # Fail open: without the lease we may duplicate work, but still answer.
+        logger.exception("Icebreakers lease check failed for room %s", room_id)
+        acquired = False
+
+    try:
+        return await generate_icebreakers(
+            context,
+            requester_user_id=requester_user_id,
+            participant_user_ids=participant_user_ids,
+            defer_when_denied=defer_when_denied,
+        )
+    finally:
+        if acquired:
+            await _release_generation_lease(room_id, owner)
+
+
+async def generate_icebreakers_single_flight(
+    context: SanitizedMatchContext,
+    *,
+    requester_user_id: Optional[str] = None,
+    participant_user_ids: Optional[Sequence[str]] = None,
+    defer_when_denied: bool = False,
+) -> Tuple[List[str], List[str], str, bool]:
+    """
+    generate_icebreakers, run at most once at a time per room. Concurrent
+    callers on this worker share one task; across workers a Mongo lease lets
+    one generate while the others wait for its cache entry. Both participants
+    opening the room together therefore cost one graph run and at most one
+    OpenAI attempt. Same contract as generate_icebreakers.
+    """
+    room_id = context.room_id
+    task = _inflight_generations.get(room_id)
+    if task is None:
+        task = asyncio.ensure_future(
+            _generate_icebreakers_with_lease(
+                context,
+                requester_user_id=requester_user_id,
+                participant_user_ids=participant_user_ids,
+                defer_when_denied=defer_when_denied,
+            )
+        )
+        _inflight_generations[room_id] = task
+
+        def _forget(done: asyncio.Task) -> None:
+            if _inflight_generations.get(room_id) is done:
+                del _inflight_generations[room_id]
+
+        task.add_done_callback(_forget)
+    # Shielded: a caller that disconnects must not cancel the others' generation.
+    return await asyncio.shield(task)
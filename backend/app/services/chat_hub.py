@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional, Set
+
+from fastapi.encoders import jsonable_encoder
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Per-socket buffer. Chat events must not be silently lost, so a socket that
+# falls this far behind gets its backlog replaced by a single `resync` event
+# and the client catches up with GET /messages?after=<sync_cursor>.
+CONNECTION_QUEUE_SIZE = 256
+
+Deliver = Callable[[List[str], Dict[str, Any]], None]
+
+
+class ChatConnection:
+    def __init__(self, user_id: str, max_pending: int = CONNECTION_QUEUE_SIZE) -> None:
+        self.user_id = user_id
+        self._events: asyncio.Queue = asyncio.Queue(maxsize=max_pending)
+        self.resyncs = 0
+
+    def deliver(self, event: Dict[str, Any]) -> None:
+        if self._events.full():
+            while not self._events.empty():
+                self._events.get_nowait()
+            self._events.put_nowait({"type": "resync"})
+            self.resyncs += 1
+            return
+        self._events.put_nowait(event)
+
+    async def get(self) -> Dict[str, Any]:
+        return await self._events.get()
+
+
+class ChatPubSub(ABC):
+    """
+    Transport between the workers that write chat data and the workers that
+    hold the recipients' sockets. `start` registers the hub's local delivery
+    callback; `publish` must eventually invoke it on every worker.
+    """
+
+    @abstractmethod
+    async def start(self, deliver: Deliver) -> None:
+        raise NotImplementedError
+
+    async def stop(self) -> None:
+        pass
+
+    @abstractmethod
+    async def publish(self, user_ids: List[str], event: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+
+class InProcessChatPubSub(ChatPubSub):
+    """Single worker: publishing is local delivery."""
+
+    def __init__(self) -> None:
+        self._deliver: Optional[Deliver] = None
+
+    async def start(self, deliver: Deliver) -> None:
+        self._deliver = deliver
+
+    async def publish(self, user_ids: List[str], event: Dict[str, Any]) -> None:
+        if self._deliver is not None:
+            self._deliver(user_ids, event)
+
+
+class RedisChatPubSub(ChatPubSub):
+    """
+    Multi-worker fan-out over one Redis pub/sub channel: every worker receives
+    every event and delivers it to whichever recipients it holds sockets for.
+    """
+
+    def __init__(self, url: str, channel: str = "blush_hour:chat") -> None:
+        self.url = url
+        self.channel = channel
+        self._redis = None
+        self._listener: Optional[asyncio.Task] = None
+
+    async def start(self, deliver: Deliver) -> None:
+        import redis.asyncio as redis
+
+        self._redis = redis.from_url(self.url)
+        pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        await pubsub.subscribe(self.channel)
+        self._listener = asyncio.create_task(self._listen(pubsub, deliver), name="chat-pubsub-listener")
+
+    async def _listen(self, pubsub, deliver: Deliver) -> None:
+        try:
+            async for message in pubsub.listen():
+                try:
+                    envelope = json.loads(message["data"])
+                    deliver(envelope["user_ids"], envelope["event"])
+                except Exception:
+                    logger.exception("Dropping malformed chat pub/sub message")
+        finally:
+            await pubsub.aclose()
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+
+    async def publish(self, user_ids: List[str], event: Dict[str, Any]) -> None:
+        await self._redis.publish(self.channel, json.dumps({"user_ids": user_ids, "event": event}))
+
+
+class ChatHub:
+    """
+    Registry of this worker's chat sockets (user_id -> connections, one per
+    device) plus the pub/sub adapter that routes events to them. Publishers
+    call `publish` after their write commits; delivery is best effort and
+    clients use the message cursors to fill gaps after a reconnect.
+    """
+
+    def __init__(self, pubsub: Optional[ChatPubSub] = None) -> None:
+        self.pubsub = pubsub or InProcessChatPubSub()
+        self._connections: Dict[str, Set[ChatConnection]] = {}
+        self._started = False
+        self.stats: Dict[str, int] = {"published": 0, "delivered": 0, "resyncs": 0}
+
+    async def start(self) -> None:
+        if not self._started:
+            self._started = True
+            try:
+                await self.pubsub.start(self.deliver_local)
+            except Exception:
+                self._started = False
+                raise
+
+    async def stop(self) -> None:
+        if self._started:
+            await self.pubsub.stop()
+            self._started = False
+
+    def connection_count(self, user_id: Optional[str] = None) -> int:
+        if user_id is not None:
+            return len(self._connections.get(user_id, ()))
+        return sum(len(connections) for connections in self._connections.values())
+
+    def deliver_local(self, user_ids: List[str], event: Dict[str, Any]) -> None:
+        for user_id in user_ids:
+            for connection in list(self._connections.get(user_id, ())):
+                connection.deliver(event)
+                self.stats["delivered"] += 1
+
+    async def publish(self, user_ids: Iterable[Any], event: Dict[str, Any]) -> None:
+        """Send `event` to every socket of `user_ids`; never raises into the caller's write path."""
+        recipients = [str(user_id) for user_id in user_ids]
+        if not recipients:
+            return
+        self.stats["published"] += 1
+        try:
+            await self.start()
+            await self.pubsub.publish(recipients, jsonable_encoder(event))
+        except Exception:
+            logger.exception("Chat event publish failed: %s", event.get("type"))
+
+    @asynccontextmanager
+    async def connect(self, user_id: str) -> AsyncIterator[ChatConnection]:
+        await self.start()
+        connection = ChatConnection(user_id)
+        self._connections.setdefault(user_id, set()).add(connection)
+        try:
+            yield connection
+        finally:
+            connections = self._connections.get(user_id)
+            if connections is not None:
+                connections.discard(connection)
+                if not connections:
+                    del self._connections[user_id]
+            self.stats["resyncs"] += connection.resyncs
+
+
+def build_chat_pubsub(channel: str = "blush_hour:chat") -> ChatPubSub:
+    if settings.BH_CHAT_PUBSUB == "redis":
+        return RedisChatPubSub(settings.REDIS_URL, channel)
+    return InProcessChatPubSub()
+
+
+_chat_hub: Optional[ChatHub] = None
+
+
+def get_chat_hub() -> ChatHub:
+    global _chat_hub
+    if _chat_hub is None:
+        _chat_hub = ChatHub(build_chat_pubsub())
+    return _chat_hub
+
+
+def set_chat_hub(hub: Optional[ChatHub]) -> None:
+    """Swap the active hub (tests or a differently configured pub/sub)."""
+    global _chat_hub
+    _chat_hub = hub
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+def max_weight_assignment(weights: Sequence[Sequence[Optional[float]]]) -> List[Tuple[int, int]]:
+    """
+    Maximum-weight bipartite matching over a rows x cols weight matrix.
+    `None` marks a forbidden pair; every allowed weight must be > 0. Returns
+    (row, col) pairs. Hungarian algorithm (shortest augmenting paths with
+    potentials), O(n^2 * m) with the inner scan over columns vectorized.
+    """
+    rows = len(weights)
+    cols = len(weights[0]) if rows else 0
+    if rows == 0 or cols == 0:
+        return []
+
+    gain = np.zeros((rows, cols), dtype=np.float64)
+    for r, row in enumerate(weights):
+        for c, value in enumerate(row):
+            if value is not None:
+                gain[r, c] = float(value)
+
+    transposed = rows > cols
+    if transposed:
+        gain = gain.T
+        rows, cols = cols, rows
+
+    # Minimize cost = max_gain - gain; forbidden pairs get gain 0 and are dropped after solving.
+    cost = gain.max() - gain
+    u = np.zeros(rows + 1)
+    v = np.zeros(cols + 1)
+    p = np.zeros(cols + 1, dtype=np.int64)
+    way = np.zeros(cols + 1, dtype=np.int64)
+    for i in range(1, rows + 1):
+        p[0] = i
+        j0 = 0
+        minv = np.full(cols + 1, np.inf)
+        used = np.zeros(cols + 1, dtype=bool)
+        while True:
+            used[j0] = True
+            i0 = p[j0]
+            free = ~used[1:]
+            cur = cost[i0 - 1] - u[i0] - v[1:]
+            improve = free & (cur < minv[1:])
+            minv[1:][improve] = cur[improve]
+            way[1:][improve] = j0
+            masked = np.where(free, minv[1:], np.inf)
+            j1 = int(np.argmin(masked)) + 1
+            delta = masked[j1 - 1]
+            u[p[used]] += delta
+            v[used] -= delta
+            minv[1:][free] -= delta
+            j0 = j1
+            if p[j0] == 0:
+                break
+        while j0:
+            j1 = way[j0]
+            p[j0] = p[j1]
+            j0 = j1
+
+    pairs: List[Tuple[int, int]] = []
+    for j in range(1, cols + 1):
+        if p[j] == 0 or gain[p[j] - 1, j - 1] <= 0:
+            continue
+        r, c = p[j] - 1, j - 1
+        pairs.append((int(c), int(r)) if transposed else (int(r), int(c)))
+    return pairs
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional, Set
+
+from fastapi.encoders import jsonable_encoder
+
+from app.services.chat_hub import ChatPubSub, InProcessChatPubSub, build_chat_pubsub
+
+logger = logging.getLogger(__name__)
+
+# Per-connection buffer; a client that stops reading loses its oldest events
+# (every event carries the full room view, so the latest one is what matters).
+SUBSCRIBER_QUEUE_SIZE = 32
+
+CHAT_NIGHT_PUBSUB_CHANNEL = "blush_hour:chat_night"
+
+
+class ChatNightSubscription:
+    def __init__(self, user_id: str, max_pending: int = SUBSCRIBER_QUEUE_SIZE) -> None:
+        self.user_id = user_id
+        self._events: asyncio.Queue = asyncio.Queue(maxsize=max_pending)
+        self.dropped = 0
+
+    def deliver(self, event: Dict[str, Any]) -> None:
+        if self._events.full():
+            self._events.get_nowait()
+            self.dropped += 1
+        self._events.put_nowait(event)
+
+    async def get(self) -> Dict[str, Any]:
+        return await self._events.get()
+
+
+class ChatNightEventBus:
+    """
+    Per-user fan-out of Chat Night events (match_found, engage, room_ended,
+    icebreaker_revealed) to connected clients. Transport is the ChatPubSub
+    selected by BH_CHAT_PUBSUB, on its own channel: with the Redis adapter an
+    event published on any worker reaches the user's sockets on every worker,
+    the in-process one only reaches this worker's.
+    """
+
+    def __init__(self, pubsub: Optional[ChatPubSub] = None) -> None:
+        self.pubsub = pubsub or InProcessChatPubSub()
+        self._subscribers: Dict[str, Set[ChatNightSubscription]] = {}
+        self._started = False
+
+    async def start(self) -> None:
+        if not self._started:
+            self._started = True
+            try:
+                await self.pubsub.start(self.deliver_local)
+            except Exception:
+                self._started = False
+                raise
+
+    async def stop(self) -> None:
+        if self._started:
+            await self.pubsub.stop()
+            self._started = False
+
+    def subscriber_count(self, user_id: Optional[str] = None) -> int:
+        if user_id is not None:
+            return len(self._subscribers.get(user_id, ()))
+        return sum(len(subs) for subs in self._subscribers.values())
+
+    def deliver_local(self, user_ids: List[str], event: Dict[str, Any]) -> None:
+        for user_id in user_ids:
+            for subscription in list(self._subscribers.get(user_id, ())):
+                subscription.deliver(event)
+
+    async def publish(self, user_id: str, event: Dict[str, Any]) -> None:
+        await self.start()
+        await self.pubsub.publish([user_id], jsonable_encoder(event))
+
+    @asynccontextmanager
+    async def subscribe(self, user_id: str) -> AsyncIterator[ChatNightSubscription]:
+        await self.start()
+        subscription = ChatNightSubscription(user_id)
+        self._subscribers.setdefault(user_id, set()).add(subscription)
+        try:
+            yield subscription
+        finally:
+            subscribers = self._subscribers.get(user_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[user_id]
+            if subscription.dropped:
+                logger.info("Chat Night events dropped for slow subscriber: %s", subscription.dropped)
+
+
+_event_bus: Optional[ChatNightEventBus] = None
+
+
+def get_chat_night_event_bus() -> ChatNightEventBus:
+    global _event_bus
+    if _event_bus is None:
+        _event_bus = ChatNightEventBus(build_chat_pubsub(CHAT_NIGHT_PUBSUB_CHANNEL))
+    return _event_bus
+
+
+def set_chat_night_event_bus(bus: Optional[ChatNightEventBus]) -> None:
+    """Swap the active bus (tests or a differently configured pub/sub)."""
+    global _event_bus
+    _event_bus = bus
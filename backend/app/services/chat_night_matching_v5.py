@@ -1,10 +1,29 @@
 from __future__ import annotations
 
+from collections import OrderedDict
+from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import Any, Dict, Iterable, List, Optional, Sequence
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple, Union
 import hashlib
+import os
+import time
 
 HABIT_KEYS = ["drinking", "smoking", "exercise", "kids"]
+LAST_ACTIVE_KEYS = ("last_active_at", "last_active", "last_seen_at", "updated_at")
+
+
+def match_profile_cache_max_entries() -> int:
+    try:
+        return max(0, int(os.getenv("CHAT_NIGHT_V5_PROFILE_CACHE_MAX_ENTRIES", "10000")))
+    except ValueError:
+        return 10000
+
+
+def match_profile_cache_ttl_seconds() -> int:
+    try:
+        return max(0, int(os.getenv("CHAT_NIGHT_V5_PROFILE_CACHE_TTL_SECONDS", "600")))
+    except ValueError:
+        return 600
 
 
 def _get_value(obj: Any, key: str, default: Any = None) -> Any:
@@ -76,7 +95,7 @@ def _ensure_utc(value: datetime) -> datetime:
 
 
 def _get_last_active_at(candidate: Any) -> Optional[datetime]:
-    for key in ("last_active_at", "last_active", "last_seen_at", "updated_at"):
+    for key in LAST_ACTIVE_KEYS:
         value = _get_value(candidate, key, None)
         if value:
             dt = _coerce_datetime(value)
@@ -93,6 +112,13 @@ def _get_identifier(obj: Any) -> str:
     return ""
 
 
+def _jaccard_sets(set_a: FrozenSet[Any], set_b: FrozenSet[Any]) -> float:
+    union = len(set_a | set_b)
+    if not union:
+        return 0.0
+    return len(set_a & set_b) / union
+
+
 def jaccard_similarity(a: Iterable[Any], b: Iterable[Any]) -> float:
     set_a = _as_set(list(a))
     set_b = _as_set(list(b))
@@ -122,43 +148,151 @@ def recency_bucket(last_active_at: Optional[datetime], now: datetime) -> float:
     return 0.0
 
 
-def score_candidate(user: Any, candidate: Any, now: Optional[datetime] = None) -> Dict[str, Any]:
+@dataclass(frozen=True)
+class MatchProfile:
     """
-    V5 scoring module. Returns {score, reason_tags} only.
+    Everything V5 scoring reads from a user, normalized once: tag frozensets,
+    habit values in HABIT_KEYS order, prompt presence and last-active time.
     """
-    now = now or datetime.now(timezone.utc)
+    user_id: str
+    interests: FrozenSet[Any]
+    values: FrozenSet[Any]
+    languages: FrozenSet[Any]
+    habits: Tuple[str, ...]
+    has_prompts: bool
+    last_active_at: Optional[datetime]
+    last_active_ts: float
+
+
+def build_match_profile(obj: Any) -> MatchProfile:
+    habits = _to_dict(_get_value(obj, "habits", {}))
+    last_active_at = _get_last_active_at(obj)
+    return MatchProfile(
+        user_id=_get_identifier(obj),
+        interests=frozenset(_as_set(_to_list(_get_value(obj, "interests", [])))),
+        values=frozenset(_as_set(_to_list(_get_value(obj, "values", [])))),
+        languages=frozenset(_as_set(_to_list(_get_value(obj, "languages", [])))),
+        habits=tuple(_normalize_habit_value(habits.get(key)) for key in HABIT_KEYS),
+        has_prompts=len(_to_list(_get_value(obj, "prompts", []))) > 0,
+        last_active_at=last_active_at,
+        last_active_ts=last_active_at.timestamp() if last_active_at is not None else -1,
+    )
+
+
+def _profile_source(obj: Any) -> Tuple[Any, ...]:
+    """The raw fields build_match_profile reads, as a tuple to compare by value."""
+    habits = _to_dict(_get_value(obj, "habits", {}))
+    return (
+        tuple(_to_list(_get_value(obj, "interests", []))),
+        tuple(_to_list(_get_value(obj, "values", []))),
+        tuple(_to_list(_get_value(obj, "languages", []))),
+        tuple(habits.get(key) for key in HABIT_KEYS),
+        len(_to_list(_get_value(obj, "prompts", []))) > 0,
+        tuple(_get_value(obj, key, None) for key in LAST_ACTIVE_KEYS),
+    )
+
+
+class MatchProfileCache:
+    """
+    Bounded LRU of MatchProfile by user id. Each entry keeps the raw fields
+    it was built from and is only returned for an object with the same
+    values, so a profile edited anywhere (any worker) is rebuilt on the next
+    lookup instead of being scored stale; the TTL just ages out idle users.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, Tuple[Any, ...], MatchProfile]]" = OrderedDict()
+
+    def get(self, user_id: str, source: Tuple[Any, ...]) -> Optional[MatchProfile]:
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+        cached_at, cached_source, profile = entry
+        if time.monotonic() - cached_at > self.ttl_seconds or cached_source != source:
+            del self._entries[user_id]
+            return None
+        self._entries.move_to_end(user_id)
+        return profile
+
+    def put(self, profile: MatchProfile, source: Tuple[Any, ...]) -> None:
+        if not profile.user_id or self.max_entries <= 0:
+            return
+        self._entries[profile.user_id] = (time.monotonic(), source, profile)
+        self._entries.move_to_end(profile.user_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: str) -> None:
+        self._entries.pop(user_id, None)
 
-    u_interests = _as_set(_to_list(_get_value(user, "interests", [])))
-    c_interests = _as_set(_to_list(_get_value(candidate, "interests", [])))
+    def clear(self) -> None:
+        self._entries.clear()
 
-    u_values = _as_set(_to_list(_get_value(user, "values", [])))
-    c_values = _as_set(_to_list(_get_value(candidate, "values", [])))
 
-    u_languages = _as_set(_to_list(_get_value(user, "languages", [])))
-    c_languages = _as_set(_to_list(_get_value(candidate, "languages", [])))
+_match_profile_cache: Optional[MatchProfileCache] = None
 
-    u_habits = _to_dict(_get_value(user, "habits", {}))
-    c_habits = _to_dict(_get_value(candidate, "habits", {}))
 
-    u_prompts = _to_list(_get_value(user, "prompts", []))
-    c_prompts = _to_list(_get_value(candidate, "prompts", []))
+def get_match_profile_cache() -> MatchProfileCache:
+    global _match_profile_cache
+    if _match_profile_cache is None:
+        _match_profile_cache = MatchProfileCache(
+            max_entries=match_profile_cache_max_entries(),
+            ttl_seconds=match_profile_cache_ttl_seconds(),
+        )
+    return _match_profile_cache
+
+
+def set_match_profile_cache(cache: Optional[MatchProfileCache]) -> None:
+    """Swap the active cache (tests or a different size/TTL)."""
+    global _match_profile_cache
+    _match_profile_cache = cache
+
+
+def cache_match_profile(user: Any) -> MatchProfile:
+    """Build and cache a user's profile (called when they enter the Chat Night pool)."""
+    source = _profile_source(user)
+    profile = build_match_profile(user)
+    get_match_profile_cache().put(profile, source)
+    return profile
+
+
+def get_match_profile(obj: Union[MatchProfile, Any]) -> MatchProfile:
+    """Profile for `obj` as passed in; the cache only saves rebuilding unchanged users."""
+    if isinstance(obj, MatchProfile):
+        return obj
+    user_id = _get_identifier(obj)
+    if not user_id:
+        return build_match_profile(obj)
+    source = _profile_source(obj)
+    cache = get_match_profile_cache()
+    cached = cache.get(user_id, source)
+    if cached is not None:
+        return cached
+    profile = build_match_profile(obj)
+    cache.put(profile, source)
+    return profile
+
+
+def invalidate_match_profile(user_id: str) -> None:
+    get_match_profile_cache().invalidate(str(user_id))
+
 
-    s_interests = round(40 * jaccard_similarity(u_interests, c_interests))
-    s_values = round(20 * jaccard_similarity(u_values, c_values))
-    s_lang = 10 if (u_languages & c_languages) else 0
+def score_profiles(user: MatchProfile, candidate: MatchProfile, now: datetime) -> Dict[str, Any]:
+    s_interests = round(40 * _jaccard_sets(user.interests, candidate.interests))
+    s_values = round(20 * _jaccard_sets(user.values, candidate.values))
+    s_lang = 10 if (user.languages & candidate.languages) else 0
 
     matches = 0
-    for key in HABIT_KEYS:
-        u_val = _normalize_habit_value(u_habits.get(key))
-        c_val = _normalize_habit_value(c_habits.get(key))
+    for u_val, c_val in zip(user.habits, candidate.habits):
         if u_val and c_val and u_val == c_val:
             matches += 1
     s_habits = min(20, matches * 5)
 
-    s_prompts = 10 if (len(u_prompts) > 0 and len(c_prompts) > 0) else 0
+    s_prompts = 10 if (user.has_prompts and candidate.has_prompts) else 0
 
-    last_active_at = _get_last_active_at(candidate)
-    s_recency = round(10 * recency_bucket(last_active_at, now))
+    s_recency = round(10 * recency_bucket(candidate.last_active_at, now))
 
     score_total = s_interests + s_values + s_lang + s_habits + s_prompts + s_recency
     score_total = max(0, min(100, score_total))
@@ -183,6 +317,15 @@ def score_candidate(user: Any, candidate: Any, now: Optional[datetime] = None) -
     }
 
 
+def score_candidate(user: Any, candidate: Any, now: Optional[datetime] = None) -> Dict[str, Any]:
+    """
+    V5 scoring module. Returns {score, reason_tags} only.
+    Accepts raw users/dicts or prebuilt MatchProfile objects.
+    """
+    now = now or datetime.now(timezone.utc)
+    return score_profiles(get_match_profile(user), get_match_profile(candidate), now)
+
+
 def rank_candidates(
     user: Any,
     candidates: Sequence[Any],
@@ -195,25 +338,17 @@ def rank_candidates(
     """
     now = now or datetime.now(timezone.utc)
     date_str = now.date().isoformat()
-    u_id = _get_identifier(user)
+    user_profile = get_match_profile(user)
+    u_id = user_profile.user_id
 
     scored: List[Dict[str, Any]] = []
     for candidate in list(candidates)[:max(0, limit)]:
-        result = score_candidate(user, candidate, now=now)
+        candidate_profile = get_match_profile(candidate)
+        result = score_profiles(user_profile, candidate_profile, now)
 
-        u_interests = _as_set(_to_list(_get_value(user, "interests", [])))
-        c_interests = _as_set(_to_list(_get_value(candidate, "interests", [])))
-        shared_interests = len(u_interests & c_interests)
-
-        last_active_at = _get_last_active_at(candidate)
-        last_active_ts = (
-            _ensure_utc(last_active_at).timestamp()
-            if last_active_at is not None
-            else -1
-        )
+        shared_interests = len(user_profile.interests & candidate_profile.interests)
 
-        c_id = _get_identifier(candidate)
-        raw = f"{u_id}:{c_id}:{date_str}"
+        raw = f"{u_id}:{candidate_profile.user_id}:{date_str}"
         hash_int = int(hashlib.sha1(raw.encode("utf-8")).hexdigest(), 16)
 
         scored.append({
@@ -221,8 +356,8 @@ def rank_candidates(
             "score": result["score"],
             "reason_tags": result["reason_tags"],
             "shared_interests": shared_interests,
-            "last_active_at": last_active_at,
-            "_last_active_ts": last_active_ts,
+            "last_active_at": candidate_profile.last_active_at,
+            "_last_active_ts": candidate_profile.last_active_ts,
             "_hash_int": hash_int,
         })
 
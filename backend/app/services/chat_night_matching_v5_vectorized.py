@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Sequence
+import hashlib
+
+import numpy as np
+
+from app.services.chat_night_matching_v5 import (
+    MatchProfile,
+    _ensure_utc,
+    get_match_profile,
+)
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_ONE_MICROSECOND = timedelta(microseconds=1)
+_UINT64_MASK = (1 << 64) - 1
+
+class _EncodedPool:
+    """
+    Candidate profiles flattened into arrays: one CSR-style id list per tag
+    family. Tag/habit values are interned to small ints per pool, so the
+    vocabulary lives only as long as one ranking call.
+    """
+
+    def __init__(self, profiles: Sequence[MatchProfile]) -> None:
+        count = len(profiles)
+        self.count = count
+        self._vocab: Dict[Any, int] = {}
+        self.tags: Dict[str, tuple] = {}
+        for family in ("interests", "values", "languages"):
+            flat: List[int] = []
+            owners: List[int] = []
+            sizes = np.zeros(count, dtype=np.int64)
+            for row, profile in enumerate(profiles):
+                tags = getattr(profile, family)
+                sizes[row] = len(tags)
+                for tag in tags:
+                    flat.append(self._intern(tag))
+                    owners.append(row)
+            self.tags[family] = (
+                np.asarray(flat, dtype=np.int64),
+                np.asarray(owners, dtype=np.int64),
+                sizes,
+            )
+
+        habits = np.full((count, len(profiles[0].habits) if profiles else 0), -1, dtype=np.int64)
+        has_prompts = np.zeros(count, dtype=bool)
+        has_last_active = np.zeros(count, dtype=bool)
+        last_active_us = np.zeros(count, dtype=np.int64)
+        last_active_ts = np.full(count, -1.0, dtype=np.float64)
+        for row, profile in enumerate(profiles):
+            for col, value in enumerate(profile.habits):
+                if value:
+                    habits[row, col] = self._intern(("habit", value))
+            has_prompts[row] = profile.has_prompts
+            if profile.last_active_at is not None:
+                has_last_active[row] = True
+                last_active_us[row] = (_ensure_utc(profile.last_active_at) - _EPOCH) // _ONE_MICROSECOND
+                last_active_ts[row] = profile.last_active_ts
+        self.habits = habits
+        self.has_prompts = has_prompts
+        self.has_last_active = has_last_active
+        self.last_active_us = last_active_us
+        self.last_active_ts = last_active_ts
+
+    def _intern(self, value: Any) -> int:
+        tag_id = self._vocab.get(value)
+        if tag_id is None:
+            tag_id = len(self._vocab)
+            self._vocab[value] = tag_id
+        return tag_id
+
+    def tag_id(self, value: Any) -> int:
+        """Id of a value seen in this pool, -1 for one no candidate has."""
+        return self._vocab.get(value, -1)
+
+    def intersection_sizes(self, family: str, user_tags: frozenset) -> np.ndarray:
+        flat, owners, _ = self.tags[family]
+        if not user_tags or flat.size == 0:
+            return np.zeros(self.count, dtype=np.int64)
+        user_ids = np.asarray([self.tag_id(tag) for tag in user_tags], dtype=np.int64)
+        hits = np.isin(flat, user_ids)
+        return np.bincount(owners[hits], minlength=self.count).astype(np.int64)
+
+    def jaccard(self, family: str, user_tags: frozenset, intersections: np.ndarray) -> np.ndarray:
+        _, _, sizes = self.tags[family]
+        union = len(user_tags) + sizes - intersections
+        result = np.zeros(self.count, dtype=np.float64)
+        nonzero = union > 0
+        result[nonzero] = intersections[nonzero] / union[nonzero]
+        return result
+
+
+def _recency_points(pool: _EncodedPool, now: datetime) -> np.ndarray:
+    now_us = (_ensure_utc(now) - _EPOCH) // _ONE_MICROSECOND
+    # Same float ops as timedelta.total_seconds() / 60 in recency_bucket.
+    age_minutes = ((now_us - pool.last_active_us).astype(np.float64) / 1e6) / 60
+    age_minutes = np.where(age_minutes < 0, 0, age_minutes)
+    bucket = np.select(
+        [age_minutes <= 2, age_minutes <= 5, age_minutes <= 10, age_minutes <= 20],
+        [1.0, 0.8, 0.6, 0.4],
+        default=0.0,
+    )
+    bucket = np.where(pool.has_last_active, bucket, 0.0)
+    return np.round(10 * bucket).astype(np.int64)
+
+
+def rank_candidates_vectorized(
+    user: Any,
+    candidates: Sequence[Any],
+    now: Optional[datetime] = None,
+    limit: int = 50,
+) -> List[Dict[str, Any]]:
+    """
+    NumPy engine for rank_candidates: identical scores, reason tags and
+    tie-break order, computed for the whole pool in one pass.
+    """
+    now = now or datetime.now(timezone.utc)
+    date_str = now.date().isoformat()
+    window = list(candidates)[:max(0, limit)]
+    if not window:
+        return []
+
+    user_profile = get_match_profile(user)
+    profiles = [get_match_profile(candidate) for candidate in window]
+    pool = _EncodedPool(profiles)
+
+    shared_interests = pool.intersection_sizes("interests", user_profile.interests)
+    shared_values = pool.intersection_sizes("values", user_profile.values)
+    shared_languages = pool.intersection_sizes("languages", user_profile.languages)
+
+    s_interests = np.round(40 * pool.jaccard("interests", user_profile.interests, shared_interests)).astype(np.int64)
+    s_values = np.round(20 * pool.jaccard("values", user_profile.values, shared_values)).astype(np.int64)
+    s_lang = np.where(shared_languages > 0, 10, 0)
+
+    user_habits = np.asarray(
+        [pool.tag_id(("habit", value)) if value else -1 for value in user_profile.habits],
+        dtype=np.int64,
+    )
+    if pool.habits.shape[1]:
+        habit_matches = ((pool.habits == user_habits) & (user_habits != -1)).sum(axis=1)
+    else:
+        habit_matches = np.zeros(pool.count, dtype=np.int64)
+    s_habits = np.minimum(20, habit_matches * 5)
+
+    s_prompts = np.where(pool.has_prompts & user_profile.has_prompts, 10, 0)
+    s_recency = _recency_points(pool, now)
+
+    scores = np.clip(s_interests + s_values + s_lang + s_habits + s_prompts + s_recency, 0, 100)
+
+    hash_ints = [
+        int(hashlib.sha1(f"{user_profile.user_id}:{profile.user_id}:{date_str}".encode("utf-8")).hexdigest(), 16)
+        for profile in profiles
+    ]
+    hash_high = np.asarray([value >> 128 for value in hash_ints], dtype=np.uint64)
+    hash_mid = np.asarray([(value >> 64) & _UINT64_MASK for value in hash_ints], dtype=np.uint64)
+    hash_low = np.asarray([value & _UINT64_MASK for value in hash_ints], dtype=np.uint64)
+
+    # np.lexsort sorts by the last key first; descending keys are negated and the
+    # SHA1 tie-breaker (sorted by -hash descending == hash ascending) is split into words.
+    order = np.lexsort((
+        hash_low,
+        hash_mid,
+        hash_high,
+        -pool.last_active_ts,
+        -shared_interests,
+        -scores,
+    ))
+
+    component_tags = (
+        (s_interests, "interests_overlap"),
+        (s_values, "values_overlap"),
+        (s_lang, "language_match"),
+        (s_habits, "habits_match"),
+        (s_prompts, "prompt_overlap"),
+        (s_recency, "recent_active"),
+    )
+    ranked: List[Dict[str, Any]] = []
+    for row in order.tolist():
+        profile = profiles[row]
+        ranked.append({
+            "candidate": window[row],
+            "score": int(scores[row]),
+            "reason_tags": [tag for points, tag in component_tags if points[row] > 0][:6],
+            "shared_interests": int(shared_interests[row]),
+            "last_active_at": profile.last_active_at,
+            "_last_active_ts": profile.last_active_ts,
+            "_hash_int": hash_ints[row],
+        })
+    return ranked
@@ -0,0 +1,262 @@
+from __future__ import annotations
+
+import bisect
+import os
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from itertools import islice
+from typing import Dict, Iterator, List, Optional
+
+from beanie import PydanticObjectId
+from pymongo.errors import DuplicateKeyError
+
+from app.models.chat_night import ChatNightQueueEntry
+
+SIDE_MEN = "men"
+SIDE_WOMEN = "women"
+QUEUE_SIDES = (SIDE_MEN, SIDE_WOMEN)
+
+QUEUE_BACKEND_MONGO = "mongo"
+QUEUE_BACKEND_MEMORY = "memory"
+
+
+@dataclass
+class QueuedUser:
+    user_id: str
+    side: str
+    enqueued_at: datetime
+    wait_since: datetime
+    entry_id: Optional[str] = field(default=None, compare=False)
+
+
+def queue_side_for_gender(gender: Optional[str]) -> str:
+    return SIDE_WOMEN if gender == "Woman" else SIDE_MEN
+
+
+def opposite_queue_side_for_gender(gender: Optional[str]) -> str:
+    return SIDE_MEN if gender == "Woman" else SIDE_WOMEN
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _ensure_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+class ChatNightQueueBackend(ABC):
+    """
+    Matchmaking pool shared by enter/leave/status and the matcher.
+    Implementations must make `claim` atomic: a queued user can be handed
+    to at most one caller, whichever worker that caller runs in.
+    """
+
+    @abstractmethod
+    async def enqueue(self, user_id: str, side: str, now: Optional[datetime] = None) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def is_queued(self, user_id: str) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def remove(self, user_id: str) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def list_queued(self, side: str, limit: int) -> List[QueuedUser]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def claim(self, side: str, user_id: str) -> Optional[QueuedUser]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def restore(self, entry: QueuedUser) -> None:
+        raise NotImplementedError
+
+
+class IndexedFifoQueue:
+    """
+    Insertion-ordered user_id -> QueuedUser index (a linked hash set).
+    Membership, append and removal are O(1); iteration is FIFO. `restore`
+    puts an entry back at its original position: O(1) when it belongs at the
+    tail, otherwise one rebuild (only on the rare rollback path).
+    """
+
+    def __init__(self) -> None:
+        self._entries: Dict[str, QueuedUser] = {}
+
+    def __contains__(self, user_id: object) -> bool:
+        return user_id in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[QueuedUser]:
+        return iter(self._entries.values())
+
+    def append(self, entry: QueuedUser) -> None:
+        self._entries[entry.user_id] = entry
+
+    def pop(self, user_id: str) -> Optional[QueuedUser]:
+        return self._entries.pop(user_id, None)
+
+    def head(self, limit: int) -> List[QueuedUser]:
+        return list(islice(self._entries.values(), max(0, limit)))
+
+    def restore(self, entry: QueuedUser) -> None:
+        if entry.user_id in self._entries:
+            return
+        key = _ensure_utc(entry.enqueued_at)
+        if not self._entries or _ensure_utc(next(reversed(self._entries.values())).enqueued_at) <= key:
+            self._entries[entry.user_id] = entry
+            return
+
+        ordered = list(self._entries.values())
+        keys = [_ensure_utc(item.enqueued_at) for item in ordered]
+        ordered.insert(bisect.bisect_right(keys, key), entry)
+        self._entries = {item.user_id: item for item in ordered}
+
+
+class InMemoryChatNightQueue(ChatNightQueueBackend):
+    """Process-local queue. Only correct with a single worker; used for tests and local dev."""
+
+    def __init__(self) -> None:
+        self._queues: Dict[str, IndexedFifoQueue] = {side: IndexedFifoQueue() for side in QUEUE_SIDES}
+        self._side_by_user: Dict[str, str] = {}
+
+    async def enqueue(self, user_id: str, side: str, now: Optional[datetime] = None) -> bool:
+        if user_id in self._side_by_user:
+            return False
+        ref = now or _utcnow()
+        self._queues[side].append(
+            QueuedUser(user_id=user_id, side=side, enqueued_at=ref, wait_since=ref)
+        )
+        self._side_by_user[user_id] = side
+        return True
+
+    async def is_queued(self, user_id: str) -> bool:
+        return user_id in self._side_by_user
+
+    async def remove(self, user_id: str) -> None:
+        side = self._side_by_user.pop(user_id, None)
+        if side is not None:
+            self._queues[side].pop(user_id)
+
+    async def list_queued(self, side: str, limit: int) -> List[QueuedUser]:
+        return self._queues[side].head(limit)
+
+    async def claim(self, side: str, user_id: str) -> Optional[QueuedUser]:
+        if self._side_by_user.get(user_id) != side:
+            return None
+        del self._side_by_user[user_id]
+        return self._queues[side].pop(user_id)
+
+    async def restore(self, entry: QueuedUser) -> None:
+        if entry.user_id in self._side_by_user:
+            return
+        self._queues[entry.side].restore(entry)
+        self._side_by_user[entry.user_id] = entry.side
+
+
+class MongoChatNightQueue(ChatNightQueueBackend):
+    """
+    Queue stored in `chat_night_queue`, shared by every worker/pod.
+    FIFO order is (enqueued_at, _id); claims use find_one_and_delete so two
+    workers can never hand out the same partner.
+    """
+
+    @staticmethod
+    def _to_queued_user(doc: ChatNightQueueEntry) -> QueuedUser:
+        return QueuedUser(
+            user_id=doc.user_id,
+            side=doc.side,
+            enqueued_at=_ensure_utc(doc.enqueued_at),
+            wait_since=_ensure_utc(doc.wait_since),
+            entry_id=str(doc.id) if doc.id is not None else None,
+        )
+
+    async def enqueue(self, user_id: str, side: str, now: Optional[datetime] = None) -> bool:
+        ref = now or _utcnow()
+        try:
+            await ChatNightQueueEntry(
+                user_id=user_id,
+                side=side,
+                enqueued_at=ref,
+                wait_since=ref,
+            ).insert()
+        except DuplicateKeyError:
+            return False
+        return True
+
+    async def is_queued(self, user_id: str) -> bool:
+        entry = await ChatNightQueueEntry.find_one(ChatNightQueueEntry.user_id == user_id)
+        return entry is not None
+
+    async def remove(self, user_id: str) -> None:
+        await ChatNightQueueEntry.find(ChatNightQueueEntry.user_id == user_id).delete()
+
+    async def list_queued(self, side: str, limit: int) -> List[QueuedUser]:
+        if limit <= 0:
+            return []
+        docs = await ChatNightQueueEntry.find(
+            ChatNightQueueEntry.side == side
+        ).sort([("enqueued_at", 1), ("_id", 1)]).limit(limit).to_list()
+        return [self._to_queued_user(doc) for doc in docs]
+
+    async def claim(self, side: str, user_id: str) -> Optional[QueuedUser]:
+        raw = await ChatNightQueueEntry.get_motor_collection().find_one_and_delete(
+            {"user_id": user_id, "side": side}
+        )
+        if raw is None:
+            return None
+        return self._to_queued_user(ChatNightQueueEntry.model_validate(raw))
+
+    async def restore(self, entry: QueuedUser) -> None:
+        doc = ChatNightQueueEntry(
+            user_id=entry.user_id,
+            side=entry.side,
+            enqueued_at=entry.enqueued_at,
+            wait_since=entry.wait_since,
+        )
+        if entry.entry_id:
+            try:
+                doc.id = PydanticObjectId(entry.entry_id)
+            except Exception:
+                pass
+        try:
+            await doc.insert()
+        except DuplicateKeyError:
+            # User re-entered (or was restored) meanwhile; keep the newer entry.
+            pass
+
+
+_queue_backend: Optional[ChatNightQueueBackend] = None
+
+
+def queue_backend_name() -> str:
+    value = os.getenv("CHAT_NIGHT_QUEUE_BACKEND", QUEUE_BACKEND_MONGO).strip().lower()
+    if value not in {QUEUE_BACKEND_MONGO, QUEUE_BACKEND_MEMORY}:
+        return QUEUE_BACKEND_MONGO
+    return value
+
+
+def get_chat_night_queue() -> ChatNightQueueBackend:
+    global _queue_backend
+    if _queue_backend is None:
+        if queue_backend_name() == QUEUE_BACKEND_MEMORY:
+            _queue_backend = InMemoryChatNightQueue()
+        else:
+            _queue_backend = MongoChatNightQueue()
+    return _queue_backend
+
+
+def set_chat_night_queue(backend: Optional[ChatNightQueueBackend]) -> None:
+    """Swap the active backend (tests); passing None re-reads CHAT_NIGHT_QUEUE_BACKEND on next use."""
+    global _queue_backend
+    _queue_backend = backend
@@ -1,17 +1,136 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
 from app.models.events import AppEvent
-from typing import Dict, Any
+from app.services.metric_rollups import apply_rollups
+
+logger = logging.getLogger(__name__)
+
+
+class EventBuffer:
+    """
+    Write-behind buffer for AppEvent. `add` never waits on Mongo: events are
+    queued in memory and a background task writes them with insert_many every
+    `flush_interval_seconds` or as soon as `batch_size` are waiting. When
+    `max_pending` events are already queued new ones are dropped and counted
+    (analytics must never back-pressure a request). Each written batch also
+    updates the metric rollups in one bulk write. `stop` drains the queue,
+    so a clean shutdown loses nothing; a crash loses at most what is queued.
+    """
+
+    def __init__(self, batch_size: int, flush_interval_seconds: float, max_pending: int) -> None:
+        self.batch_size = max(1, batch_size)
+        self.flush_interval_seconds = max(0.01, flush_interval_seconds)
+        self.max_pending = max(1, max_pending)
+        self._pending: List[AppEvent] = []
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self.stats: Dict[str, int] = {
+            "enqueued": 0,
+            "written": 0,
+            "dropped": 0,
+            "failed": 0,
+            "batches": 0,
+            "rollup_failed": 0,
+        }
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run(), name="event-logger-flush")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._stopping = True
+        self._wakeup.set()
+        try:
+            await self._task
+        finally:
+            self._task = None
+
+    def add(self, event: AppEvent) -> bool:
+        if len(self._pending) >= self.max_pending:
+            self.stats["dropped"] += 1
+            return False
+        self._pending.append(event)
+        self.stats["enqueued"] += 1
+        if len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+        return True
+
+    async def flush(self) -> None:
+        while self._pending:
+            batch = self._pending[:self.batch_size]
+            del self._pending[:self.batch_size]
+            self.stats["batches"] += 1
+            try:
+                await AppEvent.insert_many(batch)
+                self.stats["written"] += len(batch)
+            except Exception:
+                self.stats["failed"] += len(batch)
+                logger.exception("Failed to write %s buffered events", len(batch))
+                continue
+            try:
+                await apply_rollups(batch)
+            except Exception:
+                self.stats["rollup_failed"] += len(batch)
+                logger.exception("Failed to roll up %s events", len(batch))
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+            if self._stopping:
+                return
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "pending": len(self._pending),
+            "running": self.running,
+            "mode": settings.BH_EVENT_LOG_MODE,
+            "batch_size": self.batch_size,
+            "flush_interval_seconds": self.flush_interval_seconds,
+            "max_pending": self.max_pending,
+        }
+
+
+event_buffer = EventBuffer(
+    batch_size=settings.BH_EVENT_LOG_BATCH_SIZE,
+    flush_interval_seconds=settings.BH_EVENT_LOG_FLUSH_INTERVAL_MS / 1000,
+    max_pending=settings.BH_EVENT_LOG_MAX_PENDING,
+)
+
 
 async def log_event(
-    event_name: str, 
-    source: str, 
-    user_id: str = None, 
-    payload: Dict[str, Any] = None, 
+    event_name: str,
+    source: str,
+    user_id: str = None,
+    payload: Dict[str, Any] = None,
     ip_address: str = None,
     user_agent: str = None
 ):
     """
-    Log safe/audit events. 
+    Log safe/audit events.
     Filters out highly sensitive keys just in case.
+    Buffered (written in the background) while the app's event buffer runs;
+    otherwise (scripts, tests, BH_EVENT_LOG_MODE=sync) inserted inline.
     """
     safe_payload = {}
     if payload:
@@ -22,7 +141,7 @@ async def log_event(
                 safe_payload[k] = v
             else:
                 safe_payload[k] = "[REDACTED]"
-                
+
     event = AppEvent(
         event_name=event_name,
         source=source,
@@ -31,7 +150,11 @@ async def log_event(
         ip_address=ip_address,
         user_agent=user_agent
     )
+    if event_buffer.running:
+        event_buffer.add(event)
+        return
     try:
         await event.insert()
+        await apply_rollups([event])
     except Exception as e:
         print(f"Error logging event {event_name}: {e}")
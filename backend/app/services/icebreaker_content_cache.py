@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import logging
+import time
+from collections import OrderedDict, defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import ReturnDocument
+
+from app.core.env import parse_int_env
+from app.models.chat_night import ChatNightIcebreakersContentCache
+
+logger = logging.getLogger(__name__)
+
+
+class IcebreakerContentCache:
+    """
+    Content-addressed icebreakers: (content_hash, prompt_version) -> the LLM
+    payload generated for that context, shared by every room whose pair
+    sanitizes to the same context.
+
+    Mongo holds the entries with a sliding TTL (each hit pushes expires_at
+    back `ttl_seconds`, so entries unused for that long are reaped). A bounded
+    per-process LRU sits in front so a repeat hit on this worker skips the
+    round-trip; it never keeps an entry past the expiry Mongo last reported.
+    Lookups are counted per prompt version for hit-rate reporting.
+    """
+
+    def __init__(self, ttl_seconds: float, max_local_entries: int) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_local_entries = max_local_entries
+        self._local: "OrderedDict[Tuple[str, str], Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self.stats: Dict[str, Dict[str, int]] = defaultdict(
+            lambda: {"hits": 0, "local_hits": 0, "misses": 0, "stores": 0}
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0
+
+    def _remember(self, key: Tuple[str, str], entry: Dict[str, Any], expires_at: datetime) -> None:
+        if self.max_local_entries <= 0:
+            return
+        if expires_at.tzinfo is None:
+            expires_at = expires_at.replace(tzinfo=timezone.utc)
+        remaining = (expires_at - datetime.now(timezone.utc)).total_seconds()
+        self._local[key] = (time.monotonic() + remaining, entry)
+        self._local.move_to_end(key)
+        while len(self._local) > self.max_local_entries:
+            self._local.popitem(last=False)
+
+    async def get(self, content_hash: str, prompt_version: str) -> Optional[Dict[str, Any]]:
+        """{"reasons", "icebreakers", "model"} for the key, or None on a miss."""
+        if not self.enabled:
+            return None
+        key = (content_hash, prompt_version)
+        stats = self.stats[prompt_version]
+
+        local = self._local.get(key)
+        if local is not None:
+            expires_monotonic, entry = local
+            if time.monotonic() < expires_monotonic:
+                self._local.move_to_end(key)
+                stats["hits"] += 1
+                stats["local_hits"] += 1
+                return entry
+            del self._local[key]
+
+        now = datetime.now(timezone.utc)
+        doc = await ChatNightIcebreakersContentCache.get_motor_collection().find_one_and_update(
+            {"content_hash": content_hash, "prompt_version": prompt_version, "expires_at": {"$gt": now}},
+            {
+                "$inc": {"hit_count": 1},
+                "$set": {"last_hit_at": now, "expires_at": now + timedelta(seconds=self.ttl_seconds)},
+            },
+            return_document=ReturnDocument.AFTER,
+        )
+        if doc is None:
+            stats["misses"] += 1
+            return None
+        stats["hits"] += 1
+        entry = {"reasons": doc["reasons"], "icebreakers": doc["icebreakers"], "model": doc.get("model")}
+        self._remember(key, entry, doc["expires_at"])
+        return entry
+
+    async def put(
+        self,
+        content_hash: str,
+        prompt_version: str,
+        *,
+        reasons: List[str],
+        icebreakers: List[str],
+        model: str,
+    ) -> None:
+        if not self.enabled:
+            return
+        now = datetime.now(timezone.utc)
+        expires_at = now + timedelta(seconds=self.ttl_seconds)
+        await ChatNightIcebreakersContentCache.get_motor_collection().update_one(
+            {"content_hash": content_hash, "prompt_version": prompt_version},
+            {
+                "$set": {
+                    "reasons": reasons,
+                    "icebreakers": icebreakers,
+                    "model": model,
+                    "expires_at": expires_at,
+                },
+                "$setOnInsert": {"created_at": now, "hit_count": 0},
+            },
+            upsert=True,
+        )
+        self.stats[prompt_version]["stores"] += 1
+        self._remember(
+            (content_hash, prompt_version),
+            {"reasons": reasons, "icebreakers": icebreakers, "model": model},
+            expires_at,
+        )
+
+    def snapshot(self) -> Dict[str, Any]:
+        versions = {}
+        for prompt_version, counts in self.stats.items():
+            lookups = counts["hits"] + counts["misses"]
+            versions[prompt_version] = {
+                **counts,
+                "hit_rate": round(counts["hits"] / lookups, 4) if lookups else None,
+            }
+        return {
+            "enabled": self.enabled,
+            "ttl_seconds": self.ttl_seconds,
+            "local_entries": len(self._local),
+            "max_local_entries": self.max_local_entries,
+            "prompt_versions": versions,
+        }
+
+
+async def stored_entry_stats() -> Dict[str, Dict[str, int]]:
+    """Live entries and their lifetime hits per prompt version, across all workers."""
+    rows = await ChatNightIcebreakersContentCache.aggregate([
+        {"$group": {"_id": "$prompt_version", "entries": {"$sum": 1}, "hits": {"$sum": "$hit_count"}}},
+    ]).to_list()
+    return {row["_id"]: {"entries": row["entries"], "hits": row["hits"]} for row in rows}
+
+
+_icebreaker_content_cache: Optional[IcebreakerContentCache] = None
+
+
+def get_icebreaker_content_cache() -> IcebreakerContentCache:
+    global _icebreaker_content_cache
+    if _icebreaker_content_cache is None:
+        _icebreaker_content_cache = IcebreakerContentCache(
+            ttl_seconds=parse_int_env("CHAT_NIGHT_ICEBREAKERS_CONTENT_CACHE_TTL_DAYS", 30, 0, 365) * 86400,
+            max_local_entries=parse_int_env("CHAT_NIGHT_ICEBREAKERS_CONTENT_CACHE_LOCAL_ENTRIES", 1000, 0, 100000),
+        )
+    return _icebreaker_content_cache
+
+
+def set_icebreaker_content_cache(cache: Optional[IcebreakerContentCache]) -> None:
+    """Swap the active cache (tests or a different TTL/size)."""
+    global _icebreaker_content_cache
+    _icebreaker_content_cache = cache
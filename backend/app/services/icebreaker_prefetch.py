@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.env import parse_int_env
+from app.models.chat_night import ChatNightRoom
+from app.services.ai_icebreakers import (
+    MODEL_FALLBACK,
+    build_sanitized_match_context,
+    generate_icebreakers_single_flight,
+)
+
+logger = logging.getLogger(__name__)
+
+# (reasons, icebreakers, model, cached), as returned by generate_icebreakers
+IcebreakersResult = Tuple[List[str], List[str], str, bool]
+
+
+def prefetch_enabled() -> bool:
+    return os.getenv("CHAT_NIGHT_ICEBREAKERS_PREFETCH_ENABLED", "true").strip().lower() == "true"
+
+
+def prefetch_wait_seconds() -> int:
+    return parse_int_env("CHAT_NIGHT_ICEBREAKERS_PREFETCH_WAIT_SECONDS", default=20, min_value=0, max_value=60)
+
+
+class IcebreakerPrefetcher:
+    """
+    Generates a room's icebreakers in the background as soon as the room is
+    created, so the first /icebreakers call reads the ChatNightIcebreakers
+    cache instead of paying for the LLM round-trip inside the 5-minute room.
+
+    Rooms go onto a bounded queue drained by `workers` tasks; a full queue
+    drops the room (the endpoint then generates inline, as before). Each
+    queued room has a future that `wait` can await, so a request that lands
+    while its room is still being generated joins that job instead of
+    starting a second one. Process-local: other workers only see the result
+    once it is persisted.
+
+    Prefetch never caches a fallback caused by the OpenAI budget or throttle
+    refusing the call (many rooms created in one batch tick would otherwise
+    all be pinned to deterministic output); such rooms count as `deferred`
+    and are generated again when someone opens them.
+    """
+
+    def __init__(self, workers: int, max_pending: int) -> None:
+        self.workers = max(1, workers)
+        self.max_pending = max(1, max_pending)
+        self._queue: Optional[asyncio.Queue] = None
+        self._jobs: Dict[str, asyncio.Future] = {}
+        self._tasks: List[asyncio.Task] = []
+        self.stats: Dict[str, int] = {
+            "enqueued": 0,
+            "deduplicated": 0,
+            "dropped": 0,
+            "completed": 0,
+            "failed": 0,
+            "deferred": 0,
+            "waited": 0,
+            "wait_timeouts": 0,
+        }
+
+    @property
+    def running(self) -> bool:
+        return any(not task.done() for task in self._tasks)
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_pending)
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"icebreaker-prefetch-{index}")
+            for index in range(self.workers)
+        ]
+
+    async def stop(self) -> None:
+        """Cancel the workers; queued and in-flight rooms fall back to inline generation."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+        for future in self._jobs.values():
+            if not future.done():
+                future.set_result(None)
+        self._jobs.clear()
+
+    def enqueue(self, room: ChatNightRoom, requester_user_id: Optional[str] = None) -> bool:
+        """Schedule generation for a new room. Never blocks; False if not scheduled."""
+        if not self.running or self._queue is None:
+            return False
+        if room.room_id in self._jobs:
+            self.stats["deduplicated"] += 1
+            return True
+        try:
+            self._queue.put_nowait((room, requester_user_id))
+        except asyncio.QueueFull:
+            self.stats["dropped"] += 1
+            return False
+        self._jobs[room.room_id] = asyncio.get_running_loop().create_future()
+        self.stats["enqueued"] += 1
+        return True
+
+    def in_flight(self, room_id: str) -> bool:
+        return room_id in self._jobs
+
+    async def wait(self, room_id: str, timeout: float) -> Optional[IcebreakersResult]:
+        """
+        Result of the queued/in-flight job for `room_id`; None when there is
+        no job, it failed, or it took longer than `timeout` seconds (the job
+        keeps running and still fills the cache).
+        """
+        future = self._jobs.get(room_id)
+        if future is None:
+            return None
+        self.stats["waited"] += 1
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout=timeout)
+        except asyncio.TimeoutError:
+            self.stats["wait_timeouts"] += 1
+            return None
+
+    async def _generate(self, room: ChatNightRoom, requester_user_id: Optional[str]) -> IcebreakersResult:
+        context = await build_sanitized_match_context(room)
+        return await generate_icebreakers_single_flight(
+            context,
+            requester_user_id=requester_user_id,
+            participant_user_ids=[room.male_user_id, room.female_user_id],
+            defer_when_denied=True,
+        )
+
+    async def _worker(self) -> None:
+        queue = self._queue
+        while True:
+            room, requester_user_id = await queue.get()
+            future = self._jobs.get(room.room_id)
+            result = None
+            try:
+                result = await self._generate(room, requester_user_id)
+                self.stats["completed"] += 1
+                if result[2] == MODEL_FALLBACK and not result[3]:
+                    # Not (or not usefully) generated: let a waiting request try itself.
+                    self.stats["deferred"] += 1
+                    result = None
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self.stats["failed"] += 1
+                logger.exception("Icebreaker prefetch failed for room %s", room.room_id)
+            finally:
+                if future is not None and not future.done():
+                    future.set_result(result)
+                self._jobs.pop(room.room_id, None)
+                queue.task_done()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "pending": self._queue.qsize() if self._queue is not None else 0,
+            "in_flight": len(self._jobs),
+            "running": self.running,
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+        }
+
+
+_icebreaker_prefetcher: Optional[IcebreakerPrefetcher] = None
+
+
+def get_icebreaker_prefetcher() -> IcebreakerPrefetcher:
+    global _icebreaker_prefetcher
+    if _icebreaker_prefetcher is None:
+        _icebreaker_prefetcher = IcebreakerPrefetcher(
+            workers=parse_int_env("CHAT_NIGHT_ICEBREAKERS_PREFETCH_WORKERS", default=4, min_value=1, max_value=64),
+            max_pending=parse_int_env(
+                "CHAT_NIGHT_ICEBREAKERS_PREFETCH_MAX_PENDING", default=1000, min_value=1, max_value=100000
+            ),
+        )
+    return _icebreaker_prefetcher
+
+
+def set_icebreaker_prefetcher(prefetcher: Optional[IcebreakerPrefetcher]) -> None:
+    """Swap the active prefetcher (tests or a differently sized pool)."""
+    global _icebreaker_prefetcher
+    _icebreaker_prefetcher = prefetcher
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import hashlib
+import math
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from pymongo import UpdateOne
+
+from app.models.events import AppEvent, MetricRollup
+
+# HyperLogLog with 2^14 registers: ~0.8% standard error. Registers are stored
+# sparsely, so a bucket document holds at most 16384 small ints however many
+# users are active (and far fewer at low traffic).
+SKETCH_PRECISION = 14
+SKETCH_REGISTERS = 1 << SKETCH_PRECISION
+
+GRANULARITIES = ("hour", "day")
+
+
+def bucket_start(ts: datetime, granularity: str) -> datetime:
+    if granularity == "hour":
+        return ts.replace(minute=0, second=0, microsecond=0)
+    return ts.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def counter_names(event: AppEvent) -> List[str]:
+    """Rollup counters an event contributes to (field names, so no dots)."""
+    names = ["events"]
+    name = event.event_name
+    payload = event.payload or {}
+    if name == "chat_night.enter":
+        names.append("chat_night_enters")
+    elif name == "chat_night.match":
+        names.append("rooms_matched")
+    elif name == "chat_night.unlocked":
+        names.append("matches_unlocked")
+    elif name == "chat.message.sent":
+        names.append("messages_sent")
+    elif name == "auth.register.success" or (name == "auth.otp.verify.success" and payload.get("is_new_user")):
+        names.append("new_users")
+    return names
+
+
+def sketch_register(user_id: str) -> Tuple[str, int]:
+    """(register index, rank) of a user_id in the HyperLogLog sketch."""
+    hashed = int.from_bytes(hashlib.sha1(user_id.encode()).digest()[:8], "big")
+    index = hashed >> (64 - SKETCH_PRECISION)
+    remaining_bits = 64 - SKETCH_PRECISION
+    rest = hashed & ((1 << remaining_bits) - 1)
+    rank = remaining_bits - rest.bit_length() + 1
+    return str(index), rank
+
+
+def merge_sketches(sketches: Iterable[Dict[str, int]]) -> Dict[str, int]:
+    merged: Dict[str, int] = {}
+    for sketch in sketches:
+        for index, rank in sketch.items():
+            if rank > merged.get(index, 0):
+                merged[index] = rank
+    return merged
+
+
+def estimate_distinct(sketch: Dict[str, int]) -> int:
+    if not sketch:
+        return 0
+    m = SKETCH_REGISTERS
+    alpha = 0.7213 / (1 + 1.079 / m)
+    harmonic = sum(2.0 ** -sketch.get(str(index), 0) for index in range(m))
+    estimate = alpha * m * m / harmonic
+    empty = m - len(sketch)
+    if estimate <= 2.5 * m and empty:
+        # Small-range correction (linear counting) keeps low counts near exact.
+        estimate = m * math.log(m / empty)
+    return int(round(estimate))
+
+
+def build_rollup_updates(events: Iterable[AppEvent], granularities: Iterable[str] = GRANULARITIES) -> List[UpdateOne]:
+    """One upsert per touched bucket: $inc for counters, $max for sketch registers."""
+    increments: Dict[Tuple[str, datetime], Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+    registers: Dict[Tuple[str, datetime], Dict[str, int]] = defaultdict(dict)
+    for event in events:
+        register = sketch_register(event.user_id) if event.user_id else None
+        for granularity in granularities:
+            key = (granularity, bucket_start(event.created_at, granularity))
+            for name in counter_names(event):
+                increments[key][name] += 1
+            if register is not None:
+                index, rank = register
+                if rank > registers[key].get(index, 0):
+                    registers[key][index] = rank
+
+    now = datetime.utcnow()
+    updates = []
+    for key, counters in increments.items():
+        update = {
+            "$inc": {f"counters.{name}": count for name, count in counters.items()},
+            "$set": {"updated_at": now},
+        }
+        if registers[key]:
+            update["$max"] = {f"active_users_sketch.{index}": rank for index, rank in registers[key].items()}
+        updates.append(UpdateOne({"granularity": key[0], "bucket_start": key[1]}, update, upsert=True))
+    return updates
+
+
+async def apply_rollups(events: List[AppEvent], granularities: Iterable[str] = GRANULARITIES) -> None:
+    updates = build_rollup_updates(events, granularities)
+    if updates:
+        await MetricRollup.get_motor_collection().bulk_write(updates, ordered=False)
+
+
+async def load_rollups(granularity: str, since: datetime, until: Optional[datetime] = None) -> List[MetricRollup]:
+    query = {"granularity": granularity, "bucket_start": {"$gte": bucket_start(since, granularity)}}
+    if until is not None:
+        query["bucket_start"]["$lt"] = until
+    return await MetricRollup.find(query).to_list()
+
+
+async def rolling_window_metrics(now: datetime, hours: int = 24) -> Dict[str, int]:
+    """
+    Counter totals and distinct active users over the last `hours` hourly
+    buckets (the oldest one is whole, so the window is up to an hour wider).
+    """
+    rollups = await load_rollups("hour", now - timedelta(hours=hours))
+    totals: Dict[str, int] = defaultdict(int)
+    for rollup in rollups:
+        for name, count in rollup.counters.items():
+            totals[name] += count
+    totals["active_users"] = estimate_distinct(merge_sketches(r.active_users_sketch for r in rollups))
+    return dict(totals)
+
+
+async def day_metrics(day: datetime) -> Dict[str, int]:
+    rollup = await MetricRollup.find_one(
+        MetricRollup.granularity == "day",
+        MetricRollup.bucket_start == bucket_start(day, "day"),
+    )
+    if rollup is None:
+        return {"active_users": 0}
+    return {**rollup.counters, "active_users": estimate_distinct(rollup.active_users_sketch)}
@@ -3,9 +3,10 @@ import os
 import re
 from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import Any, Optional
+from typing import Any, Optional, Sequence
 
 from beanie import PydanticObjectId
+from beanie.operators import In
 from fastapi import HTTPException
 from pymongo import ReturnDocument
 from pymongo.errors import DuplicateKeyError
@@ -222,18 +223,15 @@ async def _load_chat_night_user(user_id: str) -> Optional[User]:
         return None
 
 
-async def get_chat_night_entry_entitlement(
-    user: User,
+def _build_chat_night_entry_entitlement(
+    user_id: str,
     date_ist: str,
+    passes_total: int,
+    passes_used: int,
+    paid_pass_credits: int,
 ) -> ChatNightEntryEntitlement:
-    daily_pass = await get_or_create_chat_night_pass(user, date_ist)
-    free_passes_remaining = max(int(daily_pass.passes_total) - int(daily_pass.passes_used), 0)
-
-    paid_pass_credits = 0
-    if settings.BH_PASSES_ENABLED:
-        wallet = await UserPassWallet.find_one(UserPassWallet.user_id == str(user.id))
-        if wallet is not None:
-            paid_pass_credits = max(int(wallet.paid_pass_credits), 0)
+    free_passes_remaining = max(int(passes_total) - int(passes_used), 0)
+    paid_pass_credits = max(int(paid_pass_credits), 0)
 
     next_spend_source = CHAT_NIGHT_ENTRY_SOURCE_NONE
     if free_passes_remaining > 0:
@@ -242,10 +240,10 @@ async def get_chat_night_entry_entitlement(
         next_spend_source = CHAT_NIGHT_ENTRY_SOURCE_PAID_CREDIT
 
     return ChatNightEntryEntitlement(
-        user_id=str(user.id),
+        user_id=user_id,
         date_ist=date_ist,
-        free_passes_total=int(daily_pass.passes_total),
-        free_passes_used=int(daily_pass.passes_used),
+        free_passes_total=int(passes_total),
+        free_passes_used=int(passes_used),
         free_passes_remaining=free_passes_remaining,
         paid_pass_credits=paid_pass_credits,
         effective_passes_remaining=free_passes_remaining + paid_pass_credits,
@@ -253,6 +251,66 @@ async def get_chat_night_entry_entitlement(
     )
 
 
+async def get_chat_night_entry_entitlement(
+    user: User,
+    date_ist: str,
+) -> ChatNightEntryEntitlement:
+    daily_pass = await get_or_create_chat_night_pass(user, date_ist)
+
+    paid_pass_credits = 0
+    if settings.BH_PASSES_ENABLED:
+        wallet = await UserPassWallet.find_one(UserPassWallet.user_id == str(user.id))
+        if wallet is not None:
+            paid_pass_credits = wallet.paid_pass_credits
+
+    return _build_chat_night_entry_entitlement(
+        user_id=str(user.id),
+        date_ist=date_ist,
+        passes_total=daily_pass.passes_total,
+        passes_used=daily_pass.passes_used,
+        paid_pass_credits=paid_pass_credits,
+    )
+
+
+async def get_chat_night_entry_entitlements(
+    users: Sequence[Any],
+    date_ist: str,
+) -> dict[str, ChatNightEntryEntitlement]:
+    """
+    Read-only bulk variant of get_chat_night_entry_entitlement for matchmaking scans:
+    one ChatNightPass query for date_ist plus one UserPassWallet query, keyed by user id.
+    Missing or stale daily passes are evaluated with the configured default total; they
+    are persisted later by consume_chat_night_entry_entitlement, exactly as the single
+    lookup would have done.
+    """
+    users_by_id = {str(user.id): user for user in users if user is not None and user.id is not None}
+    if not users_by_id:
+        return {}
+
+    user_ids = list(users_by_id.keys())
+    daily_passes = await ChatNightPass.find(
+        In(ChatNightPass.user_id, user_ids),
+        ChatNightPass.date_ist == date_ist,
+    ).to_list()
+    passes_used_by_user = {daily_pass.user_id: int(daily_pass.passes_used) for daily_pass in daily_passes}
+
+    paid_credits_by_user: dict[str, int] = {}
+    if settings.BH_PASSES_ENABLED:
+        wallets = await UserPassWallet.find(In(UserPassWallet.user_id, user_ids)).to_list()
+        paid_credits_by_user = {wallet.user_id: int(wallet.paid_pass_credits) for wallet in wallets}
+
+    return {
+        user_id: _build_chat_night_entry_entitlement(
+            user_id=user_id,
+            date_ist=date_ist,
+            passes_total=_get_chat_night_default_pass_total(user),
+            passes_used=passes_used_by_user.get(user_id, 0),
+            paid_pass_credits=paid_credits_by_user.get(user_id, 0),
+        )
+        for user_id, user in users_by_id.items()
+    }
+
+
 async def get_chat_night_entry_entitlement_by_user_id(
     user_id: str,
     date_ist: str,
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicTask:
+    """
+    Runs `tick` every `interval_seconds` in a background task until stopped
+    (started/stopped from the app lifespan). A failing tick is logged and the
+    loop carries on with the next one.
+    """
+
+    def __init__(self, name: str, tick: Callable[[], Awaitable[object]], interval_seconds: float) -> None:
+        self.name = name
+        self._tick = tick
+        self._interval_seconds = max(0.1, interval_seconds)
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = asyncio.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stopping.clear()
+        self._task = asyncio.create_task(self._run(), name=self.name)
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._stopping.set()
+        try:
+            await self._task
+        finally:
+            self._task = None
+
+    async def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                await self._tick()
+            except Exception:
+                logger.exception("Periodic task %s failed", self.name)
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=self._interval_seconds)
+            except asyncio.TimeoutError:
+                pass
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Dict, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Log any single query in a fan-out slower than this.
+SLOW_QUERY_MS = 250.0
+
+
+async def gather_queries(
+    queries: Dict[str, Awaitable[Any]],
+    max_concurrency: Optional[int] = None,
+) -> Tuple[Dict[str, Any], Dict[str, float]]:
+    """
+    Run independent queries (un-awaited coroutines, keyed by name) concurrently,
+    at most `max_concurrency` (default BH_QUERY_FANOUT_CONCURRENCY) in flight
+    so one endpoint cannot hog the Motor pool. Returns (results, timings_ms) by
+    name. If a query fails the others are cancelled and the error propagates.
+    """
+    limit = max(1, max_concurrency or settings.BH_QUERY_FANOUT_CONCURRENCY)
+    gate = asyncio.Semaphore(limit)
+    timings: Dict[str, float] = {}
+
+    async def _timed(name: str, query: Awaitable[Any]) -> Any:
+        async with gate:
+            started = time.perf_counter()
+            try:
+                return await query
+            finally:
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                timings[name] = round(elapsed_ms, 2)
+                if elapsed_ms > SLOW_QUERY_MS:
+                    logger.warning("Slow query %s: %.1fms", name, elapsed_ms)
+
+    tasks = {name: asyncio.ensure_future(_timed(name, query)) for name, query in queries.items()}
+    try:
+        await asyncio.gather(*tasks.values())
+    except BaseException:
+        for task in tasks.values():
+            task.cancel()
+        await asyncio.gather(*tasks.values(), return_exceptions=True)
+        raise
+    return {name: task.result() for name, task in tasks.items()}, timings
+
+
+def server_timing_header(timings: Dict[str, float]) -> str:
+    """Server-Timing header value (shown per query in browser devtools)."""
+    return ", ".join(f"{name};dur={ms}" for name, ms in timings.items())
@@ -0,0 +1,110 @@
+"""
+Backfill / repair ChatThread.unread_counts and ChatThread.last_read_at.
+
+Recomputes both from chat_messages and rewrites only threads whose stored
+values differ:
+- unread = messages from the other participant after the reader's watermark
+  (last_read_message_id) that have no legacy read_at;
+- last_read_at = kept when a watermark exists, otherwise the newest legacy
+  read_at on messages they received.
+Safe to re-run; use --dry-run to just report drift.
+
+Usage (from backend/):
+    python scripts/backfill_chat_unread_counters.py [--dry-run] [--batch-size 500]
+"""
+import argparse
+import asyncio
+import os
+import sys
+
+# Add parent dir to path to import app modules
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from beanie import init_beanie
+from pymongo import UpdateOne
+
+from app.core.config import settings
+from app.main import DOCUMENT_MODELS
+from app.models.chat import ChatMessage, ChatThread
+from app.routers.chat import message_seek_query
+
+
+async def recompute(threads: list) -> dict:
+    """thread_id -> (unread_counts, last_read_at) rebuilt from the messages of `threads`."""
+    rows = await ChatMessage.aggregate([
+        {"$match": {"thread_id": {"$in": [t.id for t in threads]}}},
+        {"$group": {
+            "_id": {"thread_id": "$thread_id", "sender_id": "$sender_id"},
+            "unread": {"$sum": {"$cond": [{"$eq": [{"$ifNull": ["$read_at", None]}, None]}, 1, 0]}},
+            "last_read_at": {"$max": "$read_at"},
+        }},
+    ]).to_list()
+    by_sender = {(row["_id"]["thread_id"], row["_id"]["sender_id"]): row for row in rows}
+    watermark_ids = [message_id for t in threads for message_id in t.last_read_message_id.values()]
+    watermark_msgs = {m.id: m for m in await ChatMessage.find({"_id": {"$in": watermark_ids}}).to_list()} if watermark_ids else {}
+
+    result = {}
+    for t in threads:
+        unread_counts = {}
+        last_read_at = {}
+        for recipient in t.participants:
+            unread = 0
+            latest = None
+            for sender in t.participants:
+                row = by_sender.get((t.id, sender))
+                if sender == recipient or row is None:
+                    continue
+                unread += row["unread"]
+                if row["last_read_at"] is not None and (latest is None or row["last_read_at"] > latest):
+                    latest = row["last_read_at"]
+            watermark = watermark_msgs.get(t.last_read_message_id.get(str(recipient)))
+            if watermark is not None:
+                query = message_seek_query(t.id, watermark.created_at, watermark.id, older=False)
+                unread = await ChatMessage.find({**query, "sender_id": {"$ne": recipient}, "read_at": None}).count()
+                latest = t.last_read_at.get(str(recipient), latest)
+            unread_counts[str(recipient)] = unread
+            if latest is not None:
+                last_read_at[str(recipient)] = latest
+        result[t.id] = (unread_counts, last_read_at)
+    return result
+
+
+async def main(dry_run: bool, batch_size: int) -> None:
+    client = AsyncIOMotorClient(settings.MONGODB_URL)
+    await init_beanie(database=client[settings.DB_NAME], document_models=DOCUMENT_MODELS)
+
+    scanned = drifted = 0
+    last_id = None
+    while True:
+        query = ChatThread.find(ChatThread.id > last_id) if last_id else ChatThread.find_all()
+        threads = await query.sort(+ChatThread.id).limit(batch_size).to_list()
+        if not threads:
+            break
+        last_id = threads[-1].id
+        scanned += len(threads)
+
+        updates = []
+        recomputed = await recompute(threads)
+        for t in threads:
+            unread_counts, last_read_at = recomputed[t.id]
+            if t.unread_counts == unread_counts and t.last_read_at == last_read_at:
+                continue
+            drifted += 1
+            updates.append(UpdateOne(
+                {"_id": t.id},
+                {"$set": {"unread_counts": unread_counts, "last_read_at": last_read_at}},
+            ))
+        if updates and not dry_run:
+            await ChatThread.get_motor_collection().bulk_write(updates, ordered=False)
+
+    action = "would update" if dry_run else "updated"
+    print(f"Scanned {scanned} threads, {action} {drifted}.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true", help="report drift without writing")
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+    asyncio.run(main(args.dry_run, args.batch_size))
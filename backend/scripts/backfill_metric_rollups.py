@@ -0,0 +1,91 @@
+"""
+Rebuild metric rollups (admin overview counters and DAU sketches) from app_events.
+
+Hourly buckets from the start of the day --days ago up to the start of the
+current hour are deleted and replayed from app_events; daily buckets for
+that range (today included) are then recomputed from their hours. The
+current hour is left to the live event logger, so right after first
+enabling rollups it only covers events since the deploy.
+
+Usage (from backend/):
+    python scripts/backfill_metric_rollups.py [--days 7] [--batch-size 5000]
+"""
+import argparse
+import asyncio
+import os
+import sys
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+# Add parent dir to path to import app modules
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from beanie import init_beanie
+
+from app.core.config import settings
+from app.main import DOCUMENT_MODELS
+from app.models.events import AppEvent, MetricRollup
+from app.services.metric_rollups import apply_rollups, bucket_start, load_rollups, merge_sketches
+
+
+async def rebuild_hours(since: datetime, until: datetime, batch_size: int) -> int:
+    await MetricRollup.find(
+        {"granularity": "hour", "bucket_start": {"$gte": since, "$lt": until}}
+    ).delete()
+    replayed = 0
+    batch = []
+    async for event in AppEvent.find(AppEvent.created_at >= since, AppEvent.created_at < until):
+        batch.append(event)
+        if len(batch) >= batch_size:
+            await apply_rollups(batch, granularities=("hour",))
+            replayed += len(batch)
+            batch = []
+    if batch:
+        await apply_rollups(batch, granularities=("hour",))
+        replayed += len(batch)
+    return replayed
+
+
+async def rebuild_day(day: datetime) -> None:
+    hours = await load_rollups("hour", day, day + timedelta(days=1))
+    counters = defaultdict(int)
+    for rollup in hours:
+        for name, count in rollup.counters.items():
+            counters[name] += count
+    await MetricRollup.get_motor_collection().replace_one(
+        {"granularity": "day", "bucket_start": day},
+        {
+            "granularity": "day",
+            "bucket_start": day,
+            "counters": dict(counters),
+            "active_users_sketch": merge_sketches(r.active_users_sketch for r in hours),
+            "updated_at": datetime.utcnow(),
+        },
+        upsert=True,
+    )
+
+
+async def main(days: int, batch_size: int) -> None:
+    client = AsyncIOMotorClient(settings.MONGODB_URL)
+    await init_beanie(database=client[settings.DB_NAME], document_models=DOCUMENT_MODELS)
+
+    now = datetime.utcnow()
+    since = bucket_start(now - timedelta(days=days), "day")
+    until = bucket_start(now, "hour")
+    replayed = await rebuild_hours(since, until, batch_size)
+    print(f"Replayed {replayed} events into hourly rollups {since:%Y-%m-%d %H:00} .. {until:%Y-%m-%d %H:00}")
+
+    day = since
+    while day <= now:
+        await rebuild_day(day)
+        day += timedelta(days=1)
+    print(f"Recomputed daily rollups for {days + 1} days")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args()
+    asyncio.run(main(args.days, args.batch_size))
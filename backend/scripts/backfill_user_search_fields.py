@@ -0,0 +1,69 @@
+"""
+Backfill / repair the stored User search fields used by the admin user list:
+profile_completion, profile_tier and phone_reversed.
+
+They are refreshed on every insert/save, so this is only needed once for
+users written before the fields existed (or after changing the scoring
+rules in profile_scoring.py). Rewrites only users whose stored values
+differ. Safe to re-run; use --dry-run to just report drift.
+
+Usage (from backend/):
+    python scripts/backfill_user_search_fields.py [--dry-run] [--batch-size 500]
+"""
+import argparse
+import asyncio
+import os
+import sys
+
+# Add parent dir to path to import app modules
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from beanie import init_beanie
+from pymongo import UpdateOne
+
+from app.core.config import settings
+from app.main import DOCUMENT_MODELS
+from app.models.user import User
+
+DERIVED_FIELDS = ("profile_completion", "profile_tier", "phone_reversed")
+
+
+async def main(dry_run: bool, batch_size: int) -> None:
+    client = AsyncIOMotorClient(settings.MONGODB_URL)
+    await init_beanie(database=client[settings.DB_NAME], document_models=DOCUMENT_MODELS)
+    collection = User.get_motor_collection()
+
+    scanned = drifted = 0
+    last_id = None
+    while True:
+        query = {"_id": {"$gt": last_id}} if last_id else {}
+        raw_docs = await collection.find(query).sort("_id", 1).limit(batch_size).to_list(batch_size)
+        if not raw_docs:
+            break
+        last_id = raw_docs[-1]["_id"]
+        scanned += len(raw_docs)
+
+        updates = []
+        for raw in raw_docs:
+            u = User.model_validate(raw)
+            u.refresh_derived_fields()
+            values = {field: getattr(u, field) for field in DERIVED_FIELDS}
+            # Compare with the raw document: missing fields validate to model defaults.
+            if all(field in raw and raw[field] == value for field, value in values.items()):
+                continue
+            drifted += 1
+            updates.append(UpdateOne({"_id": raw["_id"]}, {"$set": values}))
+        if updates and not dry_run:
+            await collection.bulk_write(updates, ordered=False)
+
+    action = "would update" if dry_run else "updated"
+    print(f"Scanned {scanned} users, {action} {drifted}.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true", help="report drift without writing")
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+    asyncio.run(main(args.dry_run, args.batch_size))
@@ -0,0 +1,148 @@
+"""
+Benchmark the admin user detail and overview endpoints, sequential vs concurrent.
+
+Seeds a throwaway database (<DB_NAME>_bench by default) with one busy user
+(matches, threads, events, passes) and background users, then times
+GET /api/admin/users/{id} and GET /api/admin/metrics/overview with
+BH_QUERY_FANOUT_CONCURRENCY=1 (the old sequential behaviour) and with the
+configured fan-out, and prints the per-query Server-Timing means.
+
+Usage (from backend/):
+    python scripts/bench_admin_queries.py [--iterations 50] [--matches 500] [--events 20000] [--db blush_hour_bench]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+# Add parent dir to path to import app modules
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+import httpx
+from motor.motor_asyncio import AsyncIOMotorClient
+from beanie import init_beanie
+
+from app.core.config import settings
+from app.main import DOCUMENT_MODELS, app
+from app.auth.dependencies import get_current_admin
+from app.models.chat import ChatThread
+from app.models.chat_night import ChatNightPass, MatchUnlocked
+from app.models.events import AppEvent
+from app.models.user import User
+from app.services.metric_rollups import apply_rollups
+
+
+def percentile(samples: list, pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+async def seed(matches: int, events: int) -> tuple:
+    admin = User(phone_number="+919999999999", first_name="Admin", role="admin")
+    await admin.insert()
+    me = User(phone_number="+919000000000", first_name="Busy", gender="Man")
+    await me.insert()
+
+    partners = [User(phone_number=f"+917{index:09d}", first_name=f"P{index}", gender="Woman") for index in range(matches)]
+    await User.insert_many(partners)
+    partners = await User.find(User.gender == "Woman").to_list()
+    await MatchUnlocked.insert_many([
+        MatchUnlocked(user_ids=[str(me.id), str(p.id)], room_id=f"bench-{p.id}") for p in partners
+    ])
+    unlocked = await MatchUnlocked.find_all().to_list()
+    await ChatThread.insert_many([
+        ChatThread(match_id=m.id, participants=[me.id, p.id], last_message_at=m.created_at)
+        for m, p in zip(unlocked, partners)
+    ])
+
+    now = datetime.utcnow()
+    names = ["chat.message.sent", "chat_night.enter", "chat.messages.read", "auth.login.success"]
+    batch = []
+    for index in range(events):
+        owner = me if index % 4 == 0 else partners[index % len(partners)] if partners else me
+        batch.append(AppEvent(
+            event_name=names[index % len(names)],
+            source="backend",
+            user_id=str(owner.id),
+            created_at=now - timedelta(minutes=index % 1440),
+        ))
+        if len(batch) >= 5000:
+            await AppEvent.insert_many(batch)
+            await apply_rollups(batch)
+            batch = []
+    if batch:
+        await AppEvent.insert_many(batch)
+        await apply_rollups(batch)
+
+    today = (now + timedelta(hours=5, minutes=30)).date()
+    await ChatNightPass.insert_many([
+        ChatNightPass(user_id=str(me.id), date_ist=(today - timedelta(days=d)).strftime("%Y-%m-%d"), passes_total=2, passes_used=1)
+        for d in range(10)
+    ])
+    return admin, me
+
+
+async def time_endpoint(client: httpx.AsyncClient, path: str, iterations: int) -> dict:
+    samples_ms = []
+    per_query = defaultdict(list)
+    for _ in range(iterations):
+        started = time.perf_counter()
+        response = await client.get(path)
+        samples_ms.append((time.perf_counter() - started) * 1000)
+        assert response.status_code == 200, response.text
+        for part in response.headers.get("server-timing", "").split(","):
+            if ";dur=" in part:
+                name, dur = part.strip().split(";dur=")
+                per_query[name].append(float(dur))
+    return {
+        "p50_ms": round(percentile(samples_ms, 50), 2),
+        "p99_ms": round(percentile(samples_ms, 99), 2),
+        "mean_ms": round(statistics.mean(samples_ms), 2),
+        "queries": {name: round(statistics.mean(values), 2) for name, values in per_query.items()},
+    }
+
+
+async def main(iterations: int, matches: int, events: int, db_name: str) -> None:
+    client = AsyncIOMotorClient(settings.MONGODB_URL)
+    db = client[db_name]
+    await init_beanie(database=db, document_models=DOCUMENT_MODELS)
+    configured = settings.BH_QUERY_FANOUT_CONCURRENCY
+
+    print(f"Benchmarking admin endpoints on {settings.MONGODB_URL} db={db_name} (matches={matches}, events={events})")
+    try:
+        admin, me = await seed(matches, events)
+
+        async def _current_admin():
+            return admin
+
+        app.dependency_overrides[get_current_admin] = _current_admin
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as http:
+            for path in (f"/api/admin/users/{me.id}", "/api/admin/metrics/overview"):
+                await http.get(path)  # warm up
+                for label, concurrency in (("sequential", 1), ("concurrent", configured)):
+                    settings.BH_QUERY_FANOUT_CONCURRENCY = concurrency
+                    result = await time_endpoint(http, path, iterations)
+                    print(
+                        f"{path:<44} {label:<10} (x{concurrency})  p50={result['p50_ms']:>8}ms  "
+                        f"p99={result['p99_ms']:>8}ms  mean={result['mean_ms']:>8}ms"
+                    )
+                    print("    " + "  ".join(f"{name}={ms}ms" for name, ms in result["queries"].items()))
+    finally:
+        settings.BH_QUERY_FANOUT_CONCURRENCY = configured
+        app.dependency_overrides.pop(get_current_admin, None)
+        await client.drop_database(db_name)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--matches", type=int, default=500)
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--db", default=f"{settings.DB_NAME}_bench")
+    args = parser.parse_args()
+    asyncio.run(main(args.iterations, args.matches, args.events, args.db))
@@ -0,0 +1,136 @@
+"""
+Benchmark POST /api/chat-night/enter latency against a pool of queued users.
+
+Seeds a throwaway database (<DB_NAME>_bench by default) with N queued women,
+then times /enter for fresh men with V5 matching on. Each match removes one
+woman, so a replacement is queued (untimed) to keep the pool at N.
+
+Usage (from backend/):
+    python scripts/bench_chat_night_enter.py [--sizes 50,500,5000] [--iterations 50] [--db blush_hour_bench]
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+
+# Add parent dir to path to import app modules
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+os.environ.setdefault("CHAT_NIGHT_TEST_MODE", "true")
+os.environ.setdefault("CHAT_NIGHT_V5_MATCHING_ENABLED", "true")
+
+import httpx
+from motor.motor_asyncio import AsyncIOMotorClient
+from beanie import init_beanie
+
+from app.core.config import settings
+from app.main import DOCUMENT_MODELS, app
+from app.auth.dependencies import get_current_user
+from app.core.limiter import limiter
+from app.models.user import User
+from app.services.chat_night_queue import SIDE_WOMEN, get_chat_night_queue
+
+INTERESTS = ["music", "coffee", "travel", "art", "hiking", "films", "books", "food", "yoga", "gaming"]
+VALUES = ["honesty", "humor", "kindness", "ambition", "family"]
+LANGUAGES = ["English", "Hindi", "Tamil", "Kannada"]
+HABIT_CHOICES = ["yes", "no", "sometimes"]
+
+
+def random_profile(rng: random.Random, gender: str, index: int) -> User:
+    return User(
+        phone_number=f"+91{7 if gender == 'Woman' else 8}{index:09d}",
+        first_name=f"Bench{gender}{index}",
+        gender=gender,
+        onboarding_completed=True,
+        interests=rng.sample(INTERESTS, 4),
+        values=rng.sample(VALUES, 2),
+        languages=rng.sample(LANGUAGES, 2),
+        habits={key: rng.choice(HABIT_CHOICES) for key in ("drinking", "smoking", "exercise", "kids")},
+        prompts=[{"question": "q", "answer": "a"}] if rng.random() < 0.5 else [],
+    )
+
+
+def percentile(samples: list, pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+async def run_size(db, size: int, iterations: int, rng: random.Random) -> dict:
+    for name in await db.list_collection_names():
+        await db[name].delete_many({})
+
+    queue = get_chat_night_queue()
+    next_index = 0
+    for _ in range(size):
+        woman = random_profile(rng, "Woman", next_index)
+        next_index += 1
+        await woman.insert()
+        await queue.enqueue(str(woman.id), SIDE_WOMEN)
+
+    current = {}
+
+    async def _current_user():
+        return current["user"]
+
+    app.dependency_overrides[get_current_user] = _current_user
+    samples_ms = []
+    matched = 0
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        for i in range(iterations):
+            man = random_profile(rng, "Man", 100000 + size * 1000 + i)
+            await man.insert()
+            current["user"] = man
+
+            started = time.perf_counter()
+            response = await client.post("/api/chat-night/enter")
+            samples_ms.append((time.perf_counter() - started) * 1000)
+            if response.status_code == 200 and response.json().get("status") == "match_found":
+                matched += 1
+
+            replacement = random_profile(rng, "Woman", next_index)
+            next_index += 1
+            await replacement.insert()
+            await queue.enqueue(str(replacement.id), SIDE_WOMEN)
+
+    app.dependency_overrides.pop(get_current_user, None)
+    return {
+        "queued": size,
+        "iterations": iterations,
+        "matched": matched,
+        "p50_ms": round(percentile(samples_ms, 50), 2),
+        "p99_ms": round(percentile(samples_ms, 99), 2),
+        "mean_ms": round(statistics.mean(samples_ms), 2),
+    }
+
+
+async def main(sizes: list, iterations: int, db_name: str) -> None:
+    limiter.enabled = False
+    client = AsyncIOMotorClient(settings.MONGODB_URL)
+    db = client[db_name]
+    await init_beanie(database=db, document_models=DOCUMENT_MODELS)
+    rng = random.Random(42)
+
+    print(f"Benchmarking /api/chat-night/enter on {settings.MONGODB_URL} db={db_name}")
+    print(f"CHAT_NIGHT_V5_MAX_CANDIDATES={os.getenv('CHAT_NIGHT_V5_MAX_CANDIDATES', '50')}")
+    try:
+        for size in sizes:
+            result = await run_size(db, size, iterations, rng)
+            print(
+                f"queued={result['queued']:>6}  n={result['iterations']:>4}  matched={result['matched']:>4}  "
+                f"p50={result['p50_ms']:>8}ms  p99={result['p99_ms']:>8}ms  mean={result['mean_ms']:>8}ms"
+            )
+    finally:
+        await client.drop_database(db_name)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="50,500,5000")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--db", default=f"{settings.DB_NAME}_bench")
+    args = parser.parse_args()
+    asyncio.run(main([int(s) for s in args.sizes.split(",") if s.strip()], args.iterations, args.db))
@@ -0,0 +1,145 @@
+"""
+Benchmark GET /api/chat/threads for users with many matches.
+
+Seeds a throwaway database (<DB_NAME>_bench by default) with one user and N
+unlocked matches (each with a partner and a few unread messages; half the
+threads are left missing so the first request exercises the bulk upsert),
+then times the listing and counts MongoDB commands per request.
+
+Usage (from backend/):
+    python scripts/bench_chat_threads.py [--sizes 10,100,1000] [--iterations 30] [--db blush_hour_bench]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+# Add parent dir to path to import app modules
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+import httpx
+from motor.motor_asyncio import AsyncIOMotorClient
+from beanie import init_beanie
+from pymongo import monitoring
+
+from app.core.config import settings
+from app.main import DOCUMENT_MODELS, app
+from app.auth.dependencies import get_current_user
+from app.models.chat import ChatMessage, ChatThread
+from app.models.chat_night import MatchUnlocked
+from app.models.user import User
+
+
+class CommandCounter(monitoring.CommandListener):
+    def __init__(self) -> None:
+        self.count = 0
+
+    def started(self, event) -> None:
+        self.count += 1
+
+    def succeeded(self, event) -> None:
+        pass
+
+    def failed(self, event) -> None:
+        pass
+
+
+def percentile(samples: list, pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+async def seed(size: int) -> User:
+    me = User(phone_number="+919000000000", first_name="Bench", gender="Man")
+    await me.insert()
+    partners = [
+        User(phone_number=f"+917{index:09d}", first_name=f"Partner{index}", gender="Woman")
+        for index in range(size)
+    ]
+    await User.insert_many(partners)
+    partners = await User.find(User.gender == "Woman").to_list()
+
+    matches = [MatchUnlocked(user_ids=[str(me.id), str(p.id)], room_id=f"bench-{p.id}") for p in partners]
+    await MatchUnlocked.insert_many(matches)
+    matches = await MatchUnlocked.find_all().to_list()
+
+    threads = [
+        ChatThread(match_id=m.id, participants=[me.id, p.id], created_at=m.created_at, unread_counts={str(me.id): 3})
+        for index, (m, p) in enumerate(zip(matches, partners))
+        if index % 2 == 0
+    ]
+    if threads:
+        await ChatThread.insert_many(threads)
+    threads = await ChatThread.find_all().to_list()
+
+    messages = []
+    for thread in threads:
+        partner_id = next(pid for pid in thread.participants if pid != me.id)
+        messages.extend(ChatMessage(thread_id=thread.id, sender_id=partner_id, text="hi") for _ in range(3))
+    if messages:
+        await ChatMessage.insert_many(messages)
+    return me
+
+
+async def run_size(db, counter: CommandCounter, size: int, iterations: int) -> dict:
+    for name in await db.list_collection_names():
+        await db[name].delete_many({})
+    me = await seed(size)
+
+    async def _current_user():
+        return me
+
+    app.dependency_overrides[get_current_user] = _current_user
+    samples_ms = []
+    commands = []
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        first = await client.get("/api/chat/threads")
+        assert first.status_code == 200, first.text
+        listed = len(first.json()["threads"])
+        for _ in range(iterations):
+            counter.count = 0
+            started = time.perf_counter()
+            response = await client.get("/api/chat/threads")
+            samples_ms.append((time.perf_counter() - started) * 1000)
+            commands.append(counter.count)
+            assert response.status_code == 200, response.text
+
+    app.dependency_overrides.pop(get_current_user, None)
+    return {
+        "matches": size,
+        "listed": listed,
+        "commands": max(commands),
+        "p50_ms": round(percentile(samples_ms, 50), 2),
+        "p99_ms": round(percentile(samples_ms, 99), 2),
+        "mean_ms": round(statistics.mean(samples_ms), 2),
+    }
+
+
+async def main(sizes: list, iterations: int, db_name: str) -> None:
+    counter = CommandCounter()
+    client = AsyncIOMotorClient(settings.MONGODB_URL, event_listeners=[counter])
+    db = client[db_name]
+    await init_beanie(database=db, document_models=DOCUMENT_MODELS)
+
+    print(f"Benchmarking /api/chat/threads on {settings.MONGODB_URL} db={db_name}")
+    try:
+        for size in sizes:
+            result = await run_size(db, counter, size, iterations)
+            print(
+                f"matches={result['matches']:>5}  listed={result['listed']:>5}  mongo_cmds/req={result['commands']:>4}  "
+                f"p50={result['p50_ms']:>8}ms  p99={result['p99_ms']:>8}ms  mean={result['mean_ms']:>8}ms"
+            )
+    finally:
+        await client.drop_database(db_name)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10,100,1000")
+    parser.add_argument("--iterations", type=int, default=30)
+    parser.add_argument("--db", default=f"{settings.DB_NAME}_bench")
+    args = parser.parse_args()
+    asyncio.run(main([int(s) for s in args.sizes.split(",") if s.strip()], args.iterations, args.db))
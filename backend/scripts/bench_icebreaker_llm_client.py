@@ -0,0 +1,162 @@
+"""
+Micro-benchmark of per-call client overhead for the icebreaker OpenAI call.
+
+Starts a stub OpenAI-compatible server in this process (POST
+/v1/chat/completions, answering with a fixed structured payload after
+--latency-ms), points the OpenAI client at it and times N calls through:
+- fresh:  a new ChatOpenAI + with_structured_output per call (old behaviour);
+- cached: the runnable from _build_structured_openai_runnable, reused with
+          the shared keep-alive connection pool.
+Also reports how many TCP connections each mode opened against the stub.
+No database and no real OpenAI key are needed.
+
+Usage (from backend/):
+    python scripts/bench_icebreaker_llm_client.py [--calls 200] [--concurrency 1] [--latency-ms 0] [--port 8766]
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+import warnings
+
+# Add parent dir to path to import app modules
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, Request
+
+from app.schemas.chat_night import SanitizedMatchContext, SanitizedPersonContext
+from app.services import ai_icebreakers
+
+# ChatOpenAI warns about max_completion_tokens on every construction.
+warnings.filterwarnings("ignore", message=".*max_completion_tokens.*")
+
+STUB_PAYLOAD = {
+    "reasons": ["You both enjoy hiking", "Shared love of live music", "Both value honesty"],
+    "icebreakers": [
+        "Which trail would you take me on first?",
+        "What was the last gig that surprised you?",
+        "What does a perfect Sunday look like?",
+        "Coffee shop or bookstore for a first stop?",
+        "What is a small habit you are proud of?",
+    ],
+}
+
+
+def percentile(samples: list, pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def build_stub_app(latency_ms: float, connections: set) -> FastAPI:
+    stub = FastAPI()
+
+    @stub.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        connections.add(request.scope["client"])
+        if latency_ms:
+            await asyncio.sleep(latency_ms / 1000)
+        return {
+            "id": "chatcmpl-stub",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "stub"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": json.dumps(STUB_PAYLOAD), "refusal": None},
+                "finish_reason": "stop",
+                "logprobs": None,
+            }],
+            "usage": {"prompt_tokens": 200, "completion_tokens": 80, "total_tokens": 280},
+        }
+
+    return stub
+
+
+def sample_context() -> SanitizedMatchContext:
+    return SanitizedMatchContext(
+        room_id="bench-room",
+        person_a=SanitizedPersonContext(age_bucket="25-29", interests=["hiking", "music"], languages=["English"]),
+        person_b=SanitizedPersonContext(age_bucket="25-29", interests=["music", "books"], languages=["English"]),
+    )
+
+
+async def run_mode(mode: str, calls: int, concurrency: int, api_key: str) -> list:
+    messages = ai_icebreakers._openai_messages(sample_context())
+    gate = asyncio.Semaphore(concurrency)
+    samples_ms = []
+
+    async def one_call():
+        async with gate:
+            started = time.perf_counter()
+            if mode == "fresh":
+                # Own client per call, closed afterwards: same per-call cost as
+                # the old default client, without leaking it into the GC.
+                http_client = httpx.AsyncClient()
+                try:
+                    runnable = ai_icebreakers._new_structured_openai_runnable(
+                        model=ai_icebreakers._openai_model(),
+                        api_key=api_key,
+                        timeout_seconds=ai_icebreakers._openai_timeout_seconds(),
+                        max_output_tokens=ai_icebreakers._openai_max_output_tokens(),
+                        http_async_client=http_client,
+                    )
+                    result = await runnable.ainvoke(messages)
+                finally:
+                    await http_client.aclose()
+            else:
+                runnable = ai_icebreakers._build_structured_openai_runnable(api_key)
+                result = await runnable.ainvoke(messages)
+            samples_ms.append((time.perf_counter() - started) * 1000)
+            assert ai_icebreakers._validate_output_shape(result) is not None, result
+
+    await asyncio.gather(*(one_call() for _ in range(calls)))
+    return samples_ms
+
+
+async def main(args) -> None:
+    connections: set = set()
+    server = uvicorn.Server(uvicorn.Config(
+        build_stub_app(args.latency_ms, connections), host="127.0.0.1", port=args.port, log_level="warning"
+    ))
+    server_task = asyncio.create_task(server.serve())
+    while not server.started:
+        if server_task.done():
+            server_task.result()
+        await asyncio.sleep(0.05)
+
+    api_key = "sk-bench"
+    os.environ["OPENAI_API_BASE"] = f"http://127.0.0.1:{args.port}/v1"
+    print(
+        f"Icebreaker LLM client benchmark: {args.calls} calls, concurrency {args.concurrency}, "
+        f"stub latency {args.latency_ms}ms"
+    )
+    try:
+        for mode in ("fresh", "cached"):
+            await run_mode(mode, min(5, args.calls), 1, api_key)  # warm up imports / first pool
+            connections.clear()
+            samples_ms = await run_mode(mode, args.calls, args.concurrency, api_key)
+            print(
+                f"  {mode:<7} p50={percentile(samples_ms, 50):>7.2f}ms  p99={percentile(samples_ms, 99):>7.2f}ms  "
+                f"mean={statistics.mean(samples_ms):>7.2f}ms  connections={len(connections)}"
+            )
+    finally:
+        await ai_icebreakers.close_openai_http_client()
+        server.should_exit = True
+        await server_task
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="simulated model latency of the stub")
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+    asyncio.run(main(args))
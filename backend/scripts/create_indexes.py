@@ -9,15 +9,7 @@ from motor.motor_asyncio import AsyncIOMotorClient
 from beanie import init_beanie
 
 from app.core.config import settings
-from app.models.user import User
-from app.models.chat_night import (
-    ChatNightIcebreakers,
-    ChatNightPass,
-    ChatNightRoom,
-    MatchUnlocked,
-)
-from app.models.chat import ChatThread, ChatMessage
-from app.models.events import AppEvent
+from app.main import DOCUMENT_MODELS
 
 async def create_indexes():
     print(f"Connecting to MongoDB at {settings.MONGODB_URL}...")
@@ -26,16 +18,7 @@ async def create_indexes():
     print(f"Initializing Beanie for database: {settings.DB_NAME}")
     await init_beanie(
         database=client[settings.DB_NAME], 
-        document_models=[
-            User, 
-            ChatNightPass, 
-            ChatNightRoom, 
-            MatchUnlocked,
-            ChatNightIcebreakers,
-            AppEvent,
-            ChatThread,
-            ChatMessage
-        ]
+        document_models=DOCUMENT_MODELS
     )
     print("Indexes created successfully.")
 
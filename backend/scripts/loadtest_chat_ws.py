@@ -0,0 +1,222 @@
+"""
+Load test for chat delivery over /api/chat/ws.
+
+Seeds N users paired into N/2 chat threads in a throwaway database
+(<DB_NAME>_loadtest by default), opens one socket per user, then sends
+messages over HTTP at a fixed rate and measures the time from starting
+the POST to the partner's socket receiving the `message` event.
+
+By default the app runs in this process under uvicorn with rate limiting
+off, so client and server share one event loop and the figures are an
+upper bound. To test a deployed stack instead, start it with
+RATELIMIT_ENABLED=false and DB_NAME=<the --db below>, and pass --base-url.
+
+Usage (from backend/):
+    python scripts/loadtest_chat_ws.py [--sockets 1000] [--messages 2000] [--rate 200]
+                                       [--base-url http://127.0.0.1:8000] [--db blush_hour_loadtest]
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import statistics
+import sys
+import time
+
+# Add parent dir to path to import app modules
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+import httpx
+import websockets
+from motor.motor_asyncio import AsyncIOMotorClient
+from beanie import init_beanie
+
+from app.core.config import settings
+from app.main import DOCUMENT_MODELS, app
+from app.auth.utils import create_access_token
+from app.models.chat import ChatThread
+from app.models.chat_night import MatchUnlocked
+from app.models.user import User
+from app.services.chat_hub import get_chat_hub
+
+
+def percentile(samples: list, pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def raise_fd_limit(wanted: int) -> None:
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < wanted:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (min(wanted, hard), hard))
+
+
+async def seed(sockets: int) -> list:
+    """[(user, token, thread_id)] with consecutive users sharing a thread."""
+    users = [
+        User(phone_number=f"+916{index:09d}", first_name=f"Load{index}", gender="Man" if index % 2 else "Woman")
+        for index in range(sockets)
+    ]
+    await User.insert_many(users)
+    users = await User.find(User.phone_number >= "+916", User.phone_number < "+917").sort(+User.phone_number).to_list()
+
+    pairs = [(users[i], users[i + 1]) for i in range(0, len(users) - 1, 2)]
+    matches = [MatchUnlocked(user_ids=[str(a.id), str(b.id)], room_id=f"loadtest-{a.id}") for a, b in pairs]
+    await MatchUnlocked.insert_many(matches)
+    matches = await MatchUnlocked.find(MatchUnlocked.room_id >= "loadtest-").to_list()
+    match_by_room = {m.room_id: m for m in matches}
+    threads = [
+        ChatThread(match_id=match_by_room[f"loadtest-{a.id}"].id, participants=[a.id, b.id])
+        for a, b in pairs
+    ]
+    await ChatThread.insert_many(threads)
+    thread_by_user = {}
+    for t in await ChatThread.find_all().to_list():
+        for participant_id in t.participants:
+            thread_by_user[participant_id] = str(t.id)
+
+    return [
+        (u, create_access_token({"sub": u.phone_number}), thread_by_user[u.id])
+        for u in users
+        if u.id in thread_by_user
+    ]
+
+
+async def run(base_url: str, seeded: list, messages: int, rate: float, connect_concurrency: int) -> dict:
+    ws_url = base_url.replace("http", "ws", 1) + "/api/chat/ws"
+    sent_at = {}
+    latencies_ms = []
+    post_ms = []
+    all_delivered = asyncio.Event()
+
+    async def open_socket(token: str, gate: asyncio.Semaphore):
+        async with gate:
+            started = time.perf_counter()
+            ws = await websockets.connect(f"{ws_url}?token={token}", max_queue=None, open_timeout=30)
+            ready = json.loads(await ws.recv())
+            assert ready["type"] == "ready", ready
+            return ws, (time.perf_counter() - started) * 1000
+
+    async def read_socket(ws, user_id: str):
+        try:
+            async for raw in ws:
+                if raw == "pong":
+                    continue
+                event = json.loads(raw)
+                if event.get("type") != "message" or event["message"]["sender_id"] == user_id:
+                    continue
+                started = sent_at.get(event["message"]["text"])
+                if started is not None:
+                    latencies_ms.append((time.perf_counter() - started) * 1000)
+                    if len(latencies_ms) >= messages:
+                        all_delivered.set()
+        except websockets.ConnectionClosed:
+            pass
+
+    gate = asyncio.Semaphore(connect_concurrency)
+    connect_started = time.perf_counter()
+    opened = await asyncio.gather(*(open_socket(token, gate) for _, token, _ in seeded))
+    connect_total_s = time.perf_counter() - connect_started
+    sockets = [ws for ws, _ in opened]
+    readers = [asyncio.create_task(read_socket(ws, str(u.id))) for ws, (u, _, _) in zip(sockets, seeded)]
+
+    limits = httpx.Limits(max_connections=200, max_keepalive_connections=200)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        async def send(index: int):
+            user, token, thread_id = seeded[index % len(seeded)]
+            text = f"lt-{index}"
+            sent_at[text] = time.perf_counter()
+            response = await client.post(
+                f"/api/chat/threads/{thread_id}/messages",
+                json={"text": text},
+                headers={"Authorization": f"Bearer {token}"},
+            )
+            post_ms.append((time.perf_counter() - sent_at[text]) * 1000)
+            response.raise_for_status()
+
+        senders = []
+        send_started = time.perf_counter()
+        for index in range(messages):
+            delay = send_started + index / rate - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            senders.append(asyncio.create_task(send(index)))
+        await asyncio.gather(*senders)
+        try:
+            await asyncio.wait_for(all_delivered.wait(), timeout=10)
+        except asyncio.TimeoutError:
+            pass
+
+    for ws in sockets:
+        await ws.close()
+    for reader in readers:
+        reader.cancel()
+
+    connect_ms = [ms for _, ms in opened]
+    return {
+        "sockets": len(sockets),
+        "connect_total_s": round(connect_total_s, 2),
+        "connect_p50_ms": round(percentile(connect_ms, 50), 2),
+        "connect_p99_ms": round(percentile(connect_ms, 99), 2),
+        "sent": messages,
+        "delivered": len(latencies_ms),
+        "post_p50_ms": round(percentile(post_ms, 50), 2),
+        "delivery_p50_ms": round(percentile(latencies_ms, 50), 2) if latencies_ms else None,
+        "delivery_p95_ms": round(percentile(latencies_ms, 95), 2) if latencies_ms else None,
+        "delivery_p99_ms": round(percentile(latencies_ms, 99), 2) if latencies_ms else None,
+        "delivery_max_ms": round(max(latencies_ms), 2) if latencies_ms else None,
+        "delivery_mean_ms": round(statistics.mean(latencies_ms), 2) if latencies_ms else None,
+    }
+
+
+async def main(args) -> None:
+    raise_fd_limit(4 * args.sockets + 256)
+    server = server_task = None
+    client = None
+
+    if args.base_url:
+        base_url = args.base_url.rstrip("/")
+        client = AsyncIOMotorClient(settings.MONGODB_URL)
+        await init_beanie(database=client[args.db], document_models=DOCUMENT_MODELS)
+    else:
+        import uvicorn
+        from app.core.limiter import limiter
+
+        settings.DB_NAME = args.db
+        limiter.enabled = False
+        server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=args.port, log_level="warning"))
+        server_task = asyncio.create_task(server.serve())
+        while not server.started:
+            if server_task.done():
+                server_task.result()
+            await asyncio.sleep(0.05)
+        base_url = f"http://127.0.0.1:{args.port}"
+
+    print(f"Chat WebSocket load test: {args.sockets} sockets, {args.messages} messages at {args.rate}/s against {base_url} db={args.db}")
+    try:
+        seeded = await seed(args.sockets)
+        result = await run(base_url, seeded, args.messages, args.rate, args.connect_concurrency)
+        for key, value in result.items():
+            print(f"  {key:<18} {value}")
+        if server is not None:
+            print(f"  hub_stats          {get_chat_hub().stats}")
+    finally:
+        await User.get_motor_collection().database.client.drop_database(args.db)
+        if server is not None:
+            server.should_exit = True
+            await server_task
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sockets", type=int, default=1000)
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--rate", type=float, default=200.0, help="messages per second")
+    parser.add_argument("--connect-concurrency", type=int, default=100)
+    parser.add_argument("--base-url", default=None, help="target an already running server instead of starting one")
+    parser.add_argument("--port", type=int, default=8765, help="port for the in-process server")
+    parser.add_argument("--db", default=f"{settings.DB_NAME}_loadtest")
+    args = parser.parse_args()
+    asyncio.run(main(args))
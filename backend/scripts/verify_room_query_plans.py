@@ -0,0 +1,122 @@
+"""
+Query-plan regression check for the hot Chat Night room/queue lookups.
+
+Creates the Beanie indexes in a throwaway database (<DB_NAME>_plans by
+default), seeds some rooms, runs explain() on each hot query shape and
+exits non-zero if any winning plan contains a COLLSCAN. Needs a real
+mongod (mongomock has no query planner).
+
+Keep hot_queries() in sync with:
+    routers/chat_night.py  find_active_room_for_user, get_recent_partner_ids,
+                           get_recent_pair_keys, sweep_expired_rooms, room_id lookups
+    routers/voice.py       find_eligible_engaged_room, find_latest_user_room
+    services/chat_night_queue.py  MongoChatNightQueue.list_queued / claim
+
+Usage (from backend/):
+    python scripts/verify_room_query_plans.py [--db blush_hour_plans] [--keep]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import uuid
+from datetime import datetime, timedelta, timezone
+
+# Add parent dir to path to import app modules
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from beanie import init_beanie
+
+from app.core.config import settings
+from app.main import DOCUMENT_MODELS
+from app.models.chat_night import ChatNightQueueEntry, ChatNightRoom
+
+USER_ID = "65f000000000000000000001"
+OTHER_IDS = [f"65f0000000000000000{index:05d}" for index in range(2, 40)]
+
+
+def hot_queries(now: datetime) -> list:
+    rooms = ChatNightRoom.get_settings().name
+    queue = ChatNightQueueEntry.get_settings().name
+    either = {"$or": [{"male_user_id": USER_ID}, {"female_user_id": USER_ID}]}
+    return [
+        ("find_active_room_for_user", rooms,
+         {**either, "state": {"$in": ["active", "engaged"]}, "ends_at": {"$gt": now}}, [("starts_at", -1)]),
+        ("get_recent_partner_ids", rooms,
+         {**either, "starts_at": {"$gte": now - timedelta(minutes=30)}}, None),
+        ("get_recent_pair_keys", rooms,
+         {"$or": [{"male_user_id": {"$in": OTHER_IDS}}, {"female_user_id": {"$in": OTHER_IDS}}],
+          "starts_at": {"$gte": now - timedelta(minutes=30)}}, None),
+        ("sweep_expired_rooms", rooms,
+         {"state": {"$in": ["active", "engaged"]}, "ends_at": {"$lte": now}}, None),
+        ("voice.find_eligible_engaged_room", rooms,
+         {**either, "state": "engaged", "ends_at": {"$gt": now}}, [("starts_at", -1)]),
+        ("voice.find_latest_user_room", rooms, either, [("starts_at", -1)]),
+        ("room_by_room_id", rooms, {"room_id": str(uuid.uuid4())}, None),
+        ("queue.list_queued", queue, {"side": "women"}, [("enqueued_at", 1), ("_id", 1)]),
+        ("queue.claim", queue, {"user_id": USER_ID, "side": "women"}, None),
+    ]
+
+
+def plan_stages(node) -> list:
+    stages = []
+    if isinstance(node, dict):
+        if "stage" in node:
+            stages.append(node["stage"])
+        for value in node.values():
+            stages.extend(plan_stages(value))
+    elif isinstance(node, list):
+        for value in node:
+            stages.extend(plan_stages(value))
+    return stages
+
+
+async def seed(now: datetime) -> None:
+    rooms = []
+    for index, other_id in enumerate(OTHER_IDS * 5):
+        started = now - timedelta(minutes=index)
+        male, female = (USER_ID, other_id) if index % 2 else (other_id, USER_ID)
+        rooms.append(ChatNightRoom(
+            room_id=str(uuid.uuid4()),
+            male_user_id=male,
+            female_user_id=female,
+            starts_at=started,
+            ends_at=started + timedelta(minutes=5),
+            state=["active", "engaged", "ended"][index % 3],
+        ))
+    await ChatNightRoom.insert_many(rooms)
+
+
+async def main(db_name: str, keep: bool) -> int:
+    client = AsyncIOMotorClient(settings.MONGODB_URL, serverSelectionTimeoutMS=5000)
+    db = client[db_name]
+    await init_beanie(database=db, document_models=DOCUMENT_MODELS)
+    now = datetime.now(timezone.utc)
+    failures = 0
+    try:
+        await seed(now)
+        for name, collection, query, sort in hot_queries(now):
+            command = {"find": collection, "filter": query}
+            if sort:
+                command["sort"] = dict(sort)
+            explained = await db.command({"explain": command, "verbosity": "queryPlanner"})
+            stages = plan_stages(explained["queryPlanner"]["winningPlan"])
+            ok = "COLLSCAN" not in stages
+            failures += 0 if ok else 1
+            print(f"{'OK  ' if ok else 'FAIL'} {name:<36} {' > '.join(stages)}")
+    finally:
+        if not keep:
+            await client.drop_database(db_name)
+
+    if failures:
+        print(f"{failures} hot queries fall back to COLLSCAN")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=f"{settings.DB_NAME}_plans")
+    parser.add_argument("--keep", action="store_true", help="keep the database for manual inspection")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.db, args.keep)))
@@ -0,0 +1,97 @@
+"""
+Parity check: the NumPy V5 engine must rank exactly like rank_candidates.
+
+Compares every output field (score, reason tags, shared interests, recency
+keys, SHA1 tie-breaker and final order) over randomized pools, recency
+bucket boundaries, naive/aware datetimes and tie-heavy pools where only
+the hash decides the order. Exits non-zero on the first mismatch.
+
+Usage (from backend/):
+    python scripts/verify_v5_vectorized_parity.py [--trials 300] [--seed 7]
+"""
+import argparse
+import os
+import random
+import sys
+from datetime import datetime, timedelta, timezone
+
+# Add parent dir to path to import app modules
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from app.services.chat_night_matching_v5 import HABIT_KEYS, rank_candidates
+from app.services.chat_night_matching_v5_vectorized import rank_candidates_vectorized
+
+TAGS = ["music", "Music ", "coffee", "travel", "art", "hiking", "", " ", None, 7]
+HABIT_VALUES = ["yes", "Yes ", "no", "sometimes", None, "", 1]
+NOW = datetime(2026, 3, 1, 21, 30, tzinfo=timezone.utc)
+BOUNDARY_AGES = [
+    timedelta(0),
+    timedelta(minutes=-3),
+    timedelta(minutes=2),
+    timedelta(minutes=2, microseconds=1),
+    timedelta(minutes=5),
+    timedelta(minutes=10, microseconds=-1),
+    timedelta(minutes=20),
+    timedelta(minutes=20, microseconds=1),
+    timedelta(days=3),
+]
+
+
+def random_user(rng: random.Random, user_id: str) -> dict:
+    user = {
+        "id": user_id,
+        "interests": rng.sample(TAGS, rng.randint(0, 6)),
+        "values": rng.sample(TAGS, rng.randint(0, 3)),
+        "languages": rng.choice([["English"], ["Hindi", "English"], [], "English", None]),
+        "habits": {key: rng.choice(HABIT_VALUES) for key in HABIT_KEYS if rng.random() < 0.7},
+        "prompts": rng.choice([[], [{"question": "q", "answer": "a"}], None]),
+    }
+    if rng.random() < 0.7:
+        last_active = NOW - rng.choice(BOUNDARY_AGES + [timedelta(seconds=rng.randint(0, 1800))])
+        if rng.random() < 0.2:
+            last_active = last_active.replace(tzinfo=None)
+        user["last_active_at"] = last_active
+    return user
+
+
+def tie_heavy_pool(rng: random.Random, trial: int, size: int) -> list:
+    template = random_user(rng, "template")
+    return [dict(template, id=f"tie{trial}-{index}") for index in range(size)]
+
+
+def compare(trial: int, user: dict, candidates: list, limit: int) -> None:
+    expected = rank_candidates(user, candidates, now=NOW, limit=limit)
+    actual = rank_candidates_vectorized(user, candidates, now=NOW, limit=limit)
+    if len(expected) != len(actual):
+        raise SystemExit(f"trial {trial}: length {len(actual)} != {len(expected)}")
+    for position, (want, got) in enumerate(zip(expected, actual)):
+        if want["candidate"] is not got["candidate"] or {k: v for k, v in want.items() if k != "candidate"} != {
+            k: v for k, v in got.items() if k != "candidate"
+        }:
+            raise SystemExit(
+                f"trial {trial} position {position}:\n  python={dict(want, candidate=want['candidate']['id'])}"
+                f"\n  numpy ={dict(got, candidate=got['candidate']['id'])}"
+            )
+
+
+def main(trials: int, seed: int) -> None:
+    rng = random.Random(seed)
+    compared = 0
+    for trial in range(trials):
+        user = random_user(rng, f"user{trial}")
+        if trial % 3 == 0:
+            candidates = tie_heavy_pool(rng, trial, rng.randint(2, 40))
+        else:
+            candidates = [random_user(rng, f"cand{trial}-{index}") for index in range(rng.randint(0, 120))]
+        limit = rng.choice([len(candidates), 50, 5, 0])
+        compare(trial, user, candidates, limit)
+        compared += min(len(candidates), limit)
+    print(f"OK: {trials} pools, {compared} ranked candidates identical")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--trials", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    main(args.trials, args.seed)